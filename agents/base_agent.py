@@ -0,0 +1,91 @@
+import asyncio
+import logging
+from tools.model_registry import default_registry
+from tools.metrics import span
+from agents.query_analysis import analyze_query
+from tools.gemini_utils import call_gemini_with_retry, call_gemini_with_retry_async, stream_gemini_with_retry_async
+
+# Set up logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+class BaseAgent:
+    """Shared request flow for the subject agents.
+
+    Subclasses implement ``_prepare_query`` which runs the local tools and
+    returns ``(model, prompt, prefix)``. It receives the query's
+    ``QueryFeatures`` (computed once here unless the caller already has them),
+    so agents never run their own pattern detection. The prompt is sent to Gemini and the
+    explanation is appended to ``prefix``. When ``prompt`` is None, ``prefix``
+    is already the complete response (e.g. a tool error) and no AI call is made.
+
+    Models come from a shared ModelRegistry (the process-wide default unless
+    one is injected), so agents never build their own GenerativeModel.
+    """
+
+    def __init__(self, api_key=None, model_registry=None):
+        self.model_registry = model_registry or default_registry
+        if api_key:
+            self.model_registry.configure(api_key)
+
+    def format_history(self, history, limit=3):
+        """Format the last few interactions as Q/A lines for prompt context"""
+        if not history:
+            return ""
+        history_items = []
+        for h in history[-limit:]:
+            if isinstance(h, dict) and 'query' in h and 'response' in h:
+                history_items.append(f"Q: {h['query']}")
+                history_items.append(f"A: {h['response']}")
+        return "\n".join(history_items)
+
+    def format_context(self, history):
+        """Prompt prefix for ``history``: either the ready-made context string from
+        ConversationManager.get_context or a list of interactions to format"""
+        if isinstance(history, str):
+            return history
+        with span("format_history"):
+            history_text = self.format_history(history)
+        return f"Previous conversation:\n{history_text}\n\n" if history_text else ""
+
+    def _prepare_query(self, query, history, features):
+        raise NotImplementedError
+
+    def _timed_prepare_query(self, query, history, features=None):
+        if features is None:
+            with span("analyze_query"):
+                features = analyze_query(query)
+        # Local tool time (solvers, lookups, prompt building) separately from the Gemini call
+        with span("agent_prepare", agent=type(self).__name__):
+            return self._prepare_query(query, history, features)
+
+    def handle_query(self, query, history, features=None):
+        with span("agent", agent=type(self).__name__):
+            model, prompt, prefix = self._timed_prepare_query(query, history, features)
+            if prompt is None:
+                return prefix
+            explanation = call_gemini_with_retry(model, prompt)
+            return f"{prefix}{explanation}"
+
+    async def handle_query_async(self, query, history, features=None):
+        with span("agent", agent=type(self).__name__):
+            # Local tools (e.g. SymPy) can be CPU heavy, keep them off the event loop
+            model, prompt, prefix = await asyncio.to_thread(self._timed_prepare_query, query, history, features)
+            if prompt is None:
+                return prefix
+            explanation = await call_gemini_with_retry_async(model, prompt)
+            return f"{prefix}{explanation}"
+
+    async def stream_query_async(self, query, history, features=None):
+        """Yield the response in chunks: the tool output prefix first, then Gemini tokens.
+
+        Timed as the same "agent" stage as handle_query_async, from preparation to the last chunk.
+        """
+        with span("agent", agent=type(self).__name__):
+            model, prompt, prefix = await asyncio.to_thread(self._timed_prepare_query, query, history, features)
+            if prefix:
+                yield prefix
+            if prompt is None:
+                return
+            async for chunk in stream_gemini_with_retry_async(model, prompt):
+                yield chunk
@@ -1,48 +1,54 @@
-import google.generativeai as genai
 from tools.gemini_utils import call_gemini_with_retry
-from tools.constants import CHEMISTRY_CONSTANTS
-import re
+from agents.base_agent import BaseAgent
+from tools.constants import constant_reference, format_constant, get_constant
+from tools.equation_balancer import balance_equation, try_balance
+from tools.formula_parser import describe_formula
+from tools.periodic_table import format_element, get_element
 import logging
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-class ChemistryAgent:
-    def __init__(self, api_key):
+class ChemistryAgent(BaseAgent):
+    def __init__(self, api_key=None, model_registry=None):
         logger.info("Initializing Chemistry Agent")
-        genai.configure(api_key=api_key)
-        self.model = genai.GenerativeModel('gemini-2.0-flash')
+        super().__init__(api_key, model_registry)
+        self.model = self.model_registry.get_model('gemini-2.0-flash')
 
-    def handle_query(self, query, history):
+    def _prepare_query(self, query, history, features):
         logger.info("Processing chemistry query")
-        
-        # Format conversation history
-        history_text = ""
-        if history:
-            history_items = []
-            for h in history[-3:]:  # Last 3 interactions
-                if isinstance(h, dict) and 'query' in h and 'response' in h:
-                    history_items.append(f"Q: {h['query']}")
-                    history_items.append(f"A: {h['response']}")
-            history_text = "\n".join(history_items)
 
-        # Check for specific chemistry patterns
-        query_lower = query.lower()
-        
-        # Chemical formula pattern (e.g., H2O, NaCl, CH4)
-        formula_pattern = r"\b[A-Z][a-z]?(?:\d+)?(?:[A-Z][a-z]?(?:\d+)?)*\b"
-        formulas = re.findall(formula_pattern, query)
-        
-        # Chemical equation pattern (e.g., reactions with ->)
-        equation_pattern = r"[A-Za-z0-9\+\s]+\s*[-=]>\s*[A-Za-z0-9\+\s]+"
-        has_equation = re.search(equation_pattern, query)
-        
         # Determine chemistry topic
-        context = f"Previous conversation:\n{history_text}\n\n" if history_text else ""
+        context = self.format_context(history)
+
+        if features.constant is not None:
+            result = get_constant(features.constant)
+            if isinstance(result, dict):
+                logger.info(f"Found chemistry constant in query: {features.constant}")
+                if features.asks_constant_value:
+                    return self.model, None, format_constant(result)
+                # The question itself goes to Gemini below, with the registry value as a known fact
+                context += constant_reference(result)
         
-        if has_equation:
+        if features.has_chemical_equation:
             logger.info("Detected chemical equation")
+            balanced = self.balance_locally(features.reaction)
+            if balanced is not None:
+                answer = f"Balanced equation: {balanced}"
+                if features.asks_balance and not features.needs_explanation:
+                    return self.model, None, answer
+                # Gemini explains a balance it is given rather than working one out
+                prompt = f"""{context}You are an expert chemistry tutor. The user has asked about the reaction {features.reaction}.
+            It balances as {balanced}; this has already been shown to the user, so do not rebalance it.
+            Please provide a detailed explanation including:
+            1. The type of reaction
+            2. How the coefficients follow from conserving each element
+            3. Products and reactants
+            4. Any relevant chemical principles
+
+            Question: {query}"""
+                return self.model, prompt, f"{answer}\n\n"
             prompt = f"""{context}You are an expert chemistry tutor. The user has asked about a chemical equation or reaction. 
             Please provide a detailed explanation including:
             1. The type of reaction
@@ -52,8 +58,29 @@ class ChemistryAgent:
             
             Question: {query}"""
             
-        elif formulas:
-            logger.info(f"Detected chemical formulas: {formulas}")
+        elif features.compounds or (features.elements and features.asks_chemistry_facts):
+            # Masses, composition and element data come from the bundled tables;
+            # Gemini is only asked for the explanation, if the question wants one
+            facts = "\n".join([describe_formula(compound) for compound in features.compounds]
+                              + [format_element(get_element(symbol)) for symbol in features.elements])
+            logger.info(f"Answering locally for compounds {features.compounds} and elements {features.elements}")
+            if features.asks_chemistry_facts and not features.needs_explanation:
+                return self.model, None, facts
+            subjects = ", ".join(features.compounds + features.elements)
+            prompt = f"""{context}You are an expert chemistry tutor. The user has asked about {subjects}.
+            These facts have already been given to the user, so do not repeat them:
+            {facts}
+            Please provide information about:
+            1. The chemical name and molecular structure
+            2. Physical and chemical properties
+            3. Common uses or occurrence
+            4. Any relevant chemical concepts
+
+            Question: {query}"""
+            return self.model, prompt, f"{facts}\n\n"
+
+        elif features.formulas:
+            logger.info(f"Detected chemical formulas: {features.formulas}")
             prompt = f"""{context}You are an expert chemistry tutor. The user has asked about chemical compounds or formulas.
             Please provide information about:
             1. The chemical name and formula
@@ -63,12 +90,7 @@ class ChemistryAgent:
             
             Question: {query}"""
             
-        elif any(keyword in query_lower for keyword in [
-            'periodic table', 'element', 'atom', 'electron', 'proton', 'neutron', 
-            'orbital', 'bond', 'ionic', 'covalent', 'molecular', 'valence',
-            'ph', 'acid', 'base', 'solution', 'concentration', 'molarity',
-            'reaction', 'catalyst', 'equilibrium', 'thermodynamics'
-        ]):
+        elif features.has_chemistry_concept:
             logger.info("Detected general chemistry concepts")
             prompt = f"""{context}You are an expert chemistry tutor. Please explain the chemistry concepts in this question clearly and thoroughly.
             Include examples, relevant formulas, and step-by-step explanations where appropriate.
@@ -82,13 +104,17 @@ class ChemistryAgent:
             
             Question: {query}"""
 
-        response = call_gemini_with_retry(self.model, prompt)
-        print(f"AI called for Chemistry Query")
-        logger.info("Chemistry query processed successfully")
-        return response
+        return self.model, prompt, ""
 
     def get_element_info(self, element_symbol):
         """Get information about a specific chemical element"""
+        element = get_element(element_symbol)
+        if element is not None:
+            # Static data from the periodic table; only the descriptive part needs Gemini
+            prompt = f"""Describe the common properties and uses of {element['name']} ({element['symbol']}),
+        a {element['category']}. Be concise but informative."""
+            return f"{format_element(element)}\n\n{call_gemini_with_retry(self.model, prompt)}"
+
         prompt = f"""Provide detailed information about the chemical element with symbol '{element_symbol}':
         - Full name
         - Atomic number
@@ -99,8 +125,31 @@ class ChemistryAgent:
         
         return call_gemini_with_retry(self.model, prompt)
 
-    def balance_equation(self, equation):
-        """Help balance a chemical equation"""
+    def balance_locally(self, reaction):
+        """Balanced form of ``reaction`` from the local balancer, or None"""
+        if reaction is None:
+            return None
+        try:
+            return balance_equation(reaction)
+        except ValueError as e:
+            logger.info(f"Local balancing failed, deferring to Gemini: {str(e)}")
+            return None
+
+    def balance_equation(self, equation, explain=False):
+        """Help balance a chemical equation.
+
+        The balance itself is computed locally; Gemini is called for the
+        step-by-step narrative only when ``explain`` is set or the equation
+        cannot be balanced locally.
+        """
+        balanced = try_balance(equation)
+        if balanced is not None:
+            if not explain:
+                return str(balanced)
+            prompt = f"""Explain step by step how the chemical equation {equation} balances as {balanced}.
+        Do not change the coefficients."""
+            return f"{balanced}\n\n{call_gemini_with_retry(self.model, prompt)}"
+
         prompt = f"""Help balance this chemical equation and explain the process step by step: {equation}
         Show the balanced equation and explain the method used."""
         
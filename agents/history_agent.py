@@ -1,64 +1,23 @@
-import google.generativeai as genai
 from tools.gemini_utils import call_gemini_with_retry
-import re
+from agents.base_agent import BaseAgent
 import logging
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-class HistoryAgent:
-    def __init__(self, api_key):
+class HistoryAgent(BaseAgent):
+    def __init__(self, api_key=None, model_registry=None):
         logger.info("Initializing History Agent")
-        genai.configure(api_key=api_key)
-        self.model = genai.GenerativeModel('gemini-2.0-flash')
+        super().__init__(api_key, model_registry)
+        self.model = self.model_registry.get_model('gemini-2.0-flash')
 
-    def handle_query(self, query, history):
+    def _prepare_query(self, query, history, features):
         logger.info("Processing history query")
-        
-        # Format conversation history
-        history_text = ""
-        if history:
-            history_items = []
-            for h in history[-3:]:  # Last 3 interactions
-                if isinstance(h, dict) and 'query' in h and 'response' in h:
-                    history_items.append(f"Q: {h['query']}")
-                    history_items.append(f"A: {h['response']}")
-            history_text = "\n".join(history_items)
 
-        # Check for specific historical patterns
-        query_lower = query.lower()
-        
-        # Date patterns (years, centuries, etc.)
-        date_patterns = [
-            r"\b\d{1,4}\s*(ad|ce|bc|bce)\b",  # Years with era
-            r"\b\d{4}s?\b",  # Years like 1945, 1960s
-            r"\b\d{1,2}(st|nd|rd|th)\s*century\b",  # Centuries
-            r"\b(ancient|medieval|renaissance|modern|contemporary)\b"  # Historical periods
-        ]
-        
-        has_dates = any(re.search(pattern, query_lower) for pattern in date_patterns)
-        
-        # Historical keywords
-        historical_keywords = [
-            'war', 'battle', 'empire', 'revolution', 'civilization', 'dynasty',
-            'ancient', 'medieval', 'renaissance', 'industrial revolution',
-            'world war', 'civil war', 'independence', 'conquest', 'discovery',
-            'pharaoh', 'emperor', 'king', 'queen', 'president', 'dictator',
-            'greek', 'roman', 'egyptian', 'persian', 'ottoman', 'british',
-            'american', 'french', 'russian', 'chinese', 'japanese'
-        ]
-        
-        # Famous historical figures
-        historical_figures = [
-            'caesar', 'napoleon', 'hitler', 'stalin', 'churchill', 'roosevelt',
-            'washington', 'lincoln', 'kennedy', 'gandhi', 'mandela',
-            'cleopatra', 'alexander', 'hannibal', 'marco polo', 'columbus'
-        ]
-        
-        context = f"Previous conversation:\n{history_text}\n\n" if history_text else ""
+        context = self.format_context(history)
         
-        if has_dates:
+        if features.dates:
             logger.info("Detected historical dates/periods")
             prompt = f"""{context}You are an expert history tutor. The user has asked about a specific historical time period or date.
             Please provide detailed information including:
@@ -69,7 +28,7 @@ class HistoryAgent:
             
             Question: {query}"""
             
-        elif any(keyword in query_lower for keyword in historical_keywords):
+        elif features.has_historical_keyword:
             logger.info("Detected historical keywords")
             prompt = f"""{context}You are an expert history tutor. Please provide comprehensive information about this historical topic.
             Include:
@@ -81,7 +40,7 @@ class HistoryAgent:
             
             Question: {query}"""
             
-        elif any(figure in query_lower for figure in historical_figures):
+        elif features.figures:
             logger.info("Detected historical figure")
             prompt = f"""{context}You are an expert history tutor. The user is asking about a historical figure.
             Please provide detailed information including:
@@ -93,10 +52,7 @@ class HistoryAgent:
             
             Question: {query}"""
             
-        elif any(geo_term in query_lower for geo_term in [
-            'country', 'nation', 'territory', 'border', 'map', 'geography', 
-            'capital', 'city', 'continent', 'region'
-        ]):
+        elif features.has_geography:
             logger.info("Detected historical geography")
             prompt = f"""{context}You are an expert history tutor. The user is asking about historical geography or geopolitics.
             Please explain:
@@ -118,10 +74,7 @@ class HistoryAgent:
             
             Question: {query}"""
 
-        response = call_gemini_with_retry(self.model, prompt)
-        print(f"AI called for History Query")
-        logger.info("History query processed successfully")
-        return response
+        return self.model, prompt, ""
 
     def get_timeline(self, topic, start_year=None, end_year=None):
         """Get a timeline for a specific historical topic"""
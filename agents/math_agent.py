@@ -1,89 +1,71 @@
-import google.generativeai as genai
-from tools.calculator import calculate
+from tools.calculator import calculate, format_number, try_evaluate
 from tools.equation_solver import solve_equation
-from tools.gemini_utils import call_gemini_with_retry
-import re
+from agents.base_agent import BaseAgent
 import logging
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-class MathAgent:
-    def __init__(self, api_key):
+def evaluate_pure_arithmetic(features):
+    """Return (result, steps) if the query is pure arithmetic ("what is 2*3+1?"), otherwise None"""
+    evaluated = try_evaluate(features.bare_expression)
+    # A bare number is not a calculation
+    if evaluated is None or not evaluated[1]:
+        return None
+    return evaluated
+
+def format_local_answer(result, steps):
+    """Step-by-step working for an evaluated expression, as sent instead of a Gemini explanation"""
+    answer = format_number(result)
+    if "/" in answer:
+        answer += f" (≈ {float(result):.6g})"
+    lines = [f"Result: {answer}", "", "Step-by-step:"]
+    lines.extend(f"{i}. {step}" for i, step in enumerate(steps, 1))
+    return "\n".join(lines)
+
+class MathAgent(BaseAgent):
+    def __init__(self, api_key=None, model_registry=None, local_arithmetic=False):
         logger.info("Initializing Math Agent")
-        genai.configure(api_key=api_key)
-        self.model = genai.GenerativeModel('gemini-2.0-flash')
+        super().__init__(api_key, model_registry)
+        self.model = self.model_registry.get_model('gemini-2.0-flash')
+        # Answer pure-arithmetic queries with local step-by-step working and no Gemini call
+        self.local_arithmetic = local_arithmetic
 
-    def handle_query(self, query, history):
+    def _prepare_query(self, query, history, features):
         logger.info("Processing math query")
-        
-        # Format conversation history
-        history_text = ""
-        if history:
-            history_items = []
-            for h in history[-3:]:  # Last 3 interactions
-                if isinstance(h, dict) and 'query' in h and 'response' in h:
-                    history_items.append(f"Q: {h['query']}")
-                    history_items.append(f"A: {h['response']}")
-            history_text = "\n".join(history_items)
 
-        # Check for equation solving patterns
-        equation_patterns = [
-            r"solve.*=",  # "solve x^2 + 3x + 2 = 0"
-            r"\w+\s*[\^²³⁴⁵⁶⁷⁸⁹⁰]\s*\d*.*=",  # equations with exponents
-            r"\w+\s*\*{2}\s*\d+.*=",  # equations with ** for exponents
-            r"x\s*=|y\s*=|z\s*=",  # explicit variable assignments
-            r"\w+\s*[+\-]\s*\w+\s*=",  # linear equations
-        ]
-        
-        query_lower = query.lower()
-        has_equation = any(re.search(pattern, query_lower) for pattern in equation_patterns)
-        
-        # Check for specific equation solving requests (not general questions about how to solve)
-        specific_solve_patterns = [
-            r"solve\s+[x-z]\s*[\^²³⁴⁵⁶⁷⁸⁹⁰\*\+\-\d\s]*=",  # "solve x^2 + 3x + 2 = 0"
-            r"find\s+[x-z]\s+(?:when|if|where)",  # "find x when x^2 = 4"
-            r"[x-z]\s*[\^²³⁴⁵⁶⁷⁸⁹⁰\*\+\-\d\s]*=\s*[\d\-]",  # "x^2 + 3x = 4"
-        ]
-        
-        has_specific_equation = any(re.search(pattern, query_lower) for pattern in specific_solve_patterns)
-        
-        if has_equation or has_specific_equation:
+        if self.local_arithmetic:
+            evaluated = evaluate_pure_arithmetic(features)
+            if evaluated is not None:
+                logger.info(f"Answering arithmetic locally: {features.bare_expression}")
+                return self.model, None, format_local_answer(*evaluated)
+
+        context = self.format_context(history)
+
+        if features.has_equation:
             logger.info("Detected equation to solve")
             result = solve_equation(query)
             if not result.startswith("Error"):
-                context = f"Previous conversation:\n{history_text}\n\n" if history_text else ""
                 prompt = f"{context}Explain how to solve this equation step by step: {query}. Be clear and educational."
-                explanation = call_gemini_with_retry(self.model, prompt)
-                print(f"AI called for Equation Explanation")
-                return f"{result}\n\nStep-by-step explanation: {explanation}"
+                return self.model, prompt, f"{result}\n\nStep-by-step explanation: "
             else:
                 logger.error(f"Error solving equation: {result}")
-                return result
-        
-        # Check if the query contains a simple arithmetic expression
-        arithmetic_pattern = r"\d+\s*[\+\-\*/]\s*\d+"
-        match = re.search(arithmetic_pattern, query)
+                return self.model, None, result
         
-        if match:
-            expression = match.group(0)
+        # Check if the query contains an arithmetic expression
+        if features.arithmetic:
+            expression = features.arithmetic[0]
             logger.info(f"Found arithmetic expression: {expression}")
             result = calculate(expression)
             if isinstance(result, str) and result.startswith("Error"):
                 logger.error(f"Error calculating expression: {result}")
-                return result
+                return self.model, None, result
             # Ask Gemini for an explanation with context
-            context = f"Previous conversation:\n{history_text}\n\n" if history_text else ""
             prompt = f"{context}Explain how to solve the arithmetic expression {expression}. Be clear and educational."
-            explanation = call_gemini_with_retry(self.model, prompt)
-            print(f"AI called for Math Explanation")
-            return f"Result: {result}\nExplanation: {explanation}"
+            return self.model, prompt, f"Result: {format_number(result)}\nExplanation: "
         else:
             # No arithmetic expression or equation, use Gemini for general math query
             logger.info("Processing general math query")
-            context = f"Previous conversation:\n{history_text}\n\n" if history_text else ""
             prompt = f"{context}You are a math tutor. Please answer this math question: {query}"
-            response = call_gemini_with_retry(self.model, prompt)
-            print(f"AI called for Math General Query")
-            return response
\ No newline at end of file
+            return self.model, prompt, ""
@@ -1,73 +1,69 @@
-import google.generativeai as genai
-from tools.constants import get_constant
-from tools.physics_simulator import simulate_simple_scenario
-from tools.gemini_utils import call_gemini_with_retry
+from tools.constants import constant_reference, format_constant, get_constant
+from tools.physics_simulator import (
+    SCENARIO_MODEL_NAME, build_scenario_prompt, build_simulation_prompt, format_simulation, run_sweep,
+    simulate_scenario
+)
+from agents.base_agent import BaseAgent
 import logging
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-class PhysicsAgent:
-    def __init__(self, api_key):
+class PhysicsAgent(BaseAgent):
+    def __init__(self, api_key=None, model_registry=None):
         logger.info("Initializing Physics Agent")
-        genai.configure(api_key=api_key)
-        self.model = genai.GenerativeModel('gemini-1.5-flash')
+        super().__init__(api_key, model_registry)
+        self.model = self.model_registry.get_model('gemini-1.5-flash')
+        self.scenario_model = self.model_registry.get_model(SCENARIO_MODEL_NAME)
 
-    def handle_query(self, query, history):
+    def _prepare_query(self, query, history, features):
         logger.info("Processing physics query")
         
-        # Format conversation history
-        history_text = ""
-        if history:
-            history_items = []
-            for h in history[-3:]:  # Last 3 interactions
-                if isinstance(h, dict) and 'query' in h and 'response' in h:
-                    history_items.append(f"Q: {h['query']}")
-                    history_items.append(f"A: {h['response']}")
-            history_text = "\n".join(history_items)
+        context = self.format_context(history)
         
-        query_lower = query.lower()
-        
-        # Check if the query asks for a constant first
-        constant_keywords = ["speed of light", "gravitational constant", "planck constant"]
-        
-        for constant in constant_keywords:
-            if constant in query_lower:
-                logger.info(f"Found physics constant request for: {constant}")
-                result = get_constant(constant)
-                if isinstance(result, str) and result.startswith("Error"):
-                    logger.error(f"Error getting constant: {result}")
-                    return result
-                # Ask Gemini for an explanation with context
-                context = f"Previous conversation:\n{history_text}\n\n" if history_text else ""
-                prompt = f"{context}Explain the significance of the {constant} in physics. Be concise but informative."
-                explanation = call_gemini_with_retry(self.model, prompt)
-                print(f"AI called for Physics Constant Explanation")
-                return f"Value: {result['value']} {result['unit']}\nExplanation: {explanation}"
-        
-        # Check for scenario/simulation keywords
-        simulation_keywords = [
-            'what happens', 'simulate', 'scenario', 'if', 'when',
-            'throw', 'drop', 'fall', 'collision', 'hit', 'move',
-            'pendulum', 'spring', 'ball', 'object'
-        ]
-        
-        has_simulation = any(keyword in query_lower for keyword in simulation_keywords)
+        # Check if the query mentions a constant first
+        constant = features.constant
+        if constant is not None:
+            logger.info(f"Found physics constant in query: {constant}")
+            result = get_constant(constant)
+            if isinstance(result, dict):
+                if features.asks_constant_value:
+                    # Only a bare "What is the value of X?" is answered from the registry alone
+                    return self.model, None, format_constant(result)
+                # Otherwise Gemini answers the question itself, with the registry value as a known fact
+                context += constant_reference(result)
+            else:
+                logger.error(f"Error getting constant: {result}")
         
-        if has_simulation:
+        if features.has_simulation:
             logger.info("Detected physics scenario for simulation")
-            result = simulate_simple_scenario(query)
-            if not result.startswith("Error"):
-                return result
-            else:
-                logger.error(f"Error in simulation: {result}")
-                return result
+            simulation = simulate_scenario(query)
+            if simulation is not None:
+                # Numbers come from the local engine; Gemini only explains them
+                simulation_text = format_simulation(simulation)
+                prompt = build_simulation_prompt(query, simulation_text, bool(simulation["assumed"]))
+                return self.scenario_model, prompt, f"{simulation_text}\n\n"
+            return self.scenario_model, build_scenario_prompt(query), ""
         
-        # No constant or simulation found, use Gemini for general physics query
+        # No local answer or simulation, use Gemini for general physics query
         logger.info("Processing general physics query")
-        context = f"Previous conversation:\n{history_text}\n\n" if history_text else ""
         prompt = f"{context}You are a physics tutor. Please answer this physics question: {query}"
-        response = call_gemini_with_retry(self.model, prompt)
-        print(f"AI called for Physics General Query")
-        return response
\ No newline at end of file
+        return self.model, prompt, ""
+
+    def sweep(self, scenario, ranges, params=None, method="adaptive", quantities=None):
+        """
+        Simulate a scenario over a grid of one or two parameter ranges, locally and without Gemini.
+
+        Args:
+            scenario (str): Scenario type, e.g. "projectile"
+            ranges (dict): Swept parameter -> (start, stop, steps), e.g. {"angle": (5, 85, 81)}
+            params (dict): Fixed parameters; anything unset takes the scenario default
+            method (str): "adaptive" or "fixed" integration where no closed form applies
+            quantities (list): Quantities to return (all by default)
+
+        Returns:
+            dict: Grid shape, fixed parameters, units and one column per swept parameter and quantity
+        """
+        logger.info(f"Sweeping {scenario} over {', '.join(ranges)}")
+        return run_sweep(scenario, ranges, params, method, quantities)
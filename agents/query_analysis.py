@@ -0,0 +1,171 @@
+import re
+from dataclasses import dataclass
+from typing import Optional, Tuple
+from tools.constants import find_constant, match_constant
+from tools.equation_balancer import find_reaction
+from tools.formula_parser import is_compound_formula
+from tools.periodic_table import get_periodic_table
+
+def _any_of(patterns):
+    """One compiled alternation that matches wherever any of ``patterns`` would"""
+    return re.compile("|".join(f"(?:{pattern})" for pattern in patterns))
+
+def _any_substring(keywords):
+    # Plain substring semantics, as with ``keyword in text``
+    return re.compile("|".join(re.escape(keyword) for keyword in sorted(keywords, key=len, reverse=True)))
+
+# Math: equations to hand to the solver, and arithmetic to hand to the calculator.
+# Every equation pattern needs an "=", so queries without one skip the scan
+MATH_EQUATION_PATTERN = _any_of([
+    r"solve.*=",  # "solve x^2 + 3x + 2 = 0"
+    r"\w+\s*[\^²³⁴⁵⁶⁷⁸⁹⁰]\s*\d*.*=",  # equations with exponents
+    r"\w+\s*\*{2}\s*\d+.*=",  # equations with ** for exponents
+    r"x\s*=|y\s*=|z\s*=",  # explicit variable assignments
+    r"\w+\s*[+\-]\s*\w+\s*=",  # linear equations
+    r"solve\s+[x-z]\s*[\^²³⁴⁵⁶⁷⁸⁹⁰\*\+\-\d\s]*=",  # "solve x^2 + 3x + 2 = 0"
+    r"[x-z]\s*[\^²³⁴⁵⁶⁷⁸⁹⁰\*\+\-\d\s]*=\s*[\d\-]",  # "x^2 + 3x = 4"
+])
+FIND_VARIABLE_PATTERN = re.compile(r"find\s+[x-z]\s+(?:when|if|where)")  # "find x when x^2 = 4"
+# Lead-ins and trailing punctuation around a query that is otherwise a bare expression
+ARITHMETIC_LEAD_IN = re.compile(
+    r"^(?:(?:what\s+is|what's|whats|how\s+much\s+is|calculate|compute|evaluate|simplify|find)\s+"
+    r"(?:the\s+value\s+of\s+)?)?"
+)
+ARITHMETIC_TRAILER = re.compile(r"[\s?.!=]+$")
+ARITHMETIC_PATTERN = re.compile(r"-?\d+(?:\.\d+)?(?:\s*(?:\*\*|[\+\-\*/\^])\s*-?\d+(?:\.\d+)?)+")
+
+# Chemistry
+# Chemical formula pattern (e.g., H2O, NaCl, CH4), matched case-sensitively
+FORMULA_PATTERN = re.compile(r"\b[A-Z][a-z]?(?:\d+)?(?:[A-Z][a-z]?(?:\d+)?)*\b")
+# Chemical equation pattern (e.g., reactions with ->). Equivalent to the unanchored
+# "[A-Za-z0-9+\s]+\s*[-=]>\s*[A-Za-z0-9+\s]+" without its quadratic backtracking
+CHEMICAL_EQUATION_PATTERN = re.compile(r"[A-Za-z0-9\+\s][-=]>[A-Za-z0-9\+\s]")
+BALANCE_PATTERN = re.compile(r"\bbalanc(?:e|ed|ing)\b")
+# Formulas with one level of grouping or a hydrate, for the local formula parser
+# ("Ca(OH)2", "(NH4)2SO4", "CuSO4·5H2O")
+_FORMULA_UNIT = r"(?:[A-Z][a-z]?\d*|\((?:[A-Z][a-z]?\d*)+\)\d*)+"
+COMPOUND_PATTERN = re.compile(rf"(?<![\w(]){_FORMULA_UNIT}(?:·\d*{_FORMULA_UNIT})*(?![\w)])")
+# An element given by symbol: "atomic number of Fe"
+ELEMENT_SYMBOL_PATTERN = re.compile(r"\b(?:of|for)\s+([A-Z][a-z]?)(?![\w(])")
+# Static facts the periodic table and formula parser answer locally
+COMPOUND_FACT_PATTERN = re.compile(
+    r"\b(?:molar mass|molecular (?:mass|weight)|formula (?:mass|weight)|(?:percent(?:age)?|mass|elemental) composition|mass percent)"
+)
+ELEMENT_FACT_PATTERN = re.compile(
+    r"\b(?:atomic (?:number|mass|weight)|electron(?:ic)? configuration|(?:element|chemical) symbol|period|group)\b"
+)
+# Anything asking for more than those facts still goes to Gemini
+EXPLANATION_PATTERN = re.compile(
+    r"\b(?:why|how|explain|describe|uses?|used|properties|structure|react\w*|compare|difference|tell me)\b"
+)
+CHEMISTRY_CONCEPTS = _any_substring([
+    'periodic table', 'element', 'atom', 'electron', 'proton', 'neutron',
+    'orbital', 'bond', 'ionic', 'covalent', 'molecular', 'valence',
+    'ph', 'acid', 'base', 'solution', 'concentration', 'molarity',
+    'reaction', 'catalyst', 'equilibrium', 'thermodynamics'
+])
+
+# History
+DATE_PATTERN = _any_of([
+    r"\b\d{1,4}\s*(?:ad|ce|bc|bce)\b",  # Years with era
+    r"\b\d{4}s?\b",  # Years like 1945, 1960s
+    r"\b\d{1,2}(?:st|nd|rd|th)\s*century\b",  # Centuries
+    r"\b(?:ancient|medieval|renaissance|modern|contemporary)\b",  # Historical periods
+])
+HISTORICAL_KEYWORDS = _any_substring([
+    'war', 'battle', 'empire', 'revolution', 'civilization', 'dynasty',
+    'ancient', 'medieval', 'renaissance', 'industrial revolution',
+    'world war', 'civil war', 'independence', 'conquest', 'discovery',
+    'pharaoh', 'emperor', 'king', 'queen', 'president', 'dictator',
+    'greek', 'roman', 'egyptian', 'persian', 'ottoman', 'british',
+    'american', 'french', 'russian', 'chinese', 'japanese'
+])
+HISTORICAL_FIGURES = _any_substring([
+    'caesar', 'napoleon', 'hitler', 'stalin', 'churchill', 'roosevelt',
+    'washington', 'lincoln', 'kennedy', 'gandhi', 'mandela',
+    'cleopatra', 'alexander', 'hannibal', 'marco polo', 'columbus'
+])
+GEOGRAPHY_TERMS = _any_substring([
+    'country', 'nation', 'territory', 'border', 'map', 'geography',
+    'capital', 'city', 'continent', 'region'
+])
+
+# Constants are matched against the names and aliases in tools/constants.json. Only a
+# query that is nothing but "what is the value of <constant>?" is answered without Gemini,
+# so "the acceleration due to gravity on Mars" is not answered with Earth's value
+CONSTANT_VALUE_QUESTION = re.compile(
+    r"^\s*(?:(?:what|what's|whats)\s+(?:is|are)?\s*|(?:give|tell|show)\s+me\s+|state\s+)?"
+    r"(?:the\s+)?(?:numerical\s+|numeric\s+|exact\s+|accepted\s+|standard\s+)?(?:value|magnitude)\s+of\s+"
+    r"(?P<name>.+?)\s*[?.!]*\s*$",
+    re.IGNORECASE,
+)
+
+def _asks_constant_value(query: str, constant: Optional[str]) -> bool:
+    if constant is None:
+        return False
+    match = CONSTANT_VALUE_QUESTION.match(query)
+    return match is not None and match_constant(match.group("name")) == constant
+
+# Physics
+# Matched at the start of a word, so "if" no longer fires on "different" or "hit" on "white"
+SIMULATION_KEYWORDS = re.compile(r"\b(?:" + "|".join(re.escape(keyword) for keyword in [
+    'what happens', 'simulate', 'scenario', 'if', 'when',
+    'throw', 'threw', 'drop', 'fall', 'fell', 'collision', 'collide', 'hit', 'move',
+    'launch', 'kick', 'projectile', 'pendulum', 'spring', 'ball', 'object'
+]) + r")")
+
+@dataclass(frozen=True)
+class QueryFeatures:
+    """Everything the subject agents detect in a query, computed once by ``analyze_query``"""
+    query_lower: str
+    has_equation: bool
+    arithmetic: Tuple[str, ...]
+    bare_expression: str
+    formulas: Tuple[str, ...]
+    has_chemical_equation: bool
+    reaction: Optional[str]
+    asks_balance: bool
+    has_chemistry_concept: bool
+    compounds: Tuple[str, ...]
+    elements: Tuple[str, ...]
+    asks_chemistry_facts: bool
+    needs_explanation: bool
+    dates: Tuple[str, ...]
+    has_historical_keyword: bool
+    figures: Tuple[str, ...]
+    has_geography: bool
+    constant: Optional[str]
+    asks_constant_value: bool
+    has_simulation: bool
+
+def analyze_query(query: str) -> QueryFeatures:
+    """Run every subject detector over ``query`` once"""
+    query_lower = query.lower()
+    constant = find_constant(query)
+    has_chemical_equation = CHEMICAL_EQUATION_PATTERN.search(query) is not None
+    table = get_periodic_table()
+    symbols = tuple(symbol for symbol in ELEMENT_SYMBOL_PATTERN.findall(query) if table.is_symbol(symbol))
+    return QueryFeatures(
+        query_lower=query_lower,
+        has_equation=("=" in query_lower and MATH_EQUATION_PATTERN.search(query_lower) is not None)
+                     or FIND_VARIABLE_PATTERN.search(query_lower) is not None,
+        arithmetic=tuple(ARITHMETIC_PATTERN.findall(query)),
+        bare_expression=ARITHMETIC_TRAILER.sub("", ARITHMETIC_LEAD_IN.sub("", query_lower.strip())),
+        formulas=tuple(FORMULA_PATTERN.findall(query)),
+        has_chemical_equation=has_chemical_equation,
+        reaction=find_reaction(query) if has_chemical_equation else None,
+        asks_balance=BALANCE_PATTERN.search(query_lower) is not None,
+        has_chemistry_concept=CHEMISTRY_CONCEPTS.search(query_lower) is not None,
+        compounds=tuple(dict.fromkeys(token for token in COMPOUND_PATTERN.findall(query) if is_compound_formula(token))),
+        elements=tuple(dict.fromkeys(table.find_in_text(query) + symbols)),
+        asks_chemistry_facts=COMPOUND_FACT_PATTERN.search(query_lower) is not None
+                             or ELEMENT_FACT_PATTERN.search(query_lower) is not None,
+        needs_explanation=EXPLANATION_PATTERN.search(query_lower) is not None,
+        dates=tuple(DATE_PATTERN.findall(query_lower)),
+        has_historical_keyword=HISTORICAL_KEYWORDS.search(query_lower) is not None,
+        figures=tuple(dict.fromkeys(HISTORICAL_FIGURES.findall(query_lower))),
+        has_geography=GEOGRAPHY_TERMS.search(query_lower) is not None,
+        constant=constant,
+        asks_constant_value=_asks_constant_value(query, constant),
+        has_simulation=SIMULATION_KEYWORDS.search(query_lower) is not None,
+    )
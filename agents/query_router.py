@@ -0,0 +1,159 @@
+import re
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Keyword weights per subject. Strong, subject-specific terms weigh more than
+# generic ones so that e.g. "what force did Napoleon's army use" routes to history.
+SUBJECT_KEYWORDS = {
+    "math": {
+        "math": 3, "mathematics": 3, "algebra": 3, "arithmetic": 3, "calculus": 3,
+        "derivative": 3, "integral": 3, "geometry": 3, "trigonometry": 3,
+        "polynomial": 3, "quadratic": 3, "logarithm": 3, "matrix": 2, "matrices": 2,
+        "solve": 2, "calculate": 2, "fraction": 2, "equation": 1,
+    },
+    "physics": {
+        "physics": 3, "speed of light": 3, "relativity": 3, "projectile": 3,
+        "pendulum": 3, "torque": 3, "kinetic energy": 3, "gravitational constant": 3,
+        "planck constant": 3, "newton": 2, "gravity": 2, "velocity": 2,
+        "acceleration": 2, "momentum": 2, "quantum": 2, "friction": 2, "inertia": 2,
+        "magnetic": 2, "voltage": 2, "circuit": 2, "potential energy": 2,
+        "force": 1, "energy": 1, "wave": 1, "mass": 1,
+    },
+    "chemistry": {
+        "chemistry": 3, "periodic table": 3, "molarity": 3, "oxidation": 3,
+        "valence": 3, "covalent": 3, "ionic": 3, "stoichiometry": 3,
+        "chemical": 2, "molecule": 2, "molecular": 2, "compound": 2, "reaction": 2,
+        "ph": 2, "acid": 2, "catalyst": 2, "molar": 2, "mole": 2, "isotope": 2, "ion": 2,
+        "atom": 1, "atomic": 1, "element": 1, "bond": 1, "base": 1, "solution": 1,
+        "equilibrium": 1, "electron": 1,
+    },
+    "history": {
+        "history": 3, "historical": 3, "medieval": 3, "renaissance": 3, "napoleon": 3,
+        "caesar": 3, "dynasty": 3, "pharaoh": 3, "war": 2, "battle": 2, "empire": 2,
+        "revolution": 2, "ancient": 2, "civilization": 2, "emperor": 2, "treaty": 2,
+        "colonial": 2, "century": 1, "king": 1, "queen": 1, "president": 1, "army": 1,
+    },
+}
+
+# Non-keyword patterns, matched in the same scan as the keywords
+SUBJECT_PATTERNS = {
+    # Arithmetic such as "6 * 4" or "2^3"
+    "math_expression": ("math", 2, r"\d\s*[-+*/^]\s*\(?\s*\d"),
+    # Variables in equations such as "x = 4" or "x^2"
+    "math_variable": ("math", 2, r"\b[xyz]\s*(?:=|\^|\*\*)"),
+    # Reactions written with an arrow and a "+" on either side, such as "fe + o2 -> fe2o3" (but not
+    # "x -> 0"); outweighs the math cues of the "+" and digits
+    "chemical_equation": ("chemistry", 4, r"(?:[\w()\[\]]+\s*\+\s*)+[\w()\[\]]+\s*(?:->|=>|→|⟶)\s*\d*[a-z(\[]"
+                                          r"|[\w)\]]\s*(?:->|=>|→|⟶)\s*\d*[a-z(\[][\w()\[\]]*\s*\+"),
+    # "Balance ..." on its own only tips otherwise neutral queries ("are the forces balanced?" stays a tie)
+    "chemistry_balance": ("chemistry", 1, r"\bbalanc(?:e|ed|es|ing)\b"),
+}
+
+def normalize_query(query):
+    """Lowercase and collapse whitespace and punctuation so trivial variants share a key"""
+    return " ".join(re.sub(r"[^\w\s]", " ", query.lower()).split())
+
+class RoutingStats:
+    """Thread-safe counters for classification latency, by classification method.
+
+    Methods are "keyword", "follow_up" (reused the conversation's last agent),
+    "cache" (classification cache hit) and "llm" (Gemini fallback call).
+    """
+
+    METHODS = ("keyword", "follow_up", "cache", "llm")
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = {method: 0 for method in self.METHODS}
+        self._seconds = {method: 0.0 for method in self.METHODS}
+
+    def record(self, seconds, method):
+        with self._lock:
+            self._counts[method] += 1
+            self._seconds[method] += seconds
+
+    def get_stats(self):
+        with self._lock:
+            total = sum(self._counts.values())
+            stats = {
+                "classifications": total,
+                "llm_fallbacks": self._counts["llm"],
+                "llm_fallback_ratio": self._counts["llm"] / total if total else 0.0,
+            }
+            for method in self.METHODS:
+                count = self._counts[method]
+                stats[f"{method}_count"] = count
+                stats[f"avg_{method}_ms"] = 1000 * self._seconds[method] / count if count else 0.0
+            return stats
+
+def _trie_pattern(words):
+    """Build a regex alternation for ``words`` that branches like a prefix trie.
+
+    Python's regex engine tries alternatives one by one, so factoring out
+    shared prefixes ("acid|acceleration" -> "ac(?:celeration|id)") keeps each
+    match attempt proportional to the word length rather than the word count.
+    """
+    trie = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = {}  # end-of-word marker
+
+    def build(node):
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        if "" in node:
+            # A shorter keyword ends here, the longer continuation is optional
+            body = "(?:" + body + ")?"
+        return body
+
+    return build(trie)
+
+class KeywordRouter:
+    """Score every subject in one regex pass over the query.
+
+    All keywords are compiled into a single trie-shaped, word-boundary-aware
+    alternation (with an optional plural suffix), so the lowercased query is
+    scanned once and each hit adds its weight to its subject.
+    """
+
+    def __init__(self, subject_keywords=None, subject_patterns=None):
+        subject_keywords = subject_keywords or SUBJECT_KEYWORDS
+        subject_patterns = subject_patterns or SUBJECT_PATTERNS
+
+        self._keyword_weights = {}
+        for subject, keywords in subject_keywords.items():
+            for keyword, weight in keywords.items():
+                self._keyword_weights[keyword.lower()] = (subject, weight)
+        self._pattern_weights = {name: (subject, weight) for name, (subject, weight, _) in subject_patterns.items()}
+
+        alternatives = [r"\b(?P<keyword>" + _trie_pattern(self._keyword_weights) + r")(?:e?s)?\b"]
+        alternatives.extend(f"(?P<{name}>{pattern})" for name, (_, _, pattern) in subject_patterns.items())
+        self._regex = re.compile("|".join(alternatives))
+
+    def score(self, query):
+        """Return the weighted keyword score of each subject that was hit"""
+        scores = {}
+        for match in self._regex.finditer(query.lower()):
+            if match.lastgroup == "keyword":
+                subject, weight = self._keyword_weights[match.group("keyword")]
+            else:
+                subject, weight = self._pattern_weights[match.lastgroup]
+            scores[subject] = scores.get(subject, 0) + weight
+        return scores
+
+    def classify(self, query):
+        """Return the best-scoring subject, or None when there is no hit or a tie"""
+        scores = self.score(query)
+        if not scores:
+            return None
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)
+        if len(ranked) > 1 and ranked[0][1] == ranked[1][1]:
+            logger.info(f"Ambiguous keyword scores: {scores}")
+            return None
+        return ranked[0][0]
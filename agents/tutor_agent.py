@@ -1,86 +1,222 @@
-import google.generativeai as genai
-from agents.math_agent import MathAgent
-from agents.physics_agent import PhysicsAgent
-from agents.chemistry_agent import ChemistryAgent
-from agents.history_agent import HistoryAgent
-from tools.gemini_utils import call_gemini_with_retry
+import re
+import asyncio
+import time
+import importlib
+import threading
+from agents.query_router import KeywordRouter, RoutingStats, normalize_query
+from tools.gemini_utils import call_gemini_with_retry, call_gemini_with_retry_async, stream_gemini_with_retry_async
 from tools.conversation_manager import ConversationManager
+from tools.cache_utils import Cache
+from tools.model_registry import default_registry
+from tools.metrics import metrics
 import logging
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Sub-agent classes by agent type, imported and instantiated on first use
+AGENT_CLASSES = {
+    "math": ("agents.math_agent", "MathAgent"),
+    "physics": ("agents.physics_agent", "PhysicsAgent"),
+    "chemistry": ("agents.chemistry_agent", "ChemistryAgent"),
+    "history": ("agents.history_agent", "HistoryAgent"),
+}
+SUBJECT_AGENTS = tuple(AGENT_CLASSES)
+
+TUTOR_MODEL_NAME = 'gemini-2.0-flash'
+CATEGORY_PATTERN = re.compile(r"\b(?:math|physics|chemistry|history|unknown)\b")
+
+# Queries with at most this many words reuse the conversation's previous agent
+FOLLOW_UP_MAX_WORDS = 6
+
+CLASSIFICATION_CACHE_TTL_SECONDS = 24 * 3600
+CLASSIFICATION_CACHE_MAX_ENTRIES = 10000
+
+async def _replay(text):
+    # A cached answer streamed as a single chunk
+    yield text
+
 class TutorAgent:
-    def __init__(self, api_key):
+    def __init__(self, api_key, sticky_follow_ups=True, model_registry=None, summarize_conversations=False,
+                 semantic_cache=False, local_arithmetic=False):
         logger.info("Initializing Tutor Agent")
-        genai.configure(api_key=api_key)
-        self.model = genai.GenerativeModel('gemini-2.0-flash')
+        # One registry (and one configure call) shared with every sub-agent and tool
+        self.model_registry = model_registry or default_registry
+        self.model_registry.configure(api_key)
+        self._model = None
+
+        # Keyword router is compiled once and shared by all requests
+        self.router = KeywordRouter()
+        self.routing_stats = RoutingStats()
+
+        # Gemini classifications keyed by normalized query, independent of the answer cache
+        self.classification_cache = Cache(
+            ttl_seconds=CLASSIFICATION_CACHE_TTL_SECONDS,
+            max_entries=CLASSIFICATION_CACHE_MAX_ENTRIES
+        )
+        self.sticky_follow_ups = sticky_follow_ups
+
+        # Second-tier answer cache for near-identical standalone questions, per agent
+        self.semantic_cache = None
+        if semantic_cache:
+            from tools.semantic_cache import SemanticCache
+            self.semantic_cache = SemanticCache()
 
         # Initialize conversation manager
         self.conversation_manager = ConversationManager()
+        if summarize_conversations:
+            # Older turns are condensed off the request path into the conversation metadata
+            from tools.conversation_summarizer import ConversationSummarizer
+            self.conversation_manager.summarizer = ConversationSummarizer(
+                self.conversation_manager, model_registry=self.model_registry
+            )
+
+        # Sub-agents are created on first route to them to keep cold starts fast
+        self._agents = {}
+        self._agent_options = {"math": {"local_arithmetic": local_arithmetic}}
+        self._agents_lock = threading.Lock()
+
+    @property
+    def model(self):
+        if self._model is None:
+            self._model = self.model_registry.get_model(TUTOR_MODEL_NAME)
+        return self._model
+
+    @model.setter
+    def model(self, model):
+        self._model = model
+
+    def _load_agent(self, agent_type):
+        """Return the sub-agent for a subject, importing and creating it on first use"""
+        agent = self._agents.get(agent_type)
+        if agent is not None:
+            return agent
+        with self._agents_lock:
+            agent = self._agents.get(agent_type)
+            if agent is None:
+                module_name, class_name = AGENT_CLASSES[agent_type]
+                logger.info(f"Loading sub-agent: {class_name}")
+                agent_class = getattr(importlib.import_module(module_name), class_name)
+                agent = agent_class(model_registry=self.model_registry, **self._agent_options.get(agent_type, {}))
+                self._agents[agent_type] = agent
+            return agent
 
-        # Initialize sub-agents
-        logger.info("Initializing sub-agents")
-        self.math_agent = MathAgent(api_key)
-        self.physics_agent = PhysicsAgent(api_key)
-        self.chemistry_agent = ChemistryAgent(api_key)
-        self.history_agent = HistoryAgent(api_key)
+    @property
+    def math_agent(self):
+        return self._load_agent("math")
+
+    @property
+    def physics_agent(self):
+        return self._load_agent("physics")
+
+    @property
+    def chemistry_agent(self):
+        return self._load_agent("chemistry")
+
+    @property
+    def history_agent(self):
+        return self._load_agent("history")
+
+    def warm_up(self):
+        """Preload the Gemini client, every sub-agent, SymPy and NumPy so later requests skip the import cost"""
+        start = time.perf_counter()
+        self.model
+        for agent_type in AGENT_CLASSES:
+            self._load_agent(agent_type)
+        from tools.equation_solver import preload
+        preload()
+        from tools.physics_simulator import preload as preload_simulator
+        preload_simulator()
+        logger.info(f"Warm-up finished in {time.perf_counter() - start:.2f}s")
 
     def create_conversation(self, user_id=None):
         """Create a new conversation and return its ID"""
         return self.conversation_manager.create_conversation(user_id)
 
+    def _classify_by_keywords(self, query):
+        """Return the agent type matched by keywords, or None if nothing (or a tie) matches"""
+        classification = self.router.classify(query)
+        if classification is not None:
+            logger.info(f"Query classified as {classification} based on keywords")
+        return classification
+
+    def _classify_locally(self, query, conversation_id=None):
+        """Classify without calling Gemini; returns (classification, method) or (None, None)"""
+        classification = self._classify_by_keywords(query)
+        if classification is not None:
+            return classification, "keyword"
+
+        # Short follow-ups ("and why?", "explain again") stay with the previous agent
+        if self.sticky_follow_ups and conversation_id and len(query.split()) <= FOLLOW_UP_MAX_WORDS:
+            last = self.conversation_manager.get_conversation_history(conversation_id, limit=1)
+            if last and last[0]["agent_type"] in SUBJECT_AGENTS:
+                logger.info(f"Short follow-up, reusing previous agent: {last[0]['agent_type']}")
+                return last[0]["agent_type"], "follow_up"
+
+        classification = self.classification_cache.get(normalize_query(query))
+        if classification is not None:
+            logger.info(f"Using cached classification: {classification}")
+            return classification, "cache"
+        return None, None
+
+    def _classification_prompt(self, query):
+        # The prompt only depends on the query so its result can be cached by query
+        return f"Classify this query into one of these categories: 'math', 'physics', 'chemistry', 'history', or 'unknown'. Reply with the category only: {query}"
+
+    def _parse_classification(self, query, response):
+        """Extract the category from the Gemini reply and cache it"""
+        if response.startswith("Error"):
+            return "unknown"
+        match = CATEGORY_PATTERN.search(response.lower())
+        classification = match.group(0) if match else "unknown"
+        self.classification_cache.set(normalize_query(query), classification)
+        return classification
+
+    def _record_classification(self, seconds, method):
+        self.routing_stats.record(seconds, method)
+        metrics.observe("classify", seconds, method=method)
+
     def classify_query(self, query, conversation_id=None):
         logger.info("Classifying query type")
-        
-        # Get conversation history if conversation_id is provided
-        history_text = ""
-        if conversation_id:
-            history_text = self.conversation_manager.get_formatted_history(conversation_id, limit=3)
+        start = time.perf_counter()
+        classification, method = self._classify_locally(query, conversation_id)
+        if classification is not None:
+            self._record_classification(time.perf_counter() - start, method)
+            return classification
 
-        query_lower = query.lower()
-        
-        # Math keywords
-        math_keywords = ["solve", "calculate", "equation", "x =", "math", "algebra", "arithmetic", "+", "-", "*", "/", "derivative", "integral", "matrix", "geometry"]
-        
-        # Physics keywords
-        physics_keywords = ["newton", "force", "speed of light", "gravity", "physics", "velocity", "acceleration", "energy", "momentum", "wave", "quantum", "relativity"]
-        
-        # Chemistry keywords
-        chemistry_keywords = ["chemistry", "chemical", "molecule", "atom", "element", "compound", "reaction", "periodic table", "bond", "ph", "acid", "base", "solution", "catalyst", "equilibrium"]
-        
-        # History keywords
-        history_keywords = ["history", "historical", "war", "battle", "empire", "revolution", "ancient", "medieval", "renaissance", "century", "civilization", "king", "queen", "president", "napoleon", "caesar"]
-        
-        # Check for keyword matches
-        if any(keyword in query_lower for keyword in math_keywords):
-            logger.info("Query classified as math based on keywords")
-            return "math"
-        elif any(keyword in query_lower for keyword in physics_keywords):
-            logger.info("Query classified as physics based on keywords")
-            return "physics"
-        elif any(keyword in query_lower for keyword in chemistry_keywords):
-            logger.info("Query classified as chemistry based on keywords")
-            return "chemistry"
-        elif any(keyword in query_lower for keyword in history_keywords):
-            logger.info("Query classified as history based on keywords")
-            return "history"
-        else:
-            # Fallback: Use Gemini API for intent recognition
-            logger.info("Using AI to classify query")
-            context = f"Previous conversation:\n{history_text}\n\n" if history_text else ""
-            prompt = f"{context}Classify this query into one of these categories: 'math', 'physics', 'chemistry', 'history', or 'unknown': {query}"
-
-            response = call_gemini_with_retry(self.model, prompt)
-            classification = response.strip().lower()
-            print(f"AI called for Sub-Agent Selection")
-            logger.info(f"AI classified query as: {classification}")
+        # Fallback: Use Gemini API for intent recognition
+        logger.info("Using AI to classify query")
+        response = call_gemini_with_retry(self.model, self._classification_prompt(query))
+        classification = self._parse_classification(query, response)
+        self._record_classification(time.perf_counter() - start, "llm")
+        logger.info(f"AI classified query as: {classification}")
+        return classification
+
+    async def classify_query_async(self, query, conversation_id=None):
+        logger.info("Classifying query type")
+        start = time.perf_counter()
+        # The follow-up check reads the conversation store, which may block on a database lock
+        classification, method = await asyncio.to_thread(self._classify_locally, query, conversation_id)
+        if classification is not None:
+            self._record_classification(time.perf_counter() - start, method)
             return classification
 
-    def handle_query(self, query, conversation_id=None, preferred_agent=None):
-        """Handle a query with optional conversation context and preferred agent"""
-        
+        logger.info("Using AI to classify query")
+        response = await call_gemini_with_retry_async(self.model, self._classification_prompt(query))
+        classification = self._parse_classification(query, response)
+        self._record_classification(time.perf_counter() - start, "llm")
+        logger.info(f"AI classified query as: {classification}")
+        return classification
+
+    def get_routing_stats(self):
+        """Get classification counts, LLM fallback ratio, latency and classification cache stats"""
+        stats = self.routing_stats.get_stats()
+        stats["classification_cache"] = self.classification_cache.get_stats()
+        return stats
+
+    def _start_query(self, conversation_id):
+        """Create or validate the conversation for a query; returns None if it does not exist"""
         # If no conversation_id provided, create a new conversation
         if conversation_id is None:
             conversation_id = self.create_conversation()
@@ -89,6 +225,35 @@ class TutorAgent:
         # Validate conversation exists
         if not self.conversation_manager.conversation_exists(conversation_id):
             logger.error(f"Conversation {conversation_id} not found")
+            return None
+        return conversation_id
+
+    def _get_agent(self, agent_type):
+        """Return the sub-agent for an agent type, or None for the general fallback"""
+        if agent_type in AGENT_CLASSES:
+            logger.info(f"Routing query to {agent_type.capitalize()} Agent")
+            return self._load_agent(agent_type)
+        logger.warning("Could not classify query, providing general response")
+        return None
+
+    def _general_prompt(self, query, context):
+        return f"{context}You are a helpful tutor. Please answer this question or reply with a general response based on the previous conversation: {query}"
+
+    def _cached_answer(self, agent_type, query, context):
+        """Answer to a near-identical question from the semantic cache; only for questions without context"""
+        if self.semantic_cache is None or context:
+            return None
+        return self.semantic_cache.get(agent_type, query)
+
+    def _remember_answer(self, agent_type, query, context, response):
+        if self.semantic_cache is None or context or "Error:" in response:
+            return
+        self.semantic_cache.set(agent_type, query, response)
+
+    def handle_query(self, query, conversation_id=None, preferred_agent=None):
+        """Handle a query with optional conversation context and preferred agent"""
+        conversation_id = self._start_query(conversation_id)
+        if conversation_id is None:
             return "Error: Invalid conversation ID", None, None
         
         # Determine agent type - use preferred if specified, otherwise classify
@@ -98,34 +263,187 @@ class TutorAgent:
         else:
             agent_type = self.classify_query(query, conversation_id)
         
-        # Get conversation history for the specific conversation
-        conversation_history = self.conversation_manager.get_conversation_history(conversation_id, limit=5)
+        # Pre-rendered context window of the conversation, shared by every agent
+        context = self.conversation_manager.get_context(conversation_id)
         
-        if agent_type == "math":
-            logger.info("Routing query to Math Agent")
-            response = self.math_agent.handle_query(query, conversation_history)
-        elif agent_type == "physics":
-            logger.info("Routing query to Physics Agent")
-            response = self.physics_agent.handle_query(query, conversation_history)
-        elif agent_type == "chemistry":
-            logger.info("Routing query to Chemistry Agent")
-            response = self.chemistry_agent.handle_query(query, conversation_history)
-        elif agent_type == "history":
-            logger.info("Routing query to History Agent")
-            response = self.history_agent.handle_query(query, conversation_history)
-        else:
-            logger.warning("Could not classify query, providing general response")
-            history_text = self.conversation_manager.get_formatted_history(conversation_id, limit=3)
-            context = f"Previous conversation:\n{history_text}\n\n" if history_text else ""
-            prompt = f"{context}You are a helpful tutor. Please answer this question or reply with a general response based on the previous conversation: {query}"
-            response = call_gemini_with_retry(self.model, prompt)
+        agent = self._get_agent(agent_type)
+        if agent is None:
             agent_type = "general"
+        response = self._cached_answer(agent_type, query, context)
+        if response is None:
+            if agent is not None:
+                response = agent.handle_query(query, context)
+            else:
+                response = call_gemini_with_retry(self.model, self._general_prompt(query, context))
+            self._remember_answer(agent_type, query, context, response)
 
         # Add the interaction to conversation history
         self.conversation_manager.add_interaction(conversation_id, query, response, agent_type)
         
         return response, conversation_id, agent_type
 
+    async def handle_query_async(self, query, conversation_id=None, preferred_agent=None):
+        """Async variant of handle_query; Gemini calls and conversation store access do not block the event loop"""
+        conversation_id = await asyncio.to_thread(self._start_query, conversation_id)
+        if conversation_id is None:
+            return "Error: Invalid conversation ID", None, None
+        
+        if preferred_agent and preferred_agent != 'auto':
+            agent_type = preferred_agent
+            logger.info(f"Using preferred agent: {agent_type}")
+        else:
+            agent_type = await self.classify_query_async(query, conversation_id)
+        
+        context = await asyncio.to_thread(self.conversation_manager.get_context, conversation_id)
+        
+        agent = self._get_agent(agent_type)
+        if agent is None:
+            agent_type = "general"
+        response = self._cached_answer(agent_type, query, context)
+        if response is None:
+            if agent is not None:
+                response = await agent.handle_query_async(query, context)
+            else:
+                response = await call_gemini_with_retry_async(self.model, self._general_prompt(query, context))
+            self._remember_answer(agent_type, query, context, response)
+
+        await asyncio.to_thread(self.conversation_manager.add_interaction, conversation_id, query, response, agent_type)
+        
+        return response, conversation_id, agent_type
+
+    async def start_stream_async(self, query, conversation_id=None, preferred_agent=None):
+        """Route a query and return (conversation_id, agent_type, chunks) for streaming.
+
+        ``chunks`` is an async generator of response text; once it is exhausted
+        the full response is stored in the conversation history.
+        """
+        conversation_id = await asyncio.to_thread(self._start_query, conversation_id)
+        if conversation_id is None:
+            raise ValueError("Invalid conversation ID")
+
+        if preferred_agent and preferred_agent != 'auto':
+            agent_type = preferred_agent
+            logger.info(f"Using preferred agent: {agent_type}")
+        else:
+            agent_type = await self.classify_query_async(query, conversation_id)
+
+        context = await asyncio.to_thread(self.conversation_manager.get_context, conversation_id)
+
+        agent = self._get_agent(agent_type)
+        if agent is None:
+            agent_type = "general"
+        cached = self._cached_answer(agent_type, query, context)
+        if cached is not None:
+            source = _replay(cached)
+        elif agent is not None:
+            source = agent.stream_query_async(query, context)
+        else:
+            source = stream_gemini_with_retry_async(self.model, self._general_prompt(query, context))
+
+        async def chunks():
+            parts = []
+            async for chunk in source:
+                parts.append(chunk)
+                yield chunk
+            response = "".join(parts)
+            if cached is None:
+                self._remember_answer(agent_type, query, context, response)
+            await asyncio.to_thread(self.conversation_manager.add_interaction, conversation_id, query, response, agent_type)
+
+        return conversation_id, agent_type, chunks()
+
+    async def handle_batch_async(self, queries, conversation_id=None, preferred_agent=None,
+                                 shared_conversation=True, max_concurrency=8):
+        """Answer a list of queries concurrently and return results in input order.
+
+        With ``shared_conversation`` every query sees the same context snapshot
+        and the interactions are appended in input order once all answers are
+        ready; otherwise each query gets a new conversation of its own. Duplicate
+        questions cost one Gemini call through the shared cache and in-flight
+        call coalescing. Each result is a dict with ``error`` set if that item
+        failed.
+        """
+        if shared_conversation:
+            conversation_id = await asyncio.to_thread(self._start_query, conversation_id)
+            if conversation_id is None:
+                raise ValueError("Invalid conversation ID")
+            conversation_ids = [conversation_id] * len(queries)
+            context = await asyncio.to_thread(self.conversation_manager.get_context, conversation_id)
+        else:
+            conversation_ids = await asyncio.to_thread(lambda: [self.create_conversation() for _ in queries])
+            context = ""
+
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def classify(i):
+            if preferred_agent and preferred_agent != 'auto':
+                return preferred_agent
+            async with semaphore:
+                return await self.classify_query_async(queries[i], conversation_ids[i])
+
+        async def answer(i, agent_type):
+            async with semaphore:
+                agent = self._get_agent(agent_type)
+                if agent is None:
+                    agent_type = "general"
+                response = self._cached_answer(agent_type, queries[i], context)
+                if response is None:
+                    if agent is not None:
+                        response = await agent.handle_query_async(queries[i], context)
+                    else:
+                        response = await call_gemini_with_retry_async(
+                            self.model, self._general_prompt(queries[i], context)
+                        )
+                    self._remember_answer(agent_type, queries[i], context, response)
+                return response, agent_type
+
+        results = [
+            {"index": i, "query": query, "conversation_id": conversation_ids[i],
+             "response": None, "agent_used": None, "error": None}
+            for i, query in enumerate(queries)
+        ]
+
+        agent_types = await asyncio.gather(*[classify(i) for i in range(len(queries))], return_exceptions=True)
+
+        # Group by agent so each sub-agent's calls are dispatched together
+        groups = {}
+        for i, agent_type in enumerate(agent_types):
+            if isinstance(agent_type, Exception):
+                results[i]["error"] = f"Failed to classify query: {str(agent_type)}"
+            else:
+                groups.setdefault(agent_type, []).append(i)
+        group_sizes = {agent_type: len(indices) for agent_type, indices in groups.items()}
+        logger.info(f"Batch of {len(queries)} queries grouped by agent: {group_sizes}")
+
+        order = [i for indices in groups.values() for i in indices]
+        outcomes = await asyncio.gather(*[answer(i, agent_types[i]) for i in order], return_exceptions=True)
+
+        for i, outcome in zip(order, outcomes):
+            if isinstance(outcome, Exception):
+                results[i]["error"] = f"Failed to process query: {str(outcome)}"
+            else:
+                results[i]["response"], results[i]["agent_used"] = outcome
+
+        def record():
+            for result in results:
+                if result["error"] is None:
+                    self.conversation_manager.add_interaction(
+                        result["conversation_id"], result["query"], result["response"], result["agent_used"]
+                    )
+
+        # One thread hop for all writes keeps them in input order
+        await asyncio.to_thread(record)
+        return results
+
+    def get_semantic_cache_stats(self):
+        """Semantic cache size, hit rates and hit similarity, or None when it is off"""
+        return self.semantic_cache.get_stats() if self.semantic_cache is not None else None
+
+    def get_summary_stats(self):
+        """Background summarizer queue and outcome counters, or None when summaries are off"""
+        summarizer = self.conversation_manager.summarizer
+        return summarizer.get_stats() if summarizer is not None else None
+
     def get_conversation_history(self, conversation_id, limit=None):
         """Get the history for a specific conversation"""
         return self.conversation_manager.get_conversation_history(conversation_id, limit)
@@ -134,6 +452,10 @@ class TutorAgent:
         """List all conversations"""
         return self.conversation_manager.list_conversations(user_id)
 
+    def list_conversations_page(self, user_id=None, limit=None, cursor=None):
+        """List one page of conversations and the cursor for the next page"""
+        return self.conversation_manager.list_conversations_page(user_id, limit, cursor)
+
     def delete_conversation(self, conversation_id):
         """Delete a specific conversation"""
         return self.conversation_manager.delete_conversation(conversation_id)
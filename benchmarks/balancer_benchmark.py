@@ -0,0 +1,87 @@
+"""Benchmark: local chemical equation balancing over a corpus of reactions.
+
+Balances every reaction in ``benchmarks/reactions.txt`` (one unbalanced
+reaction per line, ``#`` comments) with ``tools.equation_balancer``, checks that
+each result conserves every element with coprime positive coefficients, and
+reports the per-reaction time uncached and from the balancer's LRU cache.
+With ``--sympy`` the same nullspaces are also computed with SymPy's
+``Matrix.nullspace`` for comparison.
+
+Usage: python benchmarks/balancer_benchmark.py [--repeat 20] [--sympy]
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+from math import gcd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from tools.equation_balancer import _balance, balance_equation, parse_reaction
+from tools.formula_parser import parse_formula
+
+CORPUS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "reactions.txt")
+
+def load_corpus(path=CORPUS_PATH):
+    with open(path, "r", encoding="utf-8") as file:
+        return [line.strip() for line in file if line.strip() and not line.startswith("#")]
+
+def check(balanced):
+    """True when every element is conserved and the coefficients are positive and coprime"""
+    totals = {}
+    split = len(balanced.reactants)
+    for i, (n, species) in enumerate(zip(balanced.coefficients, balanced.reactants + balanced.products)):
+        for element, count in parse_formula(species).items():
+            totals[element] = totals.get(element, 0) + (n * count if i < split else -n * count)
+    return (all(value == 0 for value in totals.values()) and min(balanced.coefficients) > 0
+            and gcd(*balanced.coefficients) == 1)
+
+def sympy_nullspace(reaction):
+    import sympy
+    reactants, products = parse_reaction(reaction)
+    counts = [parse_formula(species) for species in reactants + products]
+    elements = list(dict.fromkeys(element for count in counts for element in count))
+    matrix = sympy.Matrix([[count.get(element, 0) * (1 if j < len(reactants) else -1) for j, count in enumerate(counts)]
+                           for element in elements])
+    return matrix.nullspace()
+
+def time_per_reaction(fn, corpus, repeat):
+    """Median microseconds per reaction over ``repeat`` passes"""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for reaction in corpus:
+            fn(reaction)
+        samples.append((time.perf_counter() - start) / len(corpus))
+    return 1e6 * statistics.median(samples)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=20, help="passes over the corpus")
+    parser.add_argument("--sympy", action="store_true", help="also time SymPy's Matrix.nullspace")
+    args = parser.parse_args()
+
+    corpus = load_corpus()
+    failures = []
+    for reaction in corpus:
+        try:
+            if not check(_balance(reaction)):
+                failures.append((reaction, "not balanced"))
+        except ValueError as e:
+            failures.append((reaction, str(e)))
+
+    print(f"Equation balancer benchmark ({len(corpus)} reactions, {args.repeat} passes)")
+    print(f"  balanced and verified: {len(corpus) - len(failures)}/{len(corpus)}")
+    for reaction, reason in failures:
+        print(f"    FAILED {reaction}: {reason}")
+    print(f"  uncached:  {time_per_reaction(_balance, corpus, args.repeat):10.2f} us/reaction")
+    print(f"  cached:    {time_per_reaction(balance_equation, corpus, args.repeat):10.2f} us/reaction")
+    if args.sympy:
+        sympy_nullspace(corpus[0])  # keep the import out of the timing
+        print(f"  sympy:     {time_per_reaction(sympy_nullspace, corpus, max(1, args.repeat // 10)):10.2f} us/reaction")
+    return 1 if failures else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
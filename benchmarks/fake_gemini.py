@@ -0,0 +1,88 @@
+"""Offline stand-in for google.generativeai.GenerativeModel used by the benchmarks."""
+import asyncio
+import math
+import random
+import time
+import zlib
+
+class FakeResponse:
+    def __init__(self, text):
+        self.text = text
+
+class FakeStream:
+    def __init__(self, text, chunk_delay):
+        self._words = text.split(" ")
+        self._chunk_delay = chunk_delay
+
+    async def __aiter__(self):
+        for i, word in enumerate(self._words):
+            if self._chunk_delay:
+                await asyncio.sleep(self._chunk_delay)
+            yield FakeResponse(word if i == 0 else f" {word}")
+
+LATENCY_DISTRIBUTIONS = ("fixed", "uniform", "lognormal")
+
+class FakeGenerativeModel:
+    """Answers every prompt after a simulated latency, failing at ``error_rate``.
+
+    ``latency`` is the median delay in seconds. With the "uniform"
+    distribution ``jitter`` is the half-width of the spread around it; with
+    "lognormal" it is the sigma of the underlying normal, which gives the long
+    right tail real API latencies have. Answers are ``answer_words`` words long
+    and deterministic per prompt, so the response cache behaves as it would
+    with the real model.
+    """
+
+    def __init__(self, model_name="gemini-2.0-flash", latency=0.0, jitter=0.0, error_rate=0.0,
+                 answer_words=50, distribution="uniform", seed=None):
+        if distribution not in LATENCY_DISTRIBUTIONS:
+            raise ValueError(f"Unknown latency distribution: {distribution}")
+        self.model_name = model_name
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.answer_words = answer_words
+        self.distribution = distribution
+        self.calls = 0
+        self._random = random.Random(seed)
+
+    def _delay(self):
+        if self.distribution == "fixed" or self.latency <= 0:
+            return self.latency
+        if self.distribution == "lognormal":
+            return self.latency * math.exp(self._random.gauss(0.0, self.jitter))
+        return max(0.0, self.latency + self._random.uniform(-self.jitter, self.jitter))
+
+    def _answer(self, prompt):
+        self.calls += 1
+        if self._random.random() < self.error_rate:
+            raise RuntimeError("Simulated Gemini error")
+        if prompt.startswith("Classify"):
+            return "unknown"
+        seed = zlib.crc32(prompt.encode()) % 1000
+        words = ["word%d" % (seed + i) for i in range(self.answer_words)]
+        return " ".join(words)
+
+    def generate_content(self, prompt, stream=False):
+        time.sleep(self._delay())
+        return FakeResponse(self._answer(prompt))
+
+    async def generate_content_async(self, prompt, stream=False):
+        await asyncio.sleep(self._delay())
+        text = self._answer(prompt)
+        if stream:
+            return FakeStream(text, chunk_delay=self.latency / 20)
+        return FakeResponse(text)
+
+MODEL_NAMES = ("gemini-2.0-flash", "gemini-1.5-flash")
+
+def install_fake_models(registry=None, **kwargs):
+    """Register a FakeGenerativeModel for every model name the app uses; returns them by name"""
+    if registry is None:
+        from tools.model_registry import default_registry
+        registry = default_registry
+    models = {}
+    for model_name in MODEL_NAMES:
+        models[model_name] = FakeGenerativeModel(model_name, **kwargs)
+        registry.set_model(model_name, models[model_name])
+    return models
@@ -0,0 +1,210 @@
+"""Offline load test: drive main.app through ASGI against a fake Gemini backend.
+
+For each scenario and concurrency level it reports throughput, p50/p95/p99
+latency, error count, Gemini response cache hit ratio, the number of calls
+that reached the fake model and resident memory growth.
+
+Scenarios:
+  keyword_math        unique arithmetic questions routed by keywords
+  llm_general         unique questions that need the Gemini classification fallback
+  long_conversation   a few conversations that accumulate many turns
+  bursty_duplicates   bursts of identical questions sent at the same moment
+  paraphrases         recurring textbook questions asked with different wording
+                      (use --semantic-cache to measure the near-duplicate cache)
+
+Usage: python benchmarks/load_test.py [--scenarios all] [--concurrency 1,8,32] [--requests 200]
+                                      [--latency 0.2] [--jitter 0.3] [--distribution lognormal]
+                                      [--error-rate 0.0] [--semantic-cache] [--json]
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+os.chdir(ROOT)
+os.environ.setdefault("CONVERSATION_STORE", "memory")
+os.environ.setdefault("GEMINI_API_KEY", "benchmark")
+os.environ["WARM_UP_ON_STARTUP"] = "false"
+
+from asgi_client import asgi_request
+from fake_gemini import LATENCY_DISTRIBUTIONS, install_fake_models
+
+def rss_bytes():
+    """Current resident set size (Linux), falling back to the peak RSS elsewhere"""
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+# Each scenario returns a list of bursts of (query, conversation_key) pairs.
+# Requests that share a conversation_key share one conversation. A burst is
+# released at once (bounded by the concurrency level) and the next burst starts
+# when it has completed.
+
+def scenario_keyword_math(count):
+    return [[(f"What is {i} * {i + 7}?", None) for i in range(count)]]
+
+def scenario_llm_general(count):
+    return [[(f"Tell me something interesting about topic number {i}", None) for i in range(count)]]
+
+def scenario_long_conversation(count, conversations=4):
+    return [[(f"Can you explain step {i} of the algebra proof in more detail?", i % conversations)
+             for i in range(count)]]
+
+def scenario_bursty_duplicates(count, burst_size=30):
+    bursts = []
+    for burst in range(max(1, count // burst_size)):
+        query = f"Explain the physics of wave interference, example {burst}"
+        bursts.append([(query, None)] * burst_size)
+    return bursts
+
+PARAPHRASES = [
+    ("What is Newton's second law?", "what's newtons 2nd law", "Explain Newton's second law"),
+    ("What is photosynthesis?", "Can you explain photosynthesis please", "what is photosynthesis"),
+    ("What are the causes of the French Revolution?", "what were the causes of the french revolution",
+     "Tell me the causes of the French revolution"),
+    ("What is a covalent bond?", "what's a covalent bond?", "Explain covalent bonds"),
+    ("What is the Pythagorean theorem?", "explain the pythagorean theorem", "what is pythagorean theorem"),
+]
+
+def scenario_paraphrases(count):
+    return [[(PARAPHRASES[i % len(PARAPHRASES)][(i // len(PARAPHRASES)) % 3], None) for i in range(count)]]
+
+SCENARIOS = {
+    "keyword_math": scenario_keyword_math,
+    "llm_general": scenario_llm_general,
+    "long_conversation": scenario_long_conversation,
+    "bursty_duplicates": scenario_bursty_duplicates,
+    "paraphrases": scenario_paraphrases,
+}
+
+async def run_scenario(app, name, concurrency, request_count, models):
+    from tools.gemini_utils import clear_gemini_cache, get_cache_stats
+
+    clear_gemini_cache()
+    main_module = sys.modules["main"]
+    main_module.tutor_agent.classification_cache.clear()
+    if main_module.tutor_agent.semantic_cache is not None:
+        main_module.tutor_agent.semantic_cache.clear()
+    cache_before = get_cache_stats()
+    calls_before = sum(model.calls for model in models.values())
+    rss_before = rss_bytes()
+
+    bursts = SCENARIOS[name](request_count)
+    conversation_ids = {}
+    for burst in bursts:
+        for _, key in burst:
+            if key is not None and key not in conversation_ids:
+                status, body = await asgi_request(app, "POST", "/conversations", {"user_id": "load_test"})
+                conversation_ids[key] = json.loads(body)["conversation_id"]
+
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+    errors = 0
+
+    async def send(query, key):
+        nonlocal errors
+        payload = {"query": query}
+        if key is not None:
+            payload["conversation_id"] = conversation_ids[key]
+        async with semaphore:
+            start = time.perf_counter()
+            status, body = await asgi_request(app, "POST", "/ask", payload)
+            latencies.append(time.perf_counter() - start)
+        if status != 200 or json.loads(body)["response"].startswith("Error"):
+            errors += 1
+
+    start = time.perf_counter()
+    for burst in bursts:
+        await asyncio.gather(*[send(query, key) for query, key in burst])
+    elapsed = time.perf_counter() - start
+
+    cache_after = get_cache_stats()
+    hits = cache_after["hits"] - cache_before["hits"]
+    misses = cache_after["misses"] - cache_before["misses"]
+    latencies.sort()
+    return {
+        "scenario": name,
+        "concurrency": concurrency,
+        "requests": len(latencies),
+        "errors": errors,
+        "throughput_rps": len(latencies) / elapsed if elapsed else 0.0,
+        "p50_ms": 1000 * percentile(latencies, 0.50),
+        "p95_ms": 1000 * percentile(latencies, 0.95),
+        "p99_ms": 1000 * percentile(latencies, 0.99),
+        "cache_hit_ratio": hits / (hits + misses) if hits + misses else 0.0,
+        "model_calls": sum(model.calls for model in models.values()) - calls_before,
+        "rss_growth_mb": (rss_bytes() - rss_before) / (1024 * 1024),
+    }
+
+def print_table(results):
+    header = (f"{'scenario':<18} {'conc':>5} {'reqs':>5} {'err':>4} {'rps':>8} {'p50 ms':>8} "
+              f"{'p95 ms':>8} {'p99 ms':>8} {'hit %':>6} {'calls':>6} {'rss MB':>7}")
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        print(f"{r['scenario']:<18} {r['concurrency']:>5} {r['requests']:>5} {r['errors']:>4} "
+              f"{r['throughput_rps']:>8.1f} {r['p50_ms']:>8.1f} {r['p95_ms']:>8.1f} {r['p99_ms']:>8.1f} "
+              f"{100 * r['cache_hit_ratio']:>6.1f} {r['model_calls']:>6} {r['rss_growth_mb']:>7.1f}")
+
+async def run(args):
+    import main
+    from tools import gemini_utils
+
+    gemini_utils.RETRY_DELAY_SECONDS = args.retry_delay
+    models = install_fake_models(
+        latency=args.latency, jitter=args.jitter, distribution=args.distribution,
+        error_rate=args.error_rate, seed=args.seed
+    )
+    # Reset the tutor's own model so it also picks up the fake from the registry
+    main.tutor_agent.model = None
+    if args.semantic_cache and main.tutor_agent.semantic_cache is None:
+        from tools.semantic_cache import SemanticCache
+        main.tutor_agent.semantic_cache = SemanticCache()
+
+    scenarios = list(SCENARIOS) if args.scenarios == "all" else args.scenarios.split(",")
+    results = []
+    for name in scenarios:
+        for concurrency in args.concurrency:
+            results.append(await run_scenario(main.app, name, concurrency, args.requests, models))
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scenarios", default="all", help="comma separated: " + ",".join(SCENARIOS))
+    parser.add_argument("--concurrency", default="1,8,32",
+                        type=lambda v: [int(c) for c in v.split(",")])
+    parser.add_argument("--requests", type=int, default=200, help="requests per scenario and concurrency level")
+    parser.add_argument("--latency", type=float, default=0.2, help="median fake Gemini latency in seconds")
+    parser.add_argument("--jitter", type=float, default=0.3, help="uniform half-width or lognormal sigma")
+    parser.add_argument("--distribution", default="lognormal", choices=LATENCY_DISTRIBUTIONS)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--retry-delay", type=float, default=0.0, help="override the delay between Gemini retries")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--semantic-cache", action="store_true", help="enable the near-duplicate answer cache")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+    results = asyncio.run(run(args))
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print_table(results)
+
+if __name__ == "__main__":
+    main()
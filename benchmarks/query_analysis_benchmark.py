@@ -0,0 +1,125 @@
+"""Micro-benchmark: per-query cost of the shared pattern analysis.
+
+Compares ``agents.query_analysis.analyze_query`` (every detector compiled once,
+one call per query) against the per-request detection the subject agents used
+to run, where pattern and keyword lists were rebuilt and scanned with string
+patterns in each ``_prepare_query`` (and the math patterns were checked in two
+overlapping sets). The legacy version below runs all four agents' detectors so
+both sides produce the same information.
+
+Usage: python benchmarks/query_analysis_benchmark.py [--repeat 2000]
+"""
+import argparse
+import os
+import re
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from agents.query_analysis import analyze_query
+
+QUERIES = [
+    "What is 6 * 4?",
+    "Solve x^2 + 3x + 2 = 0",
+    "Explain how to balance H2 + O2 -> H2O",
+    "What are the properties of NaCl?",
+    "What caused World War I in 1914?",
+    "Tell me about Napoleon's campaigns in the 19th century",
+    "What happens if I drop a ball from 10 meters?",
+    "What is the speed of light?",
+    "How did the borders of the Roman Empire change over time?",
+    "Can you explain what a covalent bond is in simple terms for a high school student?",
+]
+
+def legacy_analyze(query):
+    """The detection previously repeated inside each agent's _prepare_query"""
+    query_lower = query.lower()
+    # MathAgent
+    equation_patterns = [
+        r"solve.*=", r"\w+\s*[\^²³⁴⁵⁶⁷⁸⁹⁰]\s*\d*.*=", r"\w+\s*\*{2}\s*\d+.*=",
+        r"x\s*=|y\s*=|z\s*=", r"\w+\s*[+\-]\s*\w+\s*=",
+    ]
+    has_equation = any(re.search(pattern, query_lower) for pattern in equation_patterns)
+    specific_solve_patterns = [
+        r"solve\s+[x-z]\s*[\^²³⁴⁵⁶⁷⁸⁹⁰\*\+\-\d\s]*=", r"find\s+[x-z]\s+(?:when|if|where)",
+        r"[x-z]\s*[\^²³⁴⁵⁶⁷⁸⁹⁰\*\+\-\d\s]*=\s*[\d\-]",
+    ]
+    has_equation = has_equation or any(re.search(pattern, query_lower) for pattern in specific_solve_patterns)
+    arithmetic = re.search(r"-?\d+(?:\.\d+)?(?:\s*(?:\*\*|[\+\-\*/\^])\s*-?\d+(?:\.\d+)?)+", query)
+    # ChemistryAgent
+    formulas = re.findall(r"\b[A-Z][a-z]?(?:\d+)?(?:[A-Z][a-z]?(?:\d+)?)*\b", query)
+    has_chemical_equation = re.search(r"[A-Za-z0-9\+\s]+\s*[-=]>\s*[A-Za-z0-9\+\s]+", query)
+    has_concept = any(keyword in query_lower for keyword in [
+        'periodic table', 'element', 'atom', 'electron', 'proton', 'neutron',
+        'orbital', 'bond', 'ionic', 'covalent', 'molecular', 'valence',
+        'ph', 'acid', 'base', 'solution', 'concentration', 'molarity',
+        'reaction', 'catalyst', 'equilibrium', 'thermodynamics'
+    ])
+    # HistoryAgent
+    date_patterns = [
+        r"\b\d{1,4}\s*(ad|ce|bc|bce)\b", r"\b\d{4}s?\b", r"\b\d{1,2}(st|nd|rd|th)\s*century\b",
+        r"\b(ancient|medieval|renaissance|modern|contemporary)\b",
+    ]
+    has_dates = any(re.search(pattern, query_lower) for pattern in date_patterns)
+    historical_keywords = [
+        'war', 'battle', 'empire', 'revolution', 'civilization', 'dynasty',
+        'ancient', 'medieval', 'renaissance', 'industrial revolution',
+        'world war', 'civil war', 'independence', 'conquest', 'discovery',
+        'pharaoh', 'emperor', 'king', 'queen', 'president', 'dictator',
+        'greek', 'roman', 'egyptian', 'persian', 'ottoman', 'british',
+        'american', 'french', 'russian', 'chinese', 'japanese'
+    ]
+    historical_figures = [
+        'caesar', 'napoleon', 'hitler', 'stalin', 'churchill', 'roosevelt',
+        'washington', 'lincoln', 'kennedy', 'gandhi', 'mandela',
+        'cleopatra', 'alexander', 'hannibal', 'marco polo', 'columbus'
+    ]
+    has_keyword = any(keyword in query_lower for keyword in historical_keywords)
+    has_figure = any(figure in query_lower for figure in historical_figures)
+    has_geography = any(term in query_lower for term in [
+        'country', 'nation', 'territory', 'border', 'map', 'geography',
+        'capital', 'city', 'continent', 'region'
+    ])
+    # PhysicsAgent
+    constant = next((c for c in ["speed of light", "gravitational constant", "planck constant"] if c in query_lower), None)
+    has_simulation = any(keyword in query_lower for keyword in [
+        'what happens', 'simulate', 'scenario', 'if', 'when',
+        'throw', 'drop', 'fall', 'collision', 'hit', 'move',
+        'pendulum', 'spring', 'ball', 'object'
+    ])
+    return (has_equation, arithmetic, formulas, has_chemical_equation, has_concept, has_dates,
+            has_keyword, has_figure, has_geography, constant, has_simulation)
+
+def time_per_query(fn, repeat):
+    """Median microseconds per call for each query"""
+    results = []
+    for query in QUERIES:
+        samples = []
+        for _ in range(5):
+            start = time.perf_counter()
+            for _ in range(repeat):
+                fn(query)
+            samples.append((time.perf_counter() - start) / repeat)
+        results.append(1e6 * statistics.median(samples))
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=2000, help="calls per query and sample")
+    args = parser.parse_args()
+
+    legacy = time_per_query(legacy_analyze, args.repeat)
+    shared = time_per_query(analyze_query, args.repeat)
+
+    print(f"Query analysis benchmark ({len(QUERIES)} queries, {args.repeat} calls x 5 samples each)")
+    print(f"  {'query':<50} {'legacy us':>10} {'shared us':>10} {'speedup':>8}")
+    for query, before, after in zip(QUERIES, legacy, shared):
+        print(f"  {query[:50]:<50} {before:10.2f} {after:10.2f} {before / after:7.1f}x")
+    print(f"  {'mean':<50} {statistics.mean(legacy):10.2f} {statistics.mean(shared):10.2f} "
+          f"{statistics.mean(legacy) / statistics.mean(shared):7.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""Startup benchmark: import time of ``main`` and time to first /ask response.
+
+Each run uses a fresh interpreter so module import caches are cold. Gemini is
+replaced by an offline stub (see fake_gemini.py), so the numbers cover only
+our own startup work and exclude network time.
+
+Usage: python benchmarks/startup_benchmark.py [--runs 5] [--query "What is 6 * 4?"] [--warm-up]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def child(query, warm_up):
+    sys.path.insert(0, ROOT)
+    sys.path.insert(0, os.path.join(ROOT, "benchmarks"))
+    import asyncio
+    import logging
+
+    start = time.perf_counter()
+    import main
+    import_seconds = time.perf_counter() - start
+
+    logging.disable(logging.INFO)
+    from asgi_client import asgi_request
+    from fake_gemini import install_fake_models
+    install_fake_models()
+
+    warm_up_seconds = None
+    if warm_up:
+        start = time.perf_counter()
+        main.tutor_agent.warm_up()
+        warm_up_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    status, _ = asyncio.run(asgi_request(main.app, "POST", "/ask", {"query": query}))
+    first_response_seconds = time.perf_counter() - start
+    assert status == 200, status
+
+    print(json.dumps({
+        "import_s": import_seconds,
+        "warm_up_s": warm_up_seconds,
+        "first_response_s": first_response_seconds,
+        "sympy_loaded": "sympy" in sys.modules,
+        "genai_loaded": "google.generativeai" in sys.modules,
+    }))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--query", default="What is 6 * 4?")
+    parser.add_argument("--warm-up", action="store_true", help="run TutorAgent.warm_up() before the first request")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.query, args.warm_up)
+        return
+
+    env = dict(os.environ, CONVERSATION_STORE="memory", GEMINI_API_KEY="benchmark", WARM_UP_ON_STARTUP="false")
+    command = [sys.executable, os.path.abspath(__file__), "--child", "--query", args.query]
+    if args.warm_up:
+        command.append("--warm-up")
+
+    results = []
+    for _ in range(args.runs):
+        output = subprocess.run(command, cwd=ROOT, env=env, capture_output=True, text=True, check=True).stdout
+        results.append(json.loads(output.strip().splitlines()[-1]))
+
+    print(f"Startup benchmark ({args.runs} runs, query={args.query!r}, warm_up={args.warm_up})")
+    for key in ("import_s", "warm_up_s", "first_response_s"):
+        values = [r[key] for r in results if r[key] is not None]
+        if values:
+            print(f"  {key:<18} median {1000 * statistics.median(values):8.1f} ms"
+                  f"   min {1000 * min(values):8.1f} ms   max {1000 * max(values):8.1f} ms")
+    print(f"  sympy loaded after first response: {results[-1]['sympy_loaded']}")
+    print(f"  google.generativeai loaded:        {results[-1]['genai_loaded']}")
+
+if __name__ == "__main__":
+    main()
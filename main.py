@@ -1,14 +1,41 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Query
 from fastapi.staticfiles import StaticFiles
-from pydantic import BaseModel, validator
-from typing import Optional, List
+from pydantic import BaseModel, Field, validator
+from typing import Optional, List, Dict
 from dotenv import load_dotenv
 import os
-from agents.tutor_agent import TutorAgent
-from fastapi.responses import FileResponse, RedirectResponse
+import json
+import asyncio
+from contextlib import asynccontextmanager
+# Load .env before importing modules that read their configuration at import time
 load_dotenv()
+from agents.tutor_agent import TutorAgent
+from tools.gemini_utils import get_cache_stats, get_in_flight_stats
+from tools.equation_solver import get_solver_stats
+from tools.physics_simulator import get_simulation_stats
+from tools.metrics import metrics
+from fastapi.responses import FileResponse, RedirectResponse, StreamingResponse, PlainTextResponse
+
+# Preload sub-agents, the Gemini client and SymPy in the background after startup
+WARM_UP_ON_STARTUP = os.getenv("WARM_UP_ON_STARTUP", "false").lower() in ("1", "true", "yes")
+
+# Summarize long conversations in the background and send the summary with later prompts
+SUMMARIZE_CONVERSATIONS = os.getenv("SUMMARIZE_CONVERSATIONS", "false").lower() in ("1", "true", "yes")
+
+# Reuse answers to near-identical standalone questions (per agent) without calling Gemini
+SEMANTIC_CACHE = os.getenv("SEMANTIC_CACHE", "false").lower() in ("1", "true", "yes")
 
-app = FastAPI()
+# Answer pure-arithmetic math queries with local step-by-step working instead of a Gemini explanation
+LOCAL_ARITHMETIC = os.getenv("LOCAL_ARITHMETIC", "false").lower() in ("1", "true", "yes")
+
+@asynccontextmanager
+async def lifespan(app):
+    if WARM_UP_ON_STARTUP:
+        # Not awaited: the server starts accepting requests immediately
+        asyncio.get_running_loop().run_in_executor(None, tutor_agent.warm_up)
+    yield
+
+app = FastAPI(lifespan=lifespan)
 
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
@@ -21,6 +48,33 @@ async def favicon():
 # Constants for validation
 MAX_QUERY_LENGTH = 4000
 MIN_QUERY_LENGTH = 1
+MAX_PAGE_SIZE = 100
+MAX_BATCH_SIZE = 50
+MAX_BATCH_CONCURRENCY = 16
+DEFAULT_BATCH_CONCURRENCY = 8
+MAX_SWEEP_AXES = 2
+# Coarse request limits; the engine checks each parameter's own range and the grid's total cost
+MAX_SWEEP_STEPS_PER_AXIS = 1000
+MAX_SWEEP_PARAMETER_MAGNITUDE = 1e7
+
+def _validate_query_text(v):
+    if not v or not v.strip():
+        raise ValueError("Query cannot be empty")
+    
+    if len(v.strip()) < MIN_QUERY_LENGTH:
+        raise ValueError("Query is too short")
+        
+    if len(v) > MAX_QUERY_LENGTH:
+        raise ValueError(f"Query exceeds maximum length of {MAX_QUERY_LENGTH} characters")
+    
+    return v.strip()
+
+def _validate_agent_name(v):
+    if v is not None:
+        allowed_agents = ['math', 'physics', 'chemistry', 'history', 'general', 'auto']
+        if v not in allowed_agents:
+            raise ValueError(f"Invalid agent. Must be one of: {', '.join(allowed_agents)}")
+    return v
 
 class QueryRequest(BaseModel):
     query: str
@@ -29,23 +83,35 @@ class QueryRequest(BaseModel):
     
     @validator('query')
     def validate_query(cls, v):
-        if not v or not v.strip():
-            raise ValueError("Query cannot be empty")
-        
-        if len(v.strip()) < MIN_QUERY_LENGTH:
-            raise ValueError("Query is too short")
-            
-        if len(v) > MAX_QUERY_LENGTH:
-            raise ValueError(f"Query exceeds maximum length of {MAX_QUERY_LENGTH} characters")
-        
-        return v.strip()
+        return _validate_query_text(v)
     
     @validator('preferred_agent')
     def validate_preferred_agent(cls, v):
-        if v is not None:
-            allowed_agents = ['math', 'physics', 'chemistry', 'history', 'general', 'auto']
-            if v not in allowed_agents:
-                raise ValueError(f"Invalid agent. Must be one of: {', '.join(allowed_agents)}")
+        return _validate_agent_name(v)
+
+class BatchQueryRequest(BaseModel):
+    queries: List[str]
+    conversation_id: Optional[str] = None
+    preferred_agent: Optional[str] = None
+    shared_conversation: bool = True
+    max_concurrency: int = DEFAULT_BATCH_CONCURRENCY
+
+    @validator('queries')
+    def validate_queries(cls, v):
+        if not v:
+            raise ValueError("Batch must contain at least one query")
+        if len(v) > MAX_BATCH_SIZE:
+            raise ValueError(f"Batch exceeds maximum size of {MAX_BATCH_SIZE} queries")
+        return [_validate_query_text(query) for query in v]
+
+    @validator('preferred_agent')
+    def validate_preferred_agent(cls, v):
+        return _validate_agent_name(v)
+
+    @validator('max_concurrency')
+    def validate_max_concurrency(cls, v):
+        if v < 1 or v > MAX_BATCH_CONCURRENCY:
+            raise ValueError(f"max_concurrency must be between 1 and {MAX_BATCH_CONCURRENCY}")
         return v
 
 class ConversationRequest(BaseModel):
@@ -59,14 +125,107 @@ class QueryResponse(BaseModel):
     conversation_id: str
     agent_used: Optional[str] = None
 
+class BatchItemResult(BaseModel):
+    index: int
+    query: str
+    conversation_id: Optional[str] = None
+    response: Optional[str] = None
+    agent_used: Optional[str] = None
+    error: Optional[str] = None
+
+class BatchQueryResponse(BaseModel):
+    results: List[BatchItemResult]
+
+class SweepRange(BaseModel):
+    start: float = Field(ge=-MAX_SWEEP_PARAMETER_MAGNITUDE, le=MAX_SWEEP_PARAMETER_MAGNITUDE)
+    stop: float = Field(ge=-MAX_SWEEP_PARAMETER_MAGNITUDE, le=MAX_SWEEP_PARAMETER_MAGNITUDE)
+    steps: int = Field(ge=1, le=MAX_SWEEP_STEPS_PER_AXIS)
+
+class SweepRequest(BaseModel):
+    scenario: str
+    ranges: Dict[str, SweepRange]
+    parameters: Dict[str, float] = {}
+    method: str = "adaptive"
+    quantities: Optional[List[str]] = None
+
+    @validator('ranges')
+    def validate_ranges(cls, v):
+        if not 1 <= len(v) <= MAX_SWEEP_AXES:
+            raise ValueError(f"ranges must name between 1 and {MAX_SWEEP_AXES} parameters")
+        return v
+
+    @validator('parameters')
+    def validate_parameters(cls, v):
+        for name, value in v.items():
+            if abs(value) > MAX_SWEEP_PARAMETER_MAGNITUDE:
+                raise ValueError(f"Parameter '{name}' must be at most {MAX_SWEEP_PARAMETER_MAGNITUDE:g} in magnitude")
+        return v
+
+class SweepResponse(BaseModel):
+    scenario: str
+    method: str
+    shape: List[int]
+    parameters: Dict[str, float]
+    columns: Dict[str, List[Optional[float]]]
+    units: Dict[str, str]
+
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
-tutor_agent = TutorAgent(GEMINI_API_KEY)
+tutor_agent = TutorAgent(GEMINI_API_KEY, summarize_conversations=SUMMARIZE_CONVERSATIONS,
+                         semantic_cache=SEMANTIC_CACHE, local_arithmetic=LOCAL_ARITHMETIC)
+
+def _collect_service_metrics():
+    """Cache, coalescing, routing and store gauges; only evaluated when /metrics is scraped"""
+    cache = get_cache_stats()
+    classification_cache = tutor_agent.classification_cache.get_stats()
+    in_flight = get_in_flight_stats()
+    routing = tutor_agent.routing_stats.get_stats()
+    solver = get_solver_stats()
+    caches = (("gemini", cache), ("classification", classification_cache), ("equation", solver["cache"]),
+              ("simulation", get_simulation_stats()["cache"]))
+    collected = {
+        "tutor_cache_entries": ("gauge", "Entries held by each cache",
+                                [({"cache": name}, stats["entries"]) for name, stats in caches]),
+        "tutor_cache_bytes": ("gauge", "Approximate bytes held by each cache",
+                              [({"cache": name}, stats["bytes"]) for name, stats in caches]),
+        "tutor_cache_hits_total": ("counter", "Cache lookups that found a live entry",
+                                   [({"cache": name}, stats["hits"]) for name, stats in caches]),
+        "tutor_cache_misses_total": ("counter", "Cache lookups that found nothing",
+                                     [({"cache": name}, stats["misses"]) for name, stats in caches]),
+        "tutor_cache_evictions_total": ("counter", "Entries evicted to respect cache bounds",
+                                        [({"cache": name}, stats["evictions"]) for name, stats in caches]),
+        "tutor_gemini_in_flight": ("gauge", "Gemini calls currently in flight", in_flight["in_flight"]),
+        "tutor_gemini_coalesced_total": ("counter", "Gemini calls served by joining an in-flight call",
+                                         in_flight["coalesced"]),
+        "tutor_classifications_total": ("counter", "Query classifications by method",
+                                        [({"method": method}, routing[f"{method}_count"])
+                                         for method in tutor_agent.routing_stats.METHODS]),
+        "tutor_conversations": ("gauge", "Conversations in the conversation store",
+                                tutor_agent.conversation_manager.count_conversations()),
+    }
+    if solver["pool"] is not None:
+        collected["tutor_equation_solver_timeouts_total"] = (
+            "counter", "Equation solves killed after the timeout", solver["pool"]["timeouts"]
+        )
+    semantic = tutor_agent.get_semantic_cache_stats()
+    if semantic is not None:
+        collected["tutor_semantic_cache_lookups_total"] = (
+            "counter", "Semantic cache lookups by outcome",
+            [({"outcome": "hit"}, semantic["hits"]),
+             ({"outcome": "miss"}, semantic["misses"] - semantic["near_misses"]),
+             ({"outcome": "near_miss"}, semantic["near_misses"])]
+        )
+        collected["tutor_semantic_cache_hit_similarity"] = (
+            "gauge", "Average similarity of semantic cache hits", semantic["avg_hit_similarity"]
+        )
+    return collected
+
+metrics.register_collector(_collect_service_metrics)
 
 @app.post("/conversations", response_model=ConversationResponse)
 async def create_conversation(request: ConversationRequest):
     """Create a new conversation"""
     try:
-        conversation_id = tutor_agent.create_conversation(request.user_id)
+        conversation_id = await asyncio.to_thread(tutor_agent.create_conversation, request.user_id)
         return ConversationResponse(conversation_id=conversation_id)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to create conversation: {str(e)}")
@@ -75,7 +234,7 @@ async def create_conversation(request: ConversationRequest):
 async def ask_tutor(request: QueryRequest):
     """Ask a question to the tutor with optional conversation context"""
     try:
-        response, conversation_id, agent_used = tutor_agent.handle_query(
+        response, conversation_id, agent_used = await tutor_agent.handle_query_async(
             request.query, 
             request.conversation_id,
             request.preferred_agent
@@ -86,12 +245,87 @@ async def ask_tutor(request: QueryRequest):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to process query: {str(e)}")
 
+@app.post("/ask/batch", response_model=BatchQueryResponse)
+async def ask_tutor_batch(request: BatchQueryRequest):
+    """Ask a list of questions at once; results are returned in input order"""
+    try:
+        results = await tutor_agent.handle_batch_async(
+            request.queries,
+            request.conversation_id,
+            request.preferred_agent,
+            request.shared_conversation,
+            request.max_concurrency
+        )
+        return BatchQueryResponse(results=results)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to process batch: {str(e)}")
+
+@app.post("/simulate/sweep", response_model=SweepResponse)
+async def simulate_sweep(request: SweepRequest):
+    """Simulate a physics scenario over a grid of one or two parameter ranges, returned column by column"""
+    ranges = {name: (r.start, r.stop, r.steps) for name, r in request.ranges.items()}
+    try:
+        return await asyncio.to_thread(
+            tutor_agent.physics_agent.sweep,
+            request.scenario,
+            ranges,
+            request.parameters,
+            request.method,
+            request.quantities
+        )
+    except ValueError as e:
+        # Out-of-range input the request model cannot check (per-scenario limits, grid cost)
+        raise HTTPException(status_code=422, detail=str(e))
+    except TimeoutError as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to run sweep: {str(e)}")
+
+def _sse_event(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+@app.post("/ask/stream")
+async def ask_tutor_stream(request: QueryRequest):
+    """Ask a question and stream the answer as Server-Sent Events.
+
+    Emits a ``meta`` event with the conversation and agent, ``chunk`` events
+    with response text as it is generated, then a ``done`` event.
+    """
+    try:
+        conversation_id, agent_used, chunks = await tutor_agent.start_stream_async(
+            request.query,
+            request.conversation_id,
+            request.preferred_agent
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Failed to process query: {str(e)}")
+
+    async def event_stream():
+        yield _sse_event("meta", {"conversation_id": conversation_id, "agent_used": agent_used})
+        try:
+            async for chunk in chunks:
+                yield _sse_event("chunk", {"text": chunk})
+        except Exception as e:
+            yield _sse_event("error", {"detail": f"Failed to process query: {str(e)}"})
+            return
+        yield _sse_event("done", {})
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
 @app.get("/conversations")
-async def list_conversations(user_id: Optional[str] = None):
-    """List all conversations, optionally filtered by user"""
+async def list_conversations(user_id: Optional[str] = None, limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+                             cursor: Optional[str] = None):
+    """List conversations by most recent activity, optionally filtered by user and paginated"""
     try:
-        conversations = tutor_agent.list_conversations(user_id)
-        return {"conversations": conversations}
+        conversations, next_cursor = await asyncio.to_thread(tutor_agent.list_conversations_page, user_id, limit, cursor)
+        return {"conversations": conversations, "next_cursor": next_cursor}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to list conversations: {str(e)}")
 
@@ -99,11 +333,11 @@ async def list_conversations(user_id: Optional[str] = None):
 async def get_conversation(conversation_id: str):
     """Get conversation information and history"""
     try:
-        conversation_info = tutor_agent.get_conversation_info(conversation_id)
+        conversation_info = await asyncio.to_thread(tutor_agent.get_conversation_info, conversation_id)
         if not conversation_info:
             raise HTTPException(status_code=404, detail="Conversation not found")
         
-        history = tutor_agent.get_conversation_history(conversation_id)
+        history = await asyncio.to_thread(tutor_agent.get_conversation_history, conversation_id)
         
         return {
             "conversation_info": conversation_info,
@@ -118,7 +352,7 @@ async def get_conversation(conversation_id: str):
 async def delete_conversation(conversation_id: str):
     """Delete a conversation"""
     try:
-        success = tutor_agent.delete_conversation(conversation_id)
+        success = await asyncio.to_thread(tutor_agent.delete_conversation, conversation_id)
         if not success:
             raise HTTPException(status_code=404, detail="Conversation not found")
         
@@ -128,6 +362,25 @@ async def delete_conversation(conversation_id: str):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to delete conversation: {str(e)}")
 
+@app.get("/stats")
+async def get_stats():
+    """Cache, request coalescing, query routing, stage latency, semantic cache, summarizer, solver and simulation statistics"""
+    return {
+        "cache": get_cache_stats(),
+        "in_flight": get_in_flight_stats(),
+        "routing": tutor_agent.get_routing_stats(),
+        "stages": metrics.get_stage_stats(),
+        "semantic_cache": tutor_agent.get_semantic_cache_stats(),
+        "summaries": tutor_agent.get_summary_stats(),
+        "equations": get_solver_stats(),
+        "simulations": get_simulation_stats()
+    }
+
+@app.get("/metrics", include_in_schema=False)
+async def get_metrics():
+    """Per-stage latency histograms and service gauges in the Prometheus text format"""
+    return PlainTextResponse(metrics.render_prometheus(), media_type="text/plain; version=0.0.4")
+
 @app.get("/")
 async def root():
     return RedirectResponse(url="/static/index.html")
\ No newline at end of file
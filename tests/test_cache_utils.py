@@ -0,0 +1,78 @@
+import time
+from tools.cache_utils import Cache, SQLiteCacheBackend
+
+def test_cache_lru_eviction():
+    cache = Cache(ttl_seconds=60, max_entries=2)
+    cache.set("a", "1")
+    cache.set("b", "2")
+    assert cache.get("a") == "1"  # "a" becomes most recently used
+    cache.set("c", "3")
+    assert cache.get("b") is None
+    assert cache.get("a") == "1"
+    assert cache.get("c") == "3"
+    stats = cache.get_stats()
+    assert stats["evictions"] == 1
+    assert stats["hits"] == 3
+    assert stats["misses"] == 1
+
+def test_cache_byte_limit():
+    cache = Cache(ttl_seconds=60, max_bytes=20)
+    cache.set("k1", "x" * 8)
+    cache.set("k2", "y" * 8)
+    cache.set("k3", "z" * 8)
+    assert cache.get_cache_size() == 2
+    assert cache.get_stats()["bytes"] <= 20
+    cache.set("big", "x" * 100)
+    assert cache.get("big") is None
+
+def test_cache_expiry():
+    cache = Cache(ttl_seconds=0.05, cleanup_interval=0.01)
+    cache.set("a", "1")
+    time.sleep(0.1)
+    assert cache.get_cache_size() == 0
+    assert cache.get_stats()["expirations"] == 1
+    cache.stop_cleanup()
+
+def test_sqlite_backend_is_shared_and_compressed(tmp_path):
+    db_path = str(tmp_path / "cache.db")
+    writer = Cache(ttl_seconds=60, backend=SQLiteCacheBackend(db_path))
+    reader = Cache(ttl_seconds=60, backend=SQLiteCacheBackend(db_path))
+    answer = "The derivative of x^2 is 2x. " * 50
+    writer.set("k", answer)
+    assert reader.get("k") == answer
+    assert reader.get("missing") is None
+    stats = reader.get_stats()
+    assert stats["entries"] == 1
+    assert stats["bytes"] < len(answer)  # stored compressed
+    writer.set("k", "short")
+    assert reader.get("k") == "short"
+    assert reader.get_cache_size() == 1
+
+def test_sqlite_backend_limits_and_expiry(tmp_path):
+    cache = Cache(ttl_seconds=60, max_entries=2, backend=SQLiteCacheBackend(str(tmp_path / "cache.db"), touch_interval=0))
+    cache.set("a", "1")
+    time.sleep(0.01)
+    cache.set("b", "2")
+    time.sleep(0.01)
+    assert cache.get("a") == "1"  # refreshes "a"
+    cache.set("c", "3")
+    assert cache.get("b") is None
+    assert cache.get_stats()["evictions"] == 1
+
+    cache.ttl_seconds = 0
+    time.sleep(0.01)
+    assert cache.remove_expired() == 2
+    assert cache.get_cache_size() == 0
+    assert cache.get_stats()["bytes"] == 0
+    print("Cache tests passed!")
+
+if __name__ == "__main__":
+    import tempfile
+    from pathlib import Path
+    test_cache_lru_eviction()
+    test_cache_byte_limit()
+    test_cache_expiry()
+    with tempfile.TemporaryDirectory() as tmp:
+        test_sqlite_backend_is_shared_and_compressed(Path(tmp))
+    with tempfile.TemporaryDirectory() as tmp:
+        test_sqlite_backend_limits_and_expiry(Path(tmp))
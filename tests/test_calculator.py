@@ -1,4 +1,7 @@
-from tools.calculator import calculate
+from fractions import Fraction
+from agents.math_agent import MathAgent
+from tools.calculator import calculate, evaluate, try_evaluate
+from tools.model_registry import ModelRegistry
 
 def test_calculator():
     assert calculate("2 + 3") == 5.0
@@ -6,7 +9,36 @@ def test_calculator():
     assert calculate("10 / 2") == 5.0
     assert calculate("5 - 3") == 2.0
     assert "Error" in calculate("10 / 0")
+
+def test_expressions():
+    assert calculate("-3+4") == 1.0
+    assert calculate("2*3+1") == 7.0
+    assert calculate("2 * (3 + 1) ^ 2") == 32.0
+    assert evaluate("0.1 + 0.2")[0] == Fraction(3, 10)
+    assert evaluate("sqrt(9/4)")[0] == Fraction(3, 2)
+    assert evaluate("2*3+1")[1] == ["2 × 3 = 6", "6 + 1 = 7"]
+    assert abs(calculate("sin(pi / 2)") - 1.0) < 1e-12
+    # Anything outside the whitelist is rejected rather than executed
+    assert try_evaluate("__import__('os').getcwd()") is None
+    assert try_evaluate("x + 1") is None
+    assert try_evaluate("9 ^ 9 ^ 9 ^ 9") is None
+
+class NoCallModel:
+    model_name = "no-call"
+
+    def generate_content(self, prompt):
+        raise AssertionError("pure arithmetic must not call Gemini")
+
+def test_local_arithmetic_answer():
+    registry = ModelRegistry()
+    registry.set_model("gemini-2.0-flash", NoCallModel())
+    agent = MathAgent(model_registry=registry, local_arithmetic=True)
+    response = agent.handle_query("What is (1+2)/(3*4)?", [])
+    assert response.startswith("Result: 1/4 (≈ 0.25)")
+    assert "3. 3 ÷ 12 = 1/4" in response
     print("Calculator tests passed!")
 
 if __name__ == "__main__":
-    test_calculator()
\ No newline at end of file
+    test_calculator()
+    test_expressions()
+    test_local_arithmetic_answer()
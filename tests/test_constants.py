@@ -1,4 +1,9 @@
-from tools.constants import get_constant
+import json
+import os
+from agents.chemistry_agent import ChemistryAgent
+from agents.physics_agent import PhysicsAgent
+from agents.query_analysis import analyze_query
+from tools.constants import ConstantsRegistry, find_constant, format_constant, get_constant, match_constant
 
 def test_constants():
     result = get_constant("speed of light")
@@ -7,7 +12,64 @@ def test_constants():
     result = get_constant("gravitational constant")
     assert result["value"] == 6.67430e-11
     assert "Error" in get_constant("unknown constant")
+
+def test_aliases_symbols_and_typos():
+    assert get_constant("Avogadro's number")["name"] == "avogadro constant"
+    assert get_constant("G")["name"] == "gravitational constant"
+    assert get_constant("g")["name"] == "standard gravity"
+    assert get_constant("plank constant")["name"] == "planck constant"
+    assert find_constant("What is the value of the reduced Planck constant?") == "reduced planck constant"
+    assert format_constant(get_constant("c")) == "The speed of light (c) is 299792458 m/s."
+
+def test_only_bare_value_questions_are_answered_locally():
+    assert match_constant("the gas constant") == "gas constant"
+    assert match_constant("gas constant in L atm") is None
+    physics, chemistry = PhysicsAgent(), ChemistryAgent()
+    model, prompt, prefix = physics._prepare_query("What is the value of the speed of light?", "",
+                                                   analyze_query("What is the value of the speed of light?"))
+    assert prompt is None and prefix == "The speed of light (c) is 299792458 m/s."
+    # Anything more than the bare value goes to Gemini as asked, with the registry value as a fact
+    for agent, query in [
+        (physics, "What is the value of the acceleration due to gravity on Mars?"),
+        (physics, "What is the acceleration due to gravity on the Moon?"),
+        (physics, "mass of an electron in grams"),
+        (chemistry, "Use the gas constant to find the pressure of 2 mol at 300 K in 10 L"),
+        (chemistry, "How many atoms in 2 moles? Use Avogadro's number"),
+    ]:
+        features = analyze_query(query)
+        assert features.constant is not None and not features.asks_constant_value, query
+        model, prompt, prefix = agent._prepare_query(query, "", features)
+        assert query in prompt and "Known value" in prompt and prefix == "", query
+
+def test_lookup_is_independent_of_working_directory(tmp_path):
+    cwd = os.getcwd()
+    os.chdir(tmp_path)
+    try:
+        assert get_constant("planck constant")["symbol"] == "h"
+    finally:
+        os.chdir(cwd)
+
+def test_reload_on_change(tmp_path):
+    path = tmp_path / "constants.json"
+    path.write_text(json.dumps({"speed of sound": {"value": 343, "unit": "m/s"}}))
+    registry = ConstantsRegistry(str(path), check_interval=0)
+    assert registry.lookup("speed of sound")["value"] == 343
+    path.write_text(json.dumps({"speed of sound": {"value": 343, "unit": "m/s", "aliases": ["sound speed"]}}))
+    os.utime(path, ns=(1, 1))  # a distinct mtime even on coarse filesystem clocks
+    assert registry.lookup("sound speed")["value"] == 343
+    path.write_text("{broken")
+    os.utime(path, ns=(2, 2))
+    assert registry.lookup("speed of sound")["value"] == 343  # keeps the last good version
+    assert registry.get_stats()["loads"] == 2
     print("Constants tests passed!")
 
 if __name__ == "__main__":
-    test_constants()
\ No newline at end of file
+    import tempfile
+    from pathlib import Path
+    test_constants()
+    test_aliases_symbols_and_typos()
+    test_only_bare_value_questions_are_answered_locally()
+    with tempfile.TemporaryDirectory() as tmp:
+        test_lookup_is_independent_of_working_directory(Path(tmp))
+    with tempfile.TemporaryDirectory() as tmp:
+        test_reload_on_change(Path(tmp))
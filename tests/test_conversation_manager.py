@@ -0,0 +1,96 @@
+import tempfile
+from tools.conversation_manager import ConversationManager, create_default_store
+from tools.conversation_store import InMemoryConversationStore, SQLiteConversationStore
+
+def check_conversation_manager(manager):
+    conv_a = manager.create_conversation("alice")
+    conv_b = manager.create_conversation("bob")
+    for i in range(5):
+        manager.add_interaction(conv_a, f"q{i}", f"a{i}", "math")
+
+    history = manager.get_conversation_history(conv_a, limit=2)
+    assert [h["query"] for h in history] == ["q3", "q4"]
+    assert len(manager.get_conversation_history(conv_a)) == 5
+    assert manager.get_formatted_history(conv_a, limit=1) == "Q: q4\nA: a4"
+
+    manager.add_interaction(conv_b, "hello", "hi", None)
+    listed = manager.list_conversations()
+    assert [c["id"] for c in listed] == [conv_b, conv_a]
+    assert [c["id"] for c in manager.list_conversations("alice")] == [conv_a]
+    assert manager.get_conversation_info(conv_a)["interaction_count"] == 5
+
+    assert manager.delete_conversation(conv_a)
+    assert not manager.conversation_exists(conv_a)
+    assert manager.get_conversation_history(conv_a) == []
+    try:
+        manager.add_interaction(conv_a, "q", "a")
+        assert False, "expected ValueError"
+    except ValueError:
+        pass
+
+def check_pagination(manager):
+    ids = [manager.create_conversation("dave") for _ in range(7)]
+    manager.create_conversation("erin")
+    manager.add_interaction(ids[0], "q", "a")  # ids[0] becomes the most recent
+
+    seen, cursor = [], None
+    while True:
+        page, cursor = manager.list_conversations_page("dave", limit=3, cursor=cursor)
+        seen.extend(c["id"] for c in page)
+        if cursor is None:
+            break
+    assert seen == [c["id"] for c in manager.list_conversations("dave")]
+    assert seen[0] == ids[0]
+    assert sorted(seen) == sorted(ids)
+
+def check_context_window(store):
+    manager = ConversationManager(store, context_max_turns=3, context_max_chars=60, context_text_max_chars=20)
+    conv_id = manager.create_conversation()
+    assert manager.get_context(conv_id) == ""
+
+    manager.add_interaction(conv_id, "q0", "a0")
+    assert manager.get_context(conv_id) == "Previous conversation:\nQ: q0\nA: a0\n\n"
+
+    for i in range(1, 4):
+        manager.add_interaction(conv_id, f"q{i}", f"a{i}")
+    assert manager.get_context(conv_id) == "Previous conversation:\nQ: q1\nA: a1\nQ: q2\nA: a2\nQ: q3\nA: a3\n\n"
+
+    # Long answers are cut and old turns dropped to stay within the character budget
+    manager.add_interaction(conv_id, "q4", "x" * 100)
+    context = manager.get_context(conv_id)
+    assert "x" * 20 not in context and "[...]" in context
+    assert "q1" not in context and "q4" in context
+    assert len(context) <= 60 + len("Previous conversation:\n\n\n")
+
+def test_in_memory_store():
+    check_conversation_manager(ConversationManager(InMemoryConversationStore()))
+    check_pagination(ConversationManager(InMemoryConversationStore()))
+    check_context_window(InMemoryConversationStore())
+
+def test_sqlite_store(tmp_path):
+    db_path = str(tmp_path / "conversations.db")
+    check_conversation_manager(ConversationManager(SQLiteConversationStore(db_path)))
+    check_pagination(ConversationManager(SQLiteConversationStore(str(tmp_path / "paging.db"))))
+    check_context_window(SQLiteConversationStore(str(tmp_path / "context.db")))
+
+    # A second manager on the same file sees the persisted conversations
+    first = ConversationManager(SQLiteConversationStore(db_path))
+    conv_id = first.create_conversation("carol")
+    first.add_interaction(conv_id, "q", "a", "history")
+    second = ConversationManager(SQLiteConversationStore(db_path))
+    assert second.get_conversation_history(conv_id)[0]["agent_type"] == "history"
+
+def test_default_store_falls_back_when_unwritable(tmp_path, monkeypatch):
+    monkeypatch.setenv("CONVERSATION_STORE", "sqlite")
+    monkeypatch.setenv("CONVERSATION_DB_PATH", str(tmp_path / "missing" / "conversations.db"))
+    monkeypatch.setattr(tempfile, "tempdir", str(tmp_path))
+    store = create_default_store()
+    assert isinstance(store, SQLiteConversationStore) and store.db_path == str(tmp_path / "conversations.db")
+    # Neither location is writable: conversations stay in memory rather than failing at import
+    monkeypatch.setattr(tempfile, "tempdir", str(tmp_path / "also-missing"))
+    assert isinstance(create_default_store(), InMemoryConversationStore)
+    monkeypatch.delenv("CONVERSATION_DB_PATH")
+    monkeypatch.setenv("VERCEL", "1")
+    monkeypatch.setattr(tempfile, "tempdir", str(tmp_path))
+    assert create_default_store().db_path == str(tmp_path / "conversations.db")
+    print("Conversation manager tests passed!")
@@ -0,0 +1,72 @@
+import time
+from tools.conversation_manager import ConversationManager
+from tools.conversation_store import InMemoryConversationStore
+from tools.conversation_summarizer import SUMMARY_MODEL_NAME, ConversationSummarizer
+from tools.gemini_utils import clear_gemini_cache
+from tools.model_registry import ModelRegistry
+
+class FakeResponse:
+    def __init__(self, text):
+        self.text = text
+
+class SummaryModel:
+    model_name = "fake-summary-model"
+
+    def __init__(self):
+        self.prompts = []
+
+    def generate_content(self, prompt):
+        self.prompts.append(prompt)
+        return FakeResponse(f"summary #{len(self.prompts)}")
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.time() + timeout
+    while not condition():
+        assert time.time() < deadline, "timed out"
+        time.sleep(0.01)
+
+def test_background_summary():
+    clear_gemini_cache()
+    registry = ModelRegistry()
+    model = SummaryModel()
+    registry.set_model(SUMMARY_MODEL_NAME, model)
+    manager = ConversationManager(InMemoryConversationStore(), context_max_turns=3)
+    summarizer = ConversationSummarizer(manager, model_registry=registry, min_interactions=6, every_interactions=3)
+    manager.summarizer = summarizer
+
+    conv_id = manager.create_conversation()
+    for i in range(5):
+        manager.add_interaction(conv_id, f"question {i}", f"answer {i}")
+    assert summarizer.get_stats()["workers"] == 0  # below the threshold nothing is scheduled
+
+    manager.add_interaction(conv_id, "question 5", "answer 5")
+    wait_for(lambda: summarizer.get_stats()["completed"] == 1)
+    metadata = manager.get_conversation_info(conv_id)["metadata"]
+    assert metadata["summary"] == "summary #1"
+    assert metadata["summary_upto"] == 3
+    # Only the turns that left the three-turn window are summarized
+    assert "question 2" in model.prompts[0] and "question 3" not in model.prompts[0]
+
+    context = manager.get_context(conv_id)
+    assert context.startswith("Summary of the earlier conversation:\nsummary #1\n\nPrevious conversation:\nQ: question 3")
+
+    for i in range(6, 9):
+        manager.add_interaction(conv_id, f"question {i}", f"answer {i}")
+    wait_for(lambda: summarizer.get_stats()["completed"] == 2)
+    assert manager.get_conversation_info(conv_id)["metadata"]["summary_upto"] == 6
+    # The previous summary is folded into the next one
+    assert "summary #1" in model.prompts[1] and "question 0" not in model.prompts[1]
+    summarizer.stop(timeout=1)
+
+def test_full_queue_drops_instead_of_blocking():
+    manager = ConversationManager(InMemoryConversationStore())
+    summarizer = ConversationSummarizer(manager, min_interactions=1, every_interactions=1, queue_size=1, workers=0)
+    assert summarizer.notify("a", 1)
+    assert not summarizer.notify("a", 2)  # already queued
+    assert not summarizer.notify("b", 1)
+    assert summarizer.get_stats()["dropped"] == 1
+    print("Conversation summarizer tests passed!")
+
+if __name__ == "__main__":
+    test_background_summary()
+    test_full_queue_drops_instead_of_blocking()
@@ -0,0 +1,33 @@
+from tools.equation_balancer import balance_equation, find_reaction, parse_reaction, try_balance
+
+def test_balance_equation():
+    assert str(balance_equation("H2 + O2 -> H2O")) == "2H2 + O2 -> 2H2O"
+    assert str(balance_equation("KMnO4 + HCl -> KCl + MnCl2 + H2O + Cl2")) == \
+        "2KMnO4 + 16HCl -> 2KCl + 2MnCl2 + 8H2O + 5Cl2"
+    assert balance_equation("K4[Fe(CN)6] + KMnO4 + H2SO4 -> KHSO4 + Fe2(SO4)3 + MnSO4 + HNO3 + CO2 + H2O") \
+        .coefficients == (10, 122, 299, 162, 5, 122, 60, 60, 188)
+    assert str(balance_equation("Ca(OH)2(aq) + H3PO4(aq) => Ca3(PO4)2(s) + H2O(l)")) == \
+        "3Ca(OH)2(aq) + 2H3PO4(aq) -> Ca3(PO4)2(s) + 6H2O(l)"
+    # Coefficients already written are recomputed
+    assert balance_equation("2 H2 + 2 O2 = H2O").coefficients == (2, 1, 2)
+
+def test_unbalanceable_reactions():
+    for reaction in ["Na + Cl2 -> KCl", "H2 + O2 -> H2O + H2O2", "H2O -> H2O2 -> O2", "H2 ->"]:
+        try:
+            balance_equation(reaction)
+            assert False, reaction
+        except ValueError:
+            pass
+
+def test_find_reaction():
+    assert find_reaction("Explain how to balance Fe + O2 -> Fe2O3, please") == "Fe + O2 -> Fe2O3"
+    assert find_reaction("Balance h2 + o2 -> h2o") is None
+    assert parse_reaction("2H2 + O2 -> 2H2O") == (("H2", "O2"), ("H2O",))
+    assert str(try_balance("Balance CH4 + O2 -> CO2 + H2O")) == "CH4 + 2O2 -> CO2 + 2H2O"
+    assert try_balance("Balance Na + Cl2 -> KCl") is None
+    print("Equation balancer tests passed!")
+
+if __name__ == "__main__":
+    test_balance_equation()
+    test_unbalanceable_reactions()
+    test_find_reaction()
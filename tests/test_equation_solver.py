@@ -0,0 +1,61 @@
+import time
+from tools import equation_solver
+from tools.equation_solver import solve_equation, solution_cache, timeout_cache
+from tools.process_pool import TimeoutProcessPool
+
+def test_equivalent_equations_share_a_cache_entry():
+    solution_cache.clear()
+    first = solve_equation("x^2 + 3*x + 2 = 0")
+    assert first == "Solutions:\nx_1 = -2\nx_2 = -1"
+    hits = solution_cache.get_stats()["hits"]
+    assert solve_equation("3*x + x**2 = -2") == first
+    assert solution_cache.get_stats()["hits"] == hits + 1
+    assert solve_equation("2*x + 5 = 3*x - 1") == "x = 6"
+    assert solve_equation("x^^ = 2").startswith("Error")
+
+def test_timeouts_are_cached_briefly():
+    run = equation_solver._run
+
+    def time_out(fn, *args):
+        if fn is equation_solver._solve_canonical:
+            raise TimeoutError()
+        return run(fn, *args)
+
+    solution_cache.clear()
+    timeout_cache.clear()
+    equation_solver._run = time_out
+    try:
+        result = solve_equation("x^3 = 7*x + 1")
+    finally:
+        equation_solver._run = run
+    assert result.startswith("Error") and "within" in result
+    assert solution_cache.get_cache_size() == 0 and timeout_cache.get_cache_size() == 1
+    assert timeout_cache.ttl_seconds <= 60
+    # Served from the timeout cache without another attempt
+    assert solve_equation("x^3 = 7*x + 1") == result
+    timeout_cache.clear()
+    assert solve_equation("x^3 = 7*x + 1").startswith("Solutions")
+
+def test_pool_kills_calls_that_time_out():
+    pool = TimeoutProcessPool(processes=1, name="test-worker")
+    try:
+        pool.run(time.sleep, (10,), timeout=0.2)
+        assert False, "expected a timeout"
+    except TimeoutError:
+        pass
+    assert pool.run(abs, (-3,), timeout=5) == 3  # served by a replacement worker
+    try:
+        pool.run(int, ("not a number",), timeout=5)
+        assert False, "expected the worker's exception"
+    except ValueError:
+        pass
+    stats = pool.get_stats()
+    assert stats["timeouts"] == 1
+    assert stats["started"] == 2
+    pool.shutdown()
+    print("Equation solver tests passed!")
+
+if __name__ == "__main__":
+    test_equivalent_equations_share_a_cache_entry()
+    test_timeouts_are_cached_briefly()
+    test_pool_kills_calls_that_time_out()
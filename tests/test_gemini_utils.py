@@ -0,0 +1,147 @@
+import asyncio
+import threading
+import time
+from tools import gemini_utils
+from tools.cache_utils import Cache, MemoryCacheBackend
+from tools.gemini_utils import (
+    call_gemini_with_retry, call_gemini_with_retry_async, clear_gemini_cache, stream_gemini_with_retry_async
+)
+
+class FakeResponse:
+    def __init__(self, text):
+        self.text = text
+
+class FakeModel:
+    model_name = "fake-model"
+
+    def __init__(self, failures=0):
+        self.failures = failures
+        self.calls = 0
+
+    def generate_content(self, prompt):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise RuntimeError("temporary failure")
+        return FakeResponse(f"answer to {prompt}")
+
+    async def generate_content_async(self, prompt, stream=False):
+        response = self.generate_content(prompt)
+        if stream:
+            return FakeStream(response.text.split(" "))
+        return response
+
+class FakeStream:
+    def __init__(self, words):
+        self.words = words
+
+    async def __aiter__(self):
+        for i, word in enumerate(self.words):
+            yield FakeResponse(word if i == 0 else f" {word}")
+
+class SlowModel(FakeModel):
+    def generate_content(self, prompt):
+        time.sleep(0.05)
+        return super().generate_content(prompt)
+
+    async def generate_content_async(self, prompt, stream=False):
+        await asyncio.sleep(0.05)
+        return await super().generate_content_async(prompt, stream)
+
+def test_call_gemini_with_retry_async():
+    gemini_utils.RETRY_DELAY_SECONDS = 0
+    clear_gemini_cache()
+    model = FakeModel(failures=1)
+    assert asyncio.run(call_gemini_with_retry_async(model, "q1")) == "answer to q1"
+    assert model.calls == 2
+    # Second call is served from the shared cache
+    assert call_gemini_with_retry(model, "q1") == "answer to q1"
+    assert model.calls == 2
+    assert "Error" in asyncio.run(call_gemini_with_retry_async(FakeModel(failures=5), "q2"))
+
+def test_concurrent_identical_calls_are_coalesced():
+    clear_gemini_cache()
+    model = SlowModel()
+
+    async def burst():
+        return await asyncio.gather(*[call_gemini_with_retry_async(model, "burst") for _ in range(10)])
+
+    assert asyncio.run(burst()) == ["answer to burst"] * 10
+    assert model.calls == 1
+
+    clear_gemini_cache()
+    model = SlowModel()
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(call_gemini_with_retry(model, "threads")))
+               for _ in range(10)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert results == ["answer to threads"] * 10
+    assert model.calls == 1
+
+def test_cancelled_follower_does_not_break_the_flight():
+    clear_gemini_cache()
+    model = SlowModel()
+
+    async def cancel_one_follower():
+        leader = asyncio.ensure_future(call_gemini_with_retry_async(model, "cancel"))
+        await asyncio.sleep(0.01)
+        follower = asyncio.ensure_future(call_gemini_with_retry_async(model, "cancel"))
+        await asyncio.sleep(0.01)
+        follower.cancel()
+        try:
+            await follower
+            assert False, "follower was not cancelled"
+        except asyncio.CancelledError:
+            pass
+        return await leader
+
+    assert asyncio.run(cancel_one_follower()) == "answer to cancel"
+    assert gemini_utils.gemini_flights.get_stats()["in_flight"] == 0
+    clear_gemini_cache()
+    assert asyncio.run(call_gemini_with_retry_async(model, "cancel")) == "answer to cancel"
+    assert model.calls == 2
+
+class SlowBackend(MemoryCacheBackend):
+    """Stands in for a backend doing blocking disk I/O"""
+    def get(self, key, touch=True):
+        time.sleep(0.1)
+        return super().get(key, touch)
+
+def test_async_cache_access_does_not_block_the_event_loop():
+    model = FakeModel()
+
+    async def lookups():
+        return await asyncio.gather(call_gemini_with_retry_async(model, "a"), call_gemini_with_retry_async(model, "b"))
+
+    shared_cache, gemini_utils.gemini_cache = gemini_utils.gemini_cache, Cache(backend=SlowBackend())
+    try:
+        start = time.perf_counter()
+        assert asyncio.run(lookups()) == ["answer to a", "answer to b"]
+        # The two lookups (and peeks) overlap instead of queueing on the event loop
+        assert time.perf_counter() - start < 0.35
+    finally:
+        gemini_utils.gemini_cache = shared_cache
+
+def test_stream_gemini_with_retry_async():
+    clear_gemini_cache()
+    model = FakeModel()
+
+    async def collect():
+        return [chunk async for chunk in stream_gemini_with_retry_async(model, "stream me")]
+
+    chunks = asyncio.run(collect())
+    assert len(chunks) == 4
+    assert "".join(chunks) == "answer to stream me"
+    # The full text is cached, so the next call is served without the model
+    assert asyncio.run(collect()) == ["answer to stream me"]
+    assert model.calls == 1
+    print("Gemini utils tests passed!")
+
+if __name__ == "__main__":
+    test_call_gemini_with_retry_async()
+    test_concurrent_identical_calls_are_coalesced()
+    test_cancelled_follower_does_not_break_the_flight()
+    test_async_cache_access_does_not_block_the_event_loop()
+    test_stream_gemini_with_retry_async()
@@ -0,0 +1,51 @@
+import asyncio
+from agents.physics_agent import PhysicsAgent
+from tools.metrics import Histogram, Metrics, metrics
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Histogram(buckets=(0.1, 1.0))
+    for seconds in (0.05, 0.5, 0.7, 3.0):
+        histogram.observe(seconds)
+    cumulative, total, count = histogram.snapshot()
+    assert [c for _, c in cumulative] == [1, 3, 4]
+    assert count == 4
+    assert abs(total - 4.25) < 1e-9
+
+def test_streamed_answers_record_the_agent_stage():
+    def agent_count():
+        return metrics.get_stage_stats().get("agent", {"count": 0})["count"]
+
+    async def collect(agent, query):
+        return [chunk async for chunk in agent.stream_query_async(query, "")]
+
+    before = agent_count()
+    chunks = asyncio.run(collect(PhysicsAgent(), "What is the value of the speed of light?"))
+    assert chunks == ["The speed of light (c) is 299792458 m/s."]
+    assert agent_count() == before + 1
+
+def test_render_prometheus():
+    metrics = Metrics(buckets=(0.5,))
+    with metrics.span("classify", method="keyword"):
+        pass
+    metrics.observe("gemini_attempt", 2.0, model="gemini-2.0-flash")
+    metrics.register_collector(lambda: {
+        "tutor_cache_entries": ("gauge", "Entries", [({"cache": "gemini"}, 3)]),
+        "tutor_gemini_in_flight": ("gauge", "In flight", 0),
+    })
+    text = metrics.render_prometheus()
+    assert "# TYPE tutor_stage_duration_seconds histogram" in text
+    assert 'tutor_stage_duration_seconds_bucket{stage="classify",method="keyword",le="0.5"} 1' in text
+    assert 'tutor_stage_duration_seconds_bucket{stage="gemini_attempt",model="gemini-2.0-flash",le="0.5"} 0' in text
+    assert 'tutor_stage_duration_seconds_count{stage="gemini_attempt",model="gemini-2.0-flash"} 1' in text
+    assert 'tutor_cache_entries{cache="gemini"} 3.0' in text
+    assert "tutor_gemini_in_flight 0.0" in text
+
+    stats = metrics.get_stage_stats()
+    assert stats["gemini_attempt"]["count"] == 1
+    assert stats["gemini_attempt"]["avg_ms"] == 2000.0
+    print("Metrics tests passed!")
+
+if __name__ == "__main__":
+    test_histogram_buckets_are_cumulative()
+    test_streamed_answers_record_the_agent_stage()
+    test_render_prometheus()
@@ -0,0 +1,41 @@
+from tools.formula_parser import composition, describe_formula, is_compound_formula, molar_mass, parse_formula
+from tools.periodic_table import format_element, get_element, get_periodic_table
+
+def test_element_lookup():
+    assert len(get_periodic_table().symbols) == 118
+    assert get_element(6)["symbol"] == "C"
+    assert get_element("iron")["atomic_number"] == 26
+    assert get_element("Aluminum")["symbol"] == "Al"
+    assert get_element("Ce")["group"] is None
+    assert get_element("Xx") is None
+    assert format_element(get_element("Fe")).startswith("Iron (Fe): atomic number 26, atomic mass 55.845 u")
+    assert get_periodic_table().find_in_text("Compare sodium, chlorine and Sodium") == ("Na", "Cl")
+
+def test_parse_formula():
+    assert parse_formula("H2O") == {"H": 2, "O": 1}
+    assert parse_formula("(NH4)2SO4") == {"N": 2, "H": 8, "S": 1, "O": 4}
+    assert parse_formula("K4[Fe(CN)6]") == {"K": 4, "Fe": 1, "C": 6, "N": 6}
+    assert parse_formula("CuSO4·5H2O") == {"Cu": 1, "S": 1, "O": 9, "H": 10}
+    assert parse_formula("NaCl(aq)") == {"Na": 1, "Cl": 1}
+    for bad in ["", "Xy2", "H2)", "(H2O", "h2o"]:
+        try:
+            parse_formula(bad)
+            assert False, bad
+        except ValueError:
+            pass
+
+def test_molar_mass_and_composition():
+    assert abs(molar_mass("H2O") - 18.015) < 1e-3
+    assert abs(molar_mass("C6H12O6") - 180.156) < 1e-3
+    percents = {symbol: percent for symbol, _, _, percent in composition("NaCl")}
+    assert abs(sum(percents.values()) - 100) < 1e-9
+    assert round(percents["Na"], 2) == 39.34
+    assert describe_formula("H2O").splitlines()[0] == "H2O: molar mass 18.015 g/mol"
+    assert is_compound_formula("NaCl") and is_compound_formula("O2")
+    assert not is_compound_formula("He") and not is_compound_formula("Is")
+    print("Periodic table tests passed!")
+
+if __name__ == "__main__":
+    test_element_lookup()
+    test_parse_formula()
+    test_molar_mass_and_composition()
@@ -0,0 +1,144 @@
+import math
+import numpy as np
+from tools.physics_engine import run_batch, simulate, sweep
+from tools.physics_simulator import (
+    build_simulation_prompt, format_simulation, parse_scenario, run_simulation, simulate_scenario, simulation_cache
+)
+
+def close(a, b, tolerance=1e-6):
+    return abs(a - b) <= tolerance * max(1.0, abs(b))
+
+def test_integrators_match_closed_forms():
+    exact = simulate("projectile", {"speed": 20, "angle": 30, "height": 5})
+    assert exact["method"] == "analytic"
+    for method in ("adaptive", "fixed"):
+        # Asking for a trajectory forces numeric integration even without drag
+        numeric = simulate("projectile", {"speed": 20, "angle": 30, "height": 5}, method, trajectory_points=20)
+        assert numeric["method"] == method
+        for name in ("time_of_flight", "range", "max_height", "impact_speed"):
+            assert close(numeric["quantities"][name], exact["quantities"][name]), (method, name)
+        assert len(numeric["trajectory"]["x"]) == 20
+    # Free fall with quadratic drag: t = (vt / g) * arccosh(exp(g h / vt^2))
+    result = simulate("free_fall", {"height": 10, "mass": 1, "drag": 0.1})
+    terminal = math.sqrt(9.81 / 0.1)
+    assert close(result["quantities"]["time_of_flight"], terminal / 9.81 * math.acosh(math.exp(9.81 * 10 / terminal ** 2)))
+    assert close(result["quantities"]["terminal_velocity"], terminal)
+    assert simulate("free_fall", {})["quantities"]["terminal_velocity"] is None
+
+def test_oscillators_and_collisions():
+    small = simulate("pendulum", {"amplitude": 1, "length": 2})["quantities"]
+    assert close(small["period"], small["small_angle_period"], 1e-4)
+    # A trajectory forces integration; undamped runs otherwise use the closed form
+    large = simulate("pendulum", {"amplitude": 90}, trajectory_points=10)["quantities"]
+    assert close(large["period"], 1.18034 * 2 * math.pi * math.sqrt(1 / 9.81), 1e-5)
+    assert close(large["final_amplitude"], 90, 1e-4)
+    # Damped spring: the amplitude decays as exp(-zeta * omega0 * t)
+    spring = simulate("spring", {"damping": 2}, "fixed")["quantities"]
+    assert close(spring["final_amplitude"], 0.1 * math.exp(-0.1 * 10 * spring["simulated_time"]), 0.02)
+    assert simulate("spring", {"damping": 40})["quantities"]["period"] is None
+    inelastic = simulate("collision", {"mass1": 2, "velocity1": 3, "mass2": 1, "restitution": 0})["quantities"]
+    assert close(inelastic["final_velocity1"], 2) and close(inelastic["final_velocity2"], 2)
+    assert close(inelastic["energy_lost"], 3)
+
+def test_batches_match_single_runs():
+    angles = np.array([15.0, 45.0, 75.0])
+    quantities, _, method = run_batch("projectile", {"angle": angles, "drag": 0.01})
+    assert method == "adaptive" and quantities["range"].shape == (3,)
+    for angle, batch_range in zip(angles, quantities["range"]):
+        assert batch_range == simulate("projectile", {"angle": angle, "drag": 0.01})["quantities"]["range"]
+    for bad in [("projectile", {"mass": 0}), ("pendulum", {"spin": 1}), ("orbit", {})]:
+        try:
+            simulate(*bad)
+            assert False, bad
+        except ValueError:
+            pass
+
+def test_stiff_drag_and_time_budget():
+    # Launch transient far faster than the flight: adaptive steps shrink, then grow again
+    pebble = simulate_scenario("A 1 g pebble is thrown at 5000 m/s at 45 degrees with air resistance")
+    assert pebble["method"] == "adaptive" and 0 < pebble["quantities"]["time_of_flight"] < 2
+    for bad in [("projectile", {"speed": 5000, "mass": 0.001, "drag": 0.011}, "fixed"),
+                ("free_fall", {"height": 1000, "mass": 0.0001, "drag": 0.011}, "adaptive")]:
+        try:
+            simulate(*bad)
+            assert False, bad
+        except ValueError:
+            pass
+    # Too stiff to integrate, so the agent falls back to describing the scenario
+    assert simulate_scenario("A 0.1 g feather is dropped from 1000 m with air resistance") is None
+    try:
+        simulate("pendulum", {"damping": 0.1, "periods": 100}, timeout=0.01)
+        assert False, "no timeout"
+    except TimeoutError:
+        pass
+    assert simulate("projectile", {"speed": 20, "angle": 30, "height": 5})["quantities"]["energy_lost_to_drag"] == 0
+
+def test_sweeps():
+    result = sweep("projectile", {"angle": (15, 75, 3), "speed": (10, 30, 2)}, {"drag": 0.01},
+                   quantities=["range"], chunks=4)
+    assert result["shape"] == [3, 2] and result["method"] == "adaptive"
+    assert list(result["columns"]) == ["angle", "speed", "range"]
+    assert result["columns"]["angle"] == [15.0, 15.0, 45.0, 45.0, 75.0, 75.0]
+    assert result["parameters"]["drag"] == 0.01 and result["units"]["range"] == "m"
+    for angle, speed, swept_range in zip(*result["columns"].values()):
+        single = simulate("projectile", {"angle": angle, "speed": speed, "drag": 0.01})["quantities"]["range"]
+        assert close(swept_range, single, 1e-9)
+    undamped = sweep("spring", {"stiffness": (50, 200, 4)})
+    assert undamped["method"] == "analytic" and undamped["columns"]["energy_lost"] == [0.0] * 4
+    assert sweep("free_fall", {"drag": (0, 0.1, 2)})["columns"]["terminal_velocity"][0] is None
+    for bad in [({}, {}), ({"angle": (0, 90, 10), "speed": (1, 2, 2), "height": (0, 1, 2)}, {}),
+                ({"angle": (0, 90, 0)}, {}), ({"angle": (0, 90, 1000), "speed": (1, 2, 1000)}, {}),
+                ({"angle": (0, 90, 10)}, {"angle": 45}), ({"mass": (-1, 1, 3)}, {}),
+                ({"speed": (0, 1e5, 3)}, {}), ({"angle": (0, 90, 2)}, {"height": 1e9})]:
+        try:
+            sweep("projectile", *bad)
+            assert False, bad
+        except ValueError:
+            pass
+    # Integration cost is bounded per parameter and for the grid as a whole
+    for ranges, params in [({"amplitude": (5, 80, 2)}, {"periods": 1000, "damping": 0.1}),
+                           ({"amplitude": (5, 80, 200), "length": (1, 2, 200)}, {"periods": 100, "damping": 0.1})]:
+        try:
+            sweep("pendulum", ranges, params)
+            assert False, ranges
+        except ValueError:
+            pass
+    try:
+        sweep("pendulum", {"amplitude": (5, 80, 100)}, {"periods": 50, "damping": 0.1}, timeout=0.01)
+        assert False, "no timeout"
+    except TimeoutError:
+        pass
+
+def test_scenario_parsing_and_cache():
+    assert parse_scenario("What happens if I drop a ball from 10 meters?") == ("free_fall", {"height": 10.0})
+    assert parse_scenario("A stone is thrown horizontally at 54 km/h from a 20 m cliff") == \
+        ("projectile", {"height": 20.0, "speed": 15.0, "angle": 0.0})
+    assert parse_scenario("A 0.5 kg mass on a spring with k = 200 N/m is pulled 5 cm") == \
+        ("spring", {"stiffness": 200.0, "mass": 0.5, "amplitude": 0.05})
+    assert parse_scenario("A 2 kg cart at 3 m/s collides with a 1 kg cart at rest and they stick together") == \
+        ("collision", {"mass1": 2.0, "mass2": 1.0, "velocity1": 3.0, "velocity2": 0.0, "restitution": 0.0})
+    assert parse_scenario("What happens when you drop a ball?") is None
+    # Angles and masses that decide the outcome must be stated (or implied by "straight up")
+    assert parse_scenario("A car crashes at 20 m/s into a wall") is None
+    assert parse_scenario("A ball is thrown at 20 m/s") is None
+    thrown_up = simulate_scenario("I throw a ball straight up at 20 m/s")
+    assert thrown_up["parameters"]["angle"] == 90.0 and abs(thrown_up["quantities"]["max_height"] - 20.39) < 0.01
+    assert "height" in thrown_up["assumed"] and "speed" not in thrown_up["assumed"]
+    text = format_simulation(thrown_up)
+    assert "Assumed (not given in the question): height 0 m" in text and "- Range: 0 m" in text
+    assert "do not recompute or contradict" not in build_simulation_prompt("I throw a ball straight up", text, True)
+    simulation_cache.clear()
+    first = run_simulation("free_fall", {"height": 10})
+    hits = simulation_cache.get_stats()["hits"]
+    assert run_simulation("free_fall", {"height": 10.0, "mass": 1}) == first
+    assert simulation_cache.get_stats()["hits"] == hits + 1
+    assert "- Time of flight: 1.428 s" in format_simulation(first)
+    print("Physics engine tests passed!")
+
+if __name__ == "__main__":
+    test_integrators_match_closed_forms()
+    test_oscillators_and_collisions()
+    test_batches_match_single_runs()
+    test_stiff_drag_and_time_budget()
+    test_sweeps()
+    test_scenario_parsing_and_cache()
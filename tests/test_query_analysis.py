@@ -0,0 +1,40 @@
+from agents.query_analysis import analyze_query
+
+def test_math_features():
+    features = analyze_query("Solve x^2 + 3x + 2 = 0")
+    assert features.has_equation
+    assert analyze_query("find x when x^2 is 4").has_equation
+    features = analyze_query("What is 2*3 + 1?")
+    assert not features.has_equation
+    assert features.arithmetic == ("2*3 + 1",)
+    assert features.bare_expression == "2*3 + 1"
+
+def test_subject_features():
+    features = analyze_query("Balance H2 + O2 -> H2O")
+    assert features.has_chemical_equation
+    assert "H2O" in features.formulas
+    assert features.reaction == "H2 + O2 -> H2O"
+    assert features.asks_balance
+    features = analyze_query("What did Napoleon do in 1812?")
+    assert features.dates == ("1812",)
+    assert features.figures == ("napoleon",)
+    assert not features.has_chemical_equation
+    features = analyze_query("Is Planck's constant related to the speed of light?")
+    assert features.constant == "planck constant"
+    assert not features.asks_constant_value
+    assert analyze_query("What is the value of Avogadro's number?").asks_constant_value
+    assert not analyze_query("What is the value of the acceleration due to gravity on Mars?").asks_constant_value
+    assert not analyze_query("mass of an electron in grams").asks_constant_value
+    assert analyze_query("What happens when I drop a ball?").has_simulation
+    features = analyze_query("What is the molar mass of Ca(OH)2?")
+    assert features.compounds == ("Ca(OH)2",)
+    assert features.asks_chemistry_facts and not features.needs_explanation
+    features = analyze_query("Why is the atomic number of Fe 26?")
+    assert features.elements == ("Fe",)
+    assert features.needs_explanation
+    assert analyze_query("What is the atomic mass of carbon?").elements == ("C",)
+    print("Query analysis tests passed!")
+
+if __name__ == "__main__":
+    test_math_features()
+    test_subject_features()
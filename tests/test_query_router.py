@@ -0,0 +1,34 @@
+from agents.query_router import KeywordRouter, normalize_query
+
+def test_keyword_router():
+    router = KeywordRouter()
+    assert router.classify("What is 6 * 4?") == "math"
+    assert router.classify("Solve x^2 - 4 = 0") == "math"
+    assert router.classify("What is the speed of light?") == "physics"
+    assert router.classify("What is the pH of lemon juice?") == "chemistry"
+    # Weighted scoring instead of first match wins
+    assert router.classify("What force did Napoleon's army use?") == "history"
+    assert router.classify("Balance the chemical equation H2 + O2 -> H2O") == "chemistry"
+    # Arrow reactions route locally even without chemistry keywords, despite "+" and digits
+    assert router.classify("balance Fe + O2 -> Fe2O3") == "chemistry"
+    assert router.classify("What happens in 2H2 + O2 => 2H2O?") == "chemistry"
+    assert router.classify("Balance Fe + O2 = Fe2O3") == "chemistry"
+    assert router.classify("Are the forces balanced?") is None
+    assert router.classify("Find the limit of sin(x)/x as x -> 0") is None
+    assert router.classify("Decompose CaCO3 -> CaO + CO2") == "chemistry"
+    # Word boundaries: "ph" must not match inside "photosynthesis"
+    assert router.score("Explain photosynthesis") == {}
+    # Plurals match their keyword
+    assert router.classify("Causes of the Punic Wars") == "history"
+    # No hits or a tie defer to the LLM
+    assert router.classify("Tell me a joke") is None
+    assert router.classify("What is the atomic mass?") is None
+
+def test_normalize_query():
+    assert normalize_query("Who built the  Pyramids?") == normalize_query("who built the pyramids")
+    assert normalize_query("  What's   an atom? ") == "what s an atom"
+    print("Query router tests passed!")
+
+if __name__ == "__main__":
+    test_keyword_router()
+    test_normalize_query()
@@ -0,0 +1,42 @@
+from tools.semantic_cache import SemanticCache, canonicalize_question
+
+def test_canonicalize_question():
+    assert canonicalize_question("What's Newton's 2nd law?") == canonicalize_question("what is newton's second law")
+    assert canonicalize_question("What are Newton's laws of motion?")[0] == "newton law motion"
+    assert canonicalize_question("What is 3 * 4?")[1] == ("3", "*", "4")
+
+def test_near_duplicate_lookup():
+    cache = SemanticCache(threshold=0.85)
+    cache.set("physics", "What is Newton's second law?", "F = ma")
+    assert cache.get("physics", "what's newtons 2nd law") == "F = ma"
+    # Answers are kept per agent
+    assert cache.get("history", "What is Newton's second law?") is None
+    # Different numbers or operators are different questions however close the text
+    cache.set("math", "What is 3 * 4?", "12")
+    assert cache.get("math", "What is 3 * 5?") is None
+    assert cache.get("math", "what is 3 * 4") == "12"
+    # Similar wording about a different topic stays below the threshold
+    cache.set("history", "Who was the first president of the United States?", "George Washington")
+    assert cache.get("history", "Who was the second president of the United States?") is None
+
+    stats = cache.get_stats()
+    assert stats["hits"] == 2
+    assert stats["misses"] == 3
+    assert stats["avg_hit_similarity"] == 1.0
+
+def test_eviction_and_replacement():
+    cache = SemanticCache(max_entries=2)
+    cache.set("math", "what is a prime number", "old")
+    cache.set("math", "What is a prime number?", "new")
+    assert cache.get_stats()["entries"] == 1
+    assert cache.get("math", "what is a prime number") == "new"
+    cache.set("math", "what is a derivative", "d")
+    cache.set("math", "what is an integral", "i")
+    assert cache.get("math", "what is a prime number") is None
+    assert cache.get("math", "what is an integral") == "i"
+    print("Semantic cache tests passed!")
+
+if __name__ == "__main__":
+    test_canonicalize_question()
+    test_near_duplicate_lookup()
+    test_eviction_and_replacement()
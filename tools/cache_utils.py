@@ -1,44 +1,341 @@
 import time
+import zlib
+import sqlite3
 import logging
-from typing import Dict, Tuple
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+from tools.sqlite_utils import ThreadLocalConnection, Transaction
 
 logger = logging.getLogger(__name__)
 
+# Responses at least this large are stored zlib-compressed by the SQLite backend
+COMPRESS_MIN_BYTES = 256
+# The SQLite backend refreshes an entry's LRU position at most this often, so
+# hot keys do not turn every read into a write
+TOUCH_INTERVAL_SECONDS = 60
+
+class MemoryCacheBackend:
+    """Process-local entries in an OrderedDict kept in least- to most-recently used order.
+
+    Lookups, inserts and evictions are all O(1).
+    """
+
+    def __init__(self):
+        self._entries: "OrderedDict[str, Tuple[str, float, int]]" = OrderedDict()
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+
+    def _pop(self, key: str):
+        _, _, size = self._entries.pop(key)
+        self._total_bytes -= size
+
+    def get(self, key: str, touch: bool = True) -> Optional[Tuple[str, float]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if touch:
+                self._entries.move_to_end(key)
+            return entry[0], entry[1]
+
+    def set(self, key: str, value: str, timestamp: float):
+        size = len(key) + len(value.encode("utf-8"))
+        with self._lock:
+            if key in self._entries:
+                self._pop(key)
+            self._entries[key] = (value, timestamp, size)
+            self._total_bytes += size
+
+    def delete(self, key: str, timestamp: Optional[float] = None) -> bool:
+        """Delete ``key``; with ``timestamp``, only if it was not rewritten since"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or (timestamp is not None and entry[1] != timestamp):
+                return False
+            self._pop(key)
+            return True
+
+    def evict(self, max_entries: Optional[int], max_bytes: Optional[int]) -> int:
+        """Drop least recently used entries until both limits hold; returns how many"""
+        evicted = 0
+        with self._lock:
+            while self._entries and (
+                (max_entries is not None and len(self._entries) > max_entries)
+                or (max_bytes is not None and self._total_bytes > max_bytes)
+            ):
+                self._pop(next(iter(self._entries)))
+                evicted += 1
+        return evicted
+
+    def remove_expired(self, cutoff: float) -> int:
+        with self._lock:
+            expired = [key for key, (_, timestamp, _) in self._entries.items() if timestamp < cutoff]
+            for key in expired:
+                self._pop(key)
+        return len(expired)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._total_bytes = 0
+
+    def count(self) -> int:
+        return len(self._entries)
+
+    def total_bytes(self) -> int:
+        return self._total_bytes
+
+class SQLiteCacheBackend:
+    """Cache entries in a SQLite file shared by every worker process and kept across restarts.
+
+    Values are stored as UTF-8 blobs, zlib-compressed from ``compress_min_bytes``
+    when that makes them smaller. Entry count and byte totals are maintained by
+    triggers in a one-row table, so limits are checked without scanning.
+    Eviction is approximately LRU: ``accessed_at`` is refreshed on reads at most
+    every ``touch_interval`` seconds.
+    """
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS cache_entries (
+        key TEXT PRIMARY KEY,
+        value BLOB NOT NULL,
+        compressed INTEGER NOT NULL,
+        size INTEGER NOT NULL,
+        created_at REAL NOT NULL,
+        accessed_at REAL NOT NULL
+    ) WITHOUT ROWID;
+    CREATE INDEX IF NOT EXISTS idx_cache_entries_accessed ON cache_entries (accessed_at);
+    CREATE INDEX IF NOT EXISTS idx_cache_entries_created ON cache_entries (created_at);
+    CREATE TABLE IF NOT EXISTS cache_totals (
+        id INTEGER PRIMARY KEY CHECK (id = 0),
+        entries INTEGER NOT NULL,
+        bytes INTEGER NOT NULL
+    );
+    INSERT OR IGNORE INTO cache_totals (id, entries, bytes) VALUES (0, 0, 0);
+    CREATE TRIGGER IF NOT EXISTS cache_entries_insert AFTER INSERT ON cache_entries BEGIN
+        UPDATE cache_totals SET entries = entries + 1, bytes = bytes + new.size WHERE id = 0;
+    END;
+    CREATE TRIGGER IF NOT EXISTS cache_entries_delete AFTER DELETE ON cache_entries BEGIN
+        UPDATE cache_totals SET entries = entries - 1, bytes = bytes - old.size WHERE id = 0;
+    END;
+    CREATE TRIGGER IF NOT EXISTS cache_entries_update AFTER UPDATE OF size ON cache_entries BEGIN
+        UPDATE cache_totals SET bytes = bytes + new.size - old.size WHERE id = 0;
+    END;
+    """
+
+    def __init__(self, db_path: str, compress_min_bytes: int = COMPRESS_MIN_BYTES,
+                 touch_interval: float = TOUCH_INTERVAL_SECONDS):
+        self.db_path = db_path
+        self.compress_min_bytes = compress_min_bytes
+        self.touch_interval = touch_interval
+        self._connection = ThreadLocalConnection(db_path)
+        self._connection.get().executescript(self.SCHEMA)
+        logger.info(f"SQLite cache backend ready at {db_path}")
+
+    def _encode(self, value: str) -> Tuple[bytes, bool]:
+        data = value.encode("utf-8")
+        if len(data) >= self.compress_min_bytes:
+            compressed = zlib.compress(data)
+            if len(compressed) < len(data):
+                return compressed, True
+        return data, False
+
+    @staticmethod
+    def _decode(data: bytes, compressed: int) -> str:
+        return (zlib.decompress(data) if compressed else data).decode("utf-8")
+
+    def get(self, key: str, touch: bool = True) -> Optional[Tuple[str, float]]:
+        conn = self._connection.get()
+        row = conn.execute(
+            "SELECT value, compressed, created_at, accessed_at FROM cache_entries WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        now = time.time()
+        if touch and now - row["accessed_at"] > self.touch_interval:
+            try:
+                conn.execute("UPDATE cache_entries SET accessed_at = ? WHERE key = ?", (now, key))
+            except sqlite3.OperationalError as e:
+                # A busy database only costs LRU precision, never the read
+                logger.warning(f"Could not refresh cache entry: {str(e)}")
+        return self._decode(row["value"], row["compressed"]), row["created_at"]
+
+    def set(self, key: str, value: str, timestamp: float):
+        data, compressed = self._encode(value)
+        with Transaction(self._connection.get()) as conn:
+            conn.execute(
+                "INSERT INTO cache_entries (key, value, compressed, size, created_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT(key) DO UPDATE SET value = excluded.value, "
+                "compressed = excluded.compressed, size = excluded.size, created_at = excluded.created_at, "
+                "accessed_at = excluded.accessed_at",
+                (key, data, int(compressed), len(key) + len(data), timestamp, timestamp)
+            )
+
+    def delete(self, key: str, timestamp: Optional[float] = None) -> bool:
+        """Delete ``key``; with ``timestamp``, only if it was not rewritten since"""
+        with Transaction(self._connection.get()) as conn:
+            if timestamp is None:
+                deleted = conn.execute("DELETE FROM cache_entries WHERE key = ?", (key,)).rowcount
+            else:
+                deleted = conn.execute(
+                    "DELETE FROM cache_entries WHERE key = ? AND created_at = ?", (key, timestamp)
+                ).rowcount
+        return deleted > 0
+
+    def evict(self, max_entries: Optional[int], max_bytes: Optional[int]) -> int:
+        """Drop least recently accessed entries until both limits hold; returns how many"""
+        evicted = 0
+        with Transaction(self._connection.get()) as conn:
+            while True:
+                totals = conn.execute("SELECT entries, bytes FROM cache_totals WHERE id = 0").fetchone()
+                excess = 0
+                if max_entries is not None and totals["entries"] > max_entries:
+                    excess = totals["entries"] - max_entries
+                if max_bytes is not None and totals["bytes"] > max_bytes:
+                    excess = max(excess, 1)
+                if not excess or not totals["entries"]:
+                    return evicted
+                evicted += conn.execute(
+                    "DELETE FROM cache_entries WHERE key IN "
+                    "(SELECT key FROM cache_entries ORDER BY accessed_at LIMIT ?)", (excess,)
+                ).rowcount
+
+    def remove_expired(self, cutoff: float) -> int:
+        with Transaction(self._connection.get()) as conn:
+            return conn.execute("DELETE FROM cache_entries WHERE created_at < ?", (cutoff,)).rowcount
+
+    def clear(self):
+        with Transaction(self._connection.get()) as conn:
+            conn.execute("DELETE FROM cache_entries")
+
+    def count(self) -> int:
+        return self._connection.get().execute("SELECT entries FROM cache_totals WHERE id = 0").fetchone()[0]
+
+    def total_bytes(self) -> int:
+        return self._connection.get().execute("SELECT bytes FROM cache_totals WHERE id = 0").fetchone()[0]
+
 class Cache:
-    def __init__(self, ttl_seconds: int = 3600):  # Default TTL of 1 hour
-        self._cache: Dict[str, Tuple[str, float]] = {}
+    """Thread-safe TTL cache with LRU eviction bounded by entry count and size.
+
+    Entries live in a pluggable backend: ``MemoryCacheBackend`` (the default,
+    per process) or ``SQLiteCacheBackend`` (shared by worker processes and
+    persistent across restarts). Expired entries are dropped lazily on ``get``
+    and, when ``cleanup_interval`` is set, by a daemon thread that
+    periodically calls ``remove_expired``. Hit/miss counters are per process.
+    """
+
+    def __init__(self, ttl_seconds: int = 3600, max_entries: Optional[int] = None,
+                 max_bytes: Optional[int] = None, cleanup_interval: Optional[float] = None,
+                 backend=None):  # Default TTL of 1 hour
+        self._backend = backend if backend is not None else MemoryCacheBackend()
+        self._lock = threading.RLock()
         self.ttl_seconds = ttl_seconds
-        logger.info(f"Initialized cache with TTL of {ttl_seconds} seconds")
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+        self._cleanup_interval = cleanup_interval
+        self._cleanup_thread = None
+        self._stop_cleanup = threading.Event()
+        logger.info(f"Initialized {type(self._backend).__name__} cache with TTL of {ttl_seconds} seconds, "
+                    f"max_entries={max_entries}, max_bytes={max_bytes}")
+
+    @staticmethod
+    def _entry_size(key: str, value: str) -> int:
+        return len(key) + len(value.encode("utf-8"))
 
     def get(self, key: str) -> str | None:
-        if key in self._cache:
-            value, timestamp = self._cache[key]
+        self._ensure_cleanup_thread()
+        entry = self._backend.get(key)
+        if entry is not None:
+            value, timestamp = entry
             if time.time() - timestamp <= self.ttl_seconds:
+                with self._lock:
+                    self._hits += 1
                 logger.info(f"Cache hit for key: {key[:50]}...")
                 return value
-            else:
-                logger.info(f"Cache entry expired for key: {key[:50]}...")
-                del self._cache[key]
+            logger.info(f"Cache entry expired for key: {key[:50]}...")
+            if self._backend.delete(key, timestamp):
+                with self._lock:
+                    self._expirations += 1
+        with self._lock:
+            self._misses += 1
+        return None
+
+    def peek(self, key: str) -> str | None:
+        """Return a live entry without updating LRU order or hit/miss counters"""
+        entry = self._backend.get(key, touch=False)
+        if entry is not None and time.time() - entry[1] <= self.ttl_seconds:
+            return entry[0]
         return None
 
     def set(self, key: str, value: str):
+        self._ensure_cleanup_thread()
+        if self.max_bytes is not None and self._entry_size(key, value) > self.max_bytes:
+            logger.info(f"Not caching oversized response for key: {key[:50]}...")
+            return
         logger.info(f"Caching response for key: {key[:50]}...")
-        self._cache[key] = (value, time.time())
+        self._backend.set(key, value, time.time())
+        evicted = self._backend.evict(self.max_entries, self.max_bytes)
+        if evicted:
+            with self._lock:
+                self._evictions += evicted
 
     def clear(self):
         logger.info("Clearing cache")
-        self._cache.clear()
+        self._backend.clear()
 
     def remove_expired(self):
-        current_time = time.time()
-        expired_keys = [
-            key for key, (_, timestamp) in self._cache.items()
-            if current_time - timestamp > self.ttl_seconds
-        ]
-        for key in expired_keys:
-            del self._cache[key]
-        if expired_keys:
-            logger.info(f"Removed {len(expired_keys)} expired cache entries")
+        removed = self._backend.remove_expired(time.time() - self.ttl_seconds)
+        if removed:
+            with self._lock:
+                self._expirations += removed
+            logger.info(f"Removed {removed} expired cache entries")
+        return removed
 
     def get_cache_size(self) -> int:
-        return len(self._cache) 
\ No newline at end of file
+        return self._backend.count()
+
+    def get_stats(self) -> Dict[str, float]:
+        """Return size limits, current usage and hit/miss/eviction counters"""
+        entries, total_bytes = self._backend.count(), self._backend.total_bytes()
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "backend": type(self._backend).__name__,
+                "entries": entries,
+                "bytes": total_bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_ratio": self._hits / lookups if lookups else 0.0,
+                "evictions": self._evictions,
+                "expirations": self._expirations,
+            }
+
+    def _ensure_cleanup_thread(self):
+        # Started lazily so importing the module never spawns threads
+        if self._cleanup_interval is None or self._cleanup_thread is not None:
+            return
+        with self._lock:
+            if self._cleanup_thread is not None:
+                return
+            self._cleanup_thread = threading.Thread(
+                target=self._cleanup_loop, name="cache-cleanup", daemon=True
+            )
+            self._cleanup_thread.start()
+
+    def _cleanup_loop(self):
+        while not self._stop_cleanup.wait(self._cleanup_interval):
+            try:
+                self.remove_expired()
+            except Exception as e:
+                logger.error(f"Cache cleanup failed: {str(e)}")
+
+    def stop_cleanup(self):
+        """Stop the background expiry thread if it is running"""
+        self._stop_cleanup.set()
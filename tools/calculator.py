@@ -1,22 +1,171 @@
+import ast
+import math
+import operator
+from fractions import Fraction
+from typing import List, Optional, Tuple, Union
+
+Number = Union[Fraction, float]
+
+# Guards against inputs that are cheap to type but expensive to evaluate
+MAX_EXPRESSION_LENGTH = 200
+MAX_EXPONENT = 1000
+MAX_INTEGER_BITS = 3322  # about 1000 decimal digits
+MAX_FACTORIAL = 500
+
+_BINARY_OPERATORS = {
+    ast.Add: (operator.add, "+"),
+    ast.Sub: (operator.sub, "-"),
+    ast.Mult: (operator.mul, "×"),
+    ast.Div: (operator.truediv, "÷"),
+    ast.FloorDiv: (operator.floordiv, "//"),
+    ast.Mod: (operator.mod, "mod"),
+    ast.Pow: (None, "^"),
+}
+
+def _to_float(fn):
+    return lambda x: fn(float(x))
+
+def _exact_sqrt(x: Number) -> Number:
+    # Perfect squares like sqrt(16) or sqrt(9/4) stay exact
+    if isinstance(x, Fraction) and x >= 0:
+        num, den = math.isqrt(x.numerator), math.isqrt(x.denominator)
+        if num * num == x.numerator and den * den == x.denominator:
+            return Fraction(num, den)
+    return math.sqrt(x)
+
+def _factorial(x: Number) -> Fraction:
+    if x != int(x) or x < 0:
+        raise ValueError("factorial is only defined for non-negative integers")
+    if x > MAX_FACTORIAL:
+        raise ValueError(f"factorial argument larger than {MAX_FACTORIAL}")
+    return Fraction(math.factorial(int(x)))
+
+FUNCTIONS = {
+    "sqrt": _exact_sqrt,
+    "abs": abs,
+    "floor": lambda x: Fraction(math.floor(x)),
+    "ceil": lambda x: Fraction(math.ceil(x)),
+    "round": lambda x: Fraction(round(x)),
+    "factorial": _factorial,
+    "sin": _to_float(math.sin),
+    "cos": _to_float(math.cos),
+    "tan": _to_float(math.tan),
+    "asin": _to_float(math.asin),
+    "acos": _to_float(math.acos),
+    "atan": _to_float(math.atan),
+    "exp": _to_float(math.exp),
+    "ln": _to_float(math.log),
+    "log": _to_float(math.log10),
+    "log2": _to_float(math.log2),
+}
+CONSTANTS = {"pi": math.pi, "e": math.e}
+
+def format_number(value: Number) -> str:
+    """Integers as integers, other rationals as "a/b", floats to 10 significant digits"""
+    if isinstance(value, Fraction):
+        if value.denominator == 1:
+            return str(value.numerator)
+        return f"{value.numerator}/{value.denominator}"
+    if value == int(value) and abs(value) < 1e15:
+        return str(int(value))
+    return f"{value:.10g}"
+
+def _operand(value: Number, is_right: bool, additive: bool) -> str:
+    # Parenthesize where the plain text would misread: "2 ^ (1/2)", "5 - (-3)"
+    text = format_number(value)
+    if (is_right and text.startswith("-")) or (not additive and "/" in text):
+        return f"({text})"
+    return text
+
+def _power(base: Number, exponent: Number) -> Number:
+    if isinstance(exponent, Fraction) and exponent.denominator == 1:
+        if abs(exponent) > MAX_EXPONENT:
+            raise ValueError(f"exponent larger than {MAX_EXPONENT}")
+        if isinstance(base, Fraction):
+            if base == 0 and exponent < 0:
+                raise ZeroDivisionError("Division by zero")
+            return base ** int(exponent)
+    result = float(base) ** float(exponent)
+    if isinstance(result, complex):
+        raise ValueError("result is not a real number")
+    return result
+
+class _Evaluator:
+    """Evaluate a parsed expression with a whitelist of nodes, recording each operation as a step"""
+
+    def __init__(self):
+        self.steps: List[str] = []
+
+    def _record(self, description: str, result: Number) -> Number:
+        if isinstance(result, Fraction) and max(result.numerator.bit_length(),
+                                                result.denominator.bit_length()) > MAX_INTEGER_BITS:
+            raise ValueError("result is too large")
+        if isinstance(result, float) and not math.isfinite(result):
+            raise ValueError("result is too large")
+        self.steps.append(f"{description} = {format_number(result)}")
+        return result
+
+    def visit(self, node) -> Number:
+        if isinstance(node, ast.Expression):
+            return self.visit(node.body)
+        if isinstance(node, ast.Constant) and type(node.value) in (int, float):
+            # repr keeps what was typed: 0.1 becomes exactly 1/10
+            return Fraction(repr(node.value))
+        if isinstance(node, ast.Name) and node.id in CONSTANTS:
+            return CONSTANTS[node.id]
+        if isinstance(node, ast.UnaryOp) and isinstance(node.op, (ast.USub, ast.UAdd)):
+            operand = self.visit(node.operand)
+            return -operand if isinstance(node.op, ast.USub) else operand
+        if isinstance(node, ast.BinOp) and type(node.op) in _BINARY_OPERATORS:
+            left = self.visit(node.left)
+            right = self.visit(node.right)
+            fn, symbol = _BINARY_OPERATORS[type(node.op)]
+            if isinstance(node.op, (ast.Div, ast.FloorDiv, ast.Mod)) and right == 0:
+                raise ZeroDivisionError("Division by zero")
+            result = _power(left, right) if fn is None else fn(left, right)
+            additive = isinstance(node.op, (ast.Add, ast.Sub))
+            return self._record(
+                f"{_operand(left, False, additive)} {symbol} {_operand(right, True, additive)}", result
+            )
+        if (isinstance(node, ast.Call) and isinstance(node.func, ast.Name) and node.func.id in FUNCTIONS
+                and len(node.args) == 1 and not node.keywords):
+            argument = self.visit(node.args[0])
+            result = FUNCTIONS[node.func.id](argument)
+            return self._record(f"{node.func.id}({format_number(argument)})", result)
+        raise ValueError(f"Unsupported expression element: {ast.dump(node)[:40]}")
+
+def parse_expression(expression: str) -> ast.Expression:
+    """Parse arithmetic input ("^" means power) into an AST; raises ValueError on anything else"""
+    if len(expression) > MAX_EXPRESSION_LENGTH:
+        raise ValueError("Expression is too long")
+    try:
+        return ast.parse(expression.replace("^", "**").strip(), mode="eval")
+    except SyntaxError:
+        raise ValueError("Invalid expression")
+
+def evaluate(expression: str) -> Tuple[Number, List[str]]:
+    """Evaluate an arithmetic expression exactly where possible.
+
+    Returns the result (a Fraction unless an irrational function or a
+    non-integer power forced a float) and the operations in evaluation order,
+    e.g. ["2 × 3 = 6", "6 + 1 = 7"] for "2*3+1".
+    """
+    evaluator = _Evaluator()
+    result = evaluator.visit(parse_expression(expression))
+    return result, evaluator.steps
+
+def try_evaluate(expression: str) -> Optional[Tuple[Number, List[str]]]:
+    """Like ``evaluate`` but returns None if the text is not a valid arithmetic expression"""
+    try:
+        return evaluate(expression)
+    except (ValueError, ZeroDivisionError, OverflowError, TypeError):
+        return None
+
 def calculate(expression):
     try:
-        # Remove whitespace and split by operator
-        expression = expression.replace(" ", "")
-        if "+" in expression:
-            a, b = map(float, expression.split("+"))
-            return a + b
-        elif "-" in expression:
-            a, b = map(float, expression.split("-"))
-            return a - b
-        elif "*" in expression:
-            a, b = map(float, expression.split("*"))
-            return a * b
-        elif "/" in expression:
-            a, b = map(float, expression.split("/"))
-            if b == 0:
-                raise ValueError("Division by zero")
-            return a / b
-        else:
-            raise ValueError("Invalid expression")
+        result, _ = evaluate(expression)
+        return float(result)
+    except ZeroDivisionError:
+        return "Error: Division by zero"
     except Exception as e:
-        return f"Error: {str(e)}"
\ No newline at end of file
+        return f"Error: {str(e)}"
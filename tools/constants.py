@@ -1,25 +1,195 @@
+import os
+import re
 import json
+import time
+import bisect
+import difflib
+import logging
+import threading
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Resolved next to this module so lookups work from any working directory
+CONSTANTS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "constants.json")
+
+# How often a lookup may stat the file to pick up edits
+RELOAD_CHECK_INTERVAL_SECONDS = 2.0
+FUZZY_CUTOFF = 0.8
+# Words too common across constant names to tell them apart in fuzzy matching
+_FUZZY_IGNORED_WORDS = {"constant", "number", "the", "of", "a", "an"}
+
+def normalize_name(name: str) -> str:
+    """Lowercase and drop possessives, punctuation and a leading "the" ("Planck's constant" -> "planck constant")"""
+    text = name.lower().replace("’", "'")
+    text = re.sub(r"'s\b", "", text)
+    text = " ".join(re.sub(r"[^\w\s]", " ", text).split())
+    return text[4:] if text.startswith("the ") else text
+
+def _fuzzy_core(name: str) -> str:
+    return " ".join(word for word in name.split() if word not in _FUZZY_IGNORED_WORDS)
+
+def format_value(value) -> str:
+    return str(value) if isinstance(value, int) else f"{value:g}"
+
+def format_constant(entry: dict) -> str:
+    """One-line answer for a constant returned by ``get_constant``"""
+    symbol = f" ({entry['symbol']})" if entry.get("symbol") else ""
+    return f"The {entry['name']}{symbol} is {format_value(entry['value'])} {entry['unit']}."
+
+def constant_reference(entry: dict) -> str:
+    """Prompt line giving Gemini a constant's registry value without dictating its use"""
+    return f"Known value (from the constants table; use it only where it applies to the question): {format_constant(entry)}\n\n"
+
+class _ConstantsIndex:
+    """Immutable lookup structures built from one version of the constants file"""
+
+    def __init__(self, constants: Dict[str, dict]):
+        self.entries = {}
+        # normalized name or alias -> canonical name
+        self.names: Dict[str, str] = {}
+        self.symbols: Dict[str, str] = {}
+        for name, data in constants.items():
+            entry = dict(data, name=name)
+            entry.setdefault("subjects", [])
+            self.entries[name] = entry
+            for alias in [name, *data.get("aliases", [])]:
+                self.names.setdefault(normalize_name(alias), name)
+            if data.get("symbol"):
+                self.symbols.setdefault(data["symbol"], name)
+        self.sorted_names = sorted(self.names)
+        self.fuzzy = {}
+        for key, name in self.names.items():
+            self.fuzzy.setdefault(_fuzzy_core(key), name)
+        # Longest alternatives first so "reduced planck constant" wins over "planck constant"
+        alternatives = sorted(self.names, key=len, reverse=True)
+        self.text_pattern = re.compile(r"\b(?:" + "|".join(re.escape(key) for key in alternatives) + r")\b")
+
+    def lookup(self, name: str) -> Optional[str]:
+        if name in self.symbols:
+            return self.symbols[name]
+        if name in self.names:
+            return self.names[name]
+        key = normalize_name(name)
+        if not key:
+            return None
+        if key in self.names:
+            return self.names[key]
+        # Shortest name starting with the text: "speed" -> "speed of light"
+        i = bisect.bisect_left(self.sorted_names, key)
+        candidates = []
+        while i < len(self.sorted_names) and self.sorted_names[i].startswith(key):
+            candidates.append(self.sorted_names[i])
+            i += 1
+        if candidates:
+            return self.names[min(candidates, key=len)]
+        for candidate in self.sorted_names:
+            if key in candidate:
+                return self.names[candidate]
+        close = difflib.get_close_matches(_fuzzy_core(key), list(self.fuzzy), n=1, cutoff=FUZZY_CUTOFF)
+        return self.fuzzy[close[0]] if close else None
+
+class ConstantsRegistry:
+    """Physical and chemical constants indexed by name, alias and symbol.
+
+    The JSON file is read on first use and kept in memory; a lookup stats the
+    file at most every ``check_interval`` seconds and rebuilds the index when
+    its modification time changes (a broken edit keeps the previous version).
+    Lookups try, in order: exact symbol ("G", case-sensitive), exact
+    normalized name or alias, the shortest name with that prefix, names
+    containing the text, and a fuzzy match for typos.
+    """
+
+    def __init__(self, path: str = CONSTANTS_PATH, check_interval: float = RELOAD_CHECK_INTERVAL_SECONDS):
+        self.path = path
+        self.check_interval = check_interval
+        self._index: Optional[_ConstantsIndex] = None
+        self._mtime = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self._loads = 0
+
+    def _load(self, mtime):
+        with open(self.path, "r", encoding="utf-8") as file:
+            constants = json.load(file)
+        self._index = _ConstantsIndex(constants)
+        self._mtime = mtime
+        self._loads += 1
+        logger.info(f"Loaded {len(constants)} constants from {self.path}")
+
+    def _current(self) -> _ConstantsIndex:
+        now = time.monotonic()
+        if self._index is not None and now - self._checked_at < self.check_interval:
+            return self._index
+        with self._lock:
+            if self._index is None or now - self._checked_at >= self.check_interval:
+                mtime = os.stat(self.path).st_mtime_ns
+                if self._index is None:
+                    self._load(mtime)
+                elif mtime != self._mtime:
+                    try:
+                        self._load(mtime)
+                    except (OSError, ValueError) as e:
+                        self._mtime = mtime
+                        logger.error(f"Keeping previous constants, reload failed: {str(e)}")
+                self._checked_at = now
+            return self._index
+
+    def lookup(self, name: str) -> Optional[dict]:
+        """Return a copy of the constant's entry (with its canonical ``name``), or None"""
+        index = self._current()
+        canonical = index.lookup(name)
+        return dict(index.entries[canonical]) if canonical is not None else None
+
+    def match_exact(self, text: str) -> Optional[str]:
+        """Canonical name when ``text`` is exactly a symbol, name or alias (no prefix or fuzzy matching)"""
+        index = self._current()
+        text = text.strip()
+        if text in index.symbols:
+            return index.symbols[text]
+        return index.names.get(normalize_name(text))
+
+    def find_in_text(self, text: str) -> Optional[str]:
+        """Canonical name of the first constant mentioned by name or alias in ``text``"""
+        index = self._current()
+        match = index.text_pattern.search(normalize_name(text))
+        return index.names[match.group(0)] if match else None
+
+    def by_subject(self, subject: str) -> Dict[str, dict]:
+        index = self._current()
+        return {name: dict(entry) for name, entry in index.entries.items() if subject in entry["subjects"]}
+
+    def get_stats(self):
+        index = self._index
+        return {
+            "constants": len(index.entries) if index is not None else 0,
+            "names": len(index.names) if index is not None else 0,
+            "loads": self._loads,
+        }
+
+constants_registry = ConstantsRegistry()
 
 def get_constant(constant_name):
     try:
-        with open("tools/constants.json", "r") as file:
-            constants = json.load(file)
-        constant_name = constant_name.lower()
-        for key in constants:
-            if constant_name in key.lower():
-                return constants[key]
-        return f"Error: Constant '{constant_name}' not found"
+        entry = constants_registry.lookup(constant_name)
+        if entry is None:
+            return f"Error: Constant '{constant_name.lower()}' not found"
+        return entry
     except Exception as e:
         return f"Error: {str(e)}"
 
-# Chemistry-specific constants
-CHEMISTRY_CONSTANTS = {
-    "avogadro_number": 6.022e23,
-    "gas_constant": 8.314,  # J/(mol·K)
-    "planck_constant": 6.626e-34,  # J·s
-    "boltzmann_constant": 1.381e-23,  # J/K
-    "electron_mass": 9.109e-31,  # kg
-    "proton_mass": 1.673e-27,  # kg
-    "elementary_charge": 1.602e-19,  # C
-    "atomic_mass_unit": 1.661e-27,  # kg
-}
\ No newline at end of file
+def match_constant(text):
+    """Canonical name of the constant that ``text`` names exactly, or None"""
+    try:
+        return constants_registry.match_exact(text)
+    except (OSError, ValueError) as e:
+        logger.error(f"Constants unavailable: {str(e)}")
+        return None
+
+def find_constant(text):
+    """Canonical name of a constant mentioned in free text, or None"""
+    try:
+        return constants_registry.find_in_text(text)
+    except (OSError, ValueError) as e:
+        logger.error(f"Constants unavailable: {str(e)}")
+        return None
@@ -1,62 +1,147 @@
+import os
+import time
 import uuid
-from datetime import datetime
-from typing import Dict, List, Optional
+import base64
+import sqlite3
+import tempfile
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
 import logging
+from tools.metrics import timed
+from tools.conversation_store import InMemoryConversationStore, SQLiteConversationStore
 
 logger = logging.getLogger(__name__)
 
+# Default on-disk location of the conversation database (override with CONVERSATION_DB_PATH).
+# Relative to the working directory, except on Vercel where only the temp directory is writable.
+DEFAULT_DB_NAME = "conversations.db"
+
+# Rolling prompt context: the last few turns, with long texts cut and the total
+# capped (roughly 4 characters per Gemini token, so 6000 chars ~ 1500 tokens)
+CONTEXT_MAX_TURNS = 3
+CONTEXT_MAX_CHARS = 6000
+CONTEXT_TEXT_MAX_CHARS = 1200
+TRUNCATION_MARKER = " [...]"
+
+def default_db_path() -> str:
+    """CONVERSATION_DB_PATH, or a default that is writable where the app is deployed"""
+    configured = os.getenv("CONVERSATION_DB_PATH")
+    if configured:
+        return configured
+    if os.getenv("VERCEL"):
+        return os.path.join(tempfile.gettempdir(), DEFAULT_DB_NAME)
+    return DEFAULT_DB_NAME
+
+def create_default_store():
+    """Build the storage backend selected by the CONVERSATION_STORE environment variable.
+
+    If the SQLite database cannot be opened where configured (e.g. a read-only
+    filesystem), it is created in the temp directory instead, and if that fails
+    too conversations are kept in memory.
+    """
+    backend = os.getenv("CONVERSATION_STORE", "sqlite").lower()
+    if backend == "memory":
+        return InMemoryConversationStore()
+    if backend != "sqlite":
+        raise ValueError(f"Unknown conversation store backend: {backend}")
+    db_path = default_db_path()
+    fallback_path = os.path.join(tempfile.gettempdir(), DEFAULT_DB_NAME)
+    for path in dict.fromkeys([db_path, fallback_path]):
+        try:
+            return SQLiteConversationStore(path)
+        except (sqlite3.Error, OSError) as e:
+            logger.warning(f"Cannot open conversation database at {path}: {str(e)}")
+    logger.warning("Keeping conversations in memory; they are lost on restart and not shared between workers")
+    return InMemoryConversationStore()
+
+def _encode_cursor(last_activity: float, conversation_id: str) -> str:
+    raw = f"{last_activity!r}|{conversation_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+def _decode_cursor(cursor: str) -> Tuple[float, str]:
+    try:
+        last_activity, conversation_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|", 1)
+        return float(last_activity), conversation_id
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+def _truncate(text: str, max_chars: int) -> str:
+    if len(text) <= max_chars:
+        return text
+    return text[:max(0, max_chars - len(TRUNCATION_MARKER))].rstrip() + TRUNCATION_MARKER
+
 class ConversationManager:
-    def __init__(self):
-        self.conversations: Dict[str, Dict] = {}
-        logger.info("Conversation Manager initialized")
+    """Conversations on top of a pluggable store.
+
+    Besides the full history, each conversation keeps a pre-rendered rolling
+    context window (the last ``context_max_turns`` Q/A turns, each text cut to
+    ``context_text_max_chars`` and the whole window to ``context_max_chars``).
+    It is updated once per ``add_interaction`` and handed to agents as a ready
+    string by ``get_context``, instead of every request re-reading and
+    re-formatting the history.
+
+    With a ``summarizer`` (see ConversationSummarizer), turns that have left
+    the window are condensed in the background into ``metadata["summary"]``,
+    which ``get_context`` puts in front of the recent turns.
+    """
+
+    def __init__(self, store=None, context_max_turns: int = CONTEXT_MAX_TURNS,
+                 context_max_chars: int = CONTEXT_MAX_CHARS, context_text_max_chars: int = CONTEXT_TEXT_MAX_CHARS):
+        self.store = store if store is not None else create_default_store()
+        self.context_max_turns = context_max_turns
+        self.context_max_chars = context_max_chars
+        self.context_text_max_chars = context_text_max_chars
+        self.summarizer = None
+        logger.info(f"Conversation Manager initialized with {type(self.store).__name__}")
     
+    @timed("conversation", op="create_conversation")
     def create_conversation(self, user_id: Optional[str] = None) -> str:
         """Create a new conversation and return its ID"""
         conversation_id = str(uuid.uuid4())
         
-        self.conversations[conversation_id] = {
-            "id": conversation_id,
-            "user_id": user_id,
-            "created_at": datetime.now(),
-            "last_activity": datetime.now(),
-            "history": [],
-            "metadata": {}
-        }
+        self.store.create_conversation(conversation_id, user_id, time.time())
         
         logger.info(f"Created new conversation: {conversation_id}")
         return conversation_id
     
+    @timed("conversation", op="add_interaction")
     def add_interaction(self, conversation_id: str, query: str, response: str, agent_type: Optional[str] = None):
         """Add a query-response interaction to a conversation"""
-        if conversation_id not in self.conversations:
-            raise ValueError(f"Conversation {conversation_id} not found")
-        
         interaction = {
-            "timestamp": datetime.now(),
+            "timestamp": time.time(),
             "query": query,
             "response": response,
             "agent_type": agent_type
         }
         
-        self.conversations[conversation_id]["history"].append(interaction)
-        self.conversations[conversation_id]["last_activity"] = datetime.now()
+        turn = self._render_turn(query, response)
+
+        def update_context(turns):
+            if turns is None:
+                turns = self._rebuild_context(conversation_id)
+            return self._roll_context(turns, turn)
+
+        interaction_count = self.store.append_interaction(conversation_id, interaction, update_context)
+        if not interaction_count:
+            raise ValueError(f"Conversation {conversation_id} not found")
         
         logger.info(f"Added interaction to conversation {conversation_id}")
+        if self.summarizer is not None:
+            # Only enqueues; the summary is written later by the summarizer's workers
+            self.summarizer.notify(conversation_id, interaction_count)
     
+    @timed("conversation", op="get_conversation_history")
     def get_conversation_history(self, conversation_id: str, limit: Optional[int] = None) -> List[Dict]:
         """Get the history for a specific conversation"""
-        if conversation_id not in self.conversations:
-            return []
-        
-        history = self.conversations[conversation_id]["history"]
-        
-        if limit:
-            return history[-limit:]
+        history = self.store.get_history(conversation_id, limit)
+        for interaction in history:
+            interaction["timestamp"] = datetime.fromtimestamp(interaction["timestamp"])
         return history
     
+    @timed("conversation", op="get_formatted_history")
     def get_formatted_history(self, conversation_id: str, limit: Optional[int] = 3) -> str:
         """Get formatted history string for AI context"""
-        history = self.get_conversation_history(conversation_id, limit)
+        history = self.store.get_history(conversation_id, limit)
         
         if not history:
             return ""
@@ -68,53 +153,107 @@ class ConversationManager:
         
         return "\n".join(formatted_history)
     
+    def _render_turn(self, query: str, response: str) -> str:
+        return (f"Q: {_truncate(query, self.context_text_max_chars)}\n"
+                f"A: {_truncate(response, self.context_text_max_chars)}")
+
+    def _roll_context(self, turns: Optional[List[str]], turn: str) -> List[str]:
+        """Append a rendered turn and drop the oldest ones beyond the turn and size budget"""
+        turns = (turns or [])[-(self.context_max_turns - 1):] if self.context_max_turns > 1 else []
+        turns.append(_truncate(turn, self.context_max_chars))
+        # +1 per turn for the joining newline
+        while len(turns) > 1 and sum(len(t) + 1 for t in turns) > self.context_max_chars:
+            turns.pop(0)
+        return turns
+
+    def _rebuild_context(self, conversation_id: str) -> List[str]:
+        """Render the context turns from the stored history (conversations stored before context windows)"""
+        turns = []
+        for interaction in self.store.get_history(conversation_id, self.context_max_turns):
+            turns = self._roll_context(turns, self._render_turn(interaction["query"], interaction["response"]))
+        return turns
+
+    @timed("conversation", op="get_context")
+    def get_context(self, conversation_id: str) -> str:
+        """Get the rolling prompt context ("Previous conversation: ..."), or "" if there is none"""
+        turns, metadata = self.store.get_context(conversation_id)
+        if turns is None:
+            turns = self._rebuild_context(conversation_id)
+        context = ""
+        if metadata.get("summary"):
+            context = f"Summary of the earlier conversation:\n{metadata['summary']}\n\n"
+        if turns:
+            context += "Previous conversation:\n" + "\n".join(turns) + "\n\n"
+        return context
+
+    def get_history_slice(self, conversation_id: str, start: int, end: int) -> List[Dict]:
+        """Get interactions ``start`` (inclusive) to ``end`` (exclusive), oldest first"""
+        return self.store.get_history_slice(conversation_id, start, end)
+
+    @timed("conversation", op="update_metadata")
+    def update_metadata(self, conversation_id: str, updates: Dict) -> bool:
+        """Merge ``updates`` into the conversation's metadata dict"""
+        return self.store.update_metadata(conversation_id, updates)
+
+    @timed("conversation", op="conversation_exists")
     def conversation_exists(self, conversation_id: str) -> bool:
         """Check if a conversation exists"""
-        return conversation_id in self.conversations
+        return self.store.conversation_exists(conversation_id)
     
+    def count_conversations(self) -> int:
+        """Number of stored conversations"""
+        return self.store.count_conversations()
+
+    @timed("conversation", op="get_conversation_info")
     def get_conversation_info(self, conversation_id: str) -> Optional[Dict]:
         """Get conversation metadata"""
-        return self.conversations.get(conversation_id)
+        conversation = self.store.get_conversation(conversation_id)
+        return self._with_datetimes(conversation) if conversation else None
     
     def list_conversations(self, user_id: Optional[str] = None) -> List[Dict]:
-        """List all conversations, optionally filtered by user"""
-        conversations = []
-        
-        for conv_id, conv_data in self.conversations.items():
-            if user_id is None or conv_data.get("user_id") == user_id:
-                conversations.append({
-                    "id": conv_id,
-                    "user_id": conv_data.get("user_id"),
-                    "created_at": conv_data["created_at"],
-                    "last_activity": conv_data["last_activity"],
-                    "interaction_count": len(conv_data["history"])
-                })
-        
-        # Sort by last activity (most recent first)
-        conversations.sort(key=lambda x: x["last_activity"], reverse=True)
+        """List all conversations, optionally filtered by user, most recent first"""
+        conversations, _ = self.list_conversations_page(user_id)
         return conversations
+
+    @timed("conversation", op="list_conversations_page")
+    def list_conversations_page(self, user_id: Optional[str] = None, limit: Optional[int] = None,
+                                cursor: Optional[str] = None) -> Tuple[List[Dict], Optional[str]]:
+        """List one page of conversations, most recent first.
+
+        Returns the conversations and a cursor for the next page, or None when
+        there are no more conversations.
+        """
+        before = _decode_cursor(cursor) if cursor else None
+        rows = self.store.list_conversations(user_id, limit, before)
+        next_cursor = None
+        if limit and len(rows) == limit:
+            next_cursor = _encode_cursor(rows[-1]["last_activity"], rows[-1]["id"])
+        conversations = []
+        for conversation in rows:
+            conversation = self._with_datetimes(conversation)
+            conversation.pop("metadata", None)
+            conversations.append(conversation)
+        return conversations, next_cursor
     
+    @timed("conversation", op="delete_conversation")
     def delete_conversation(self, conversation_id: str) -> bool:
         """Delete a conversation"""
-        if conversation_id in self.conversations:
-            del self.conversations[conversation_id]
+        if self.store.delete_conversation(conversation_id):
             logger.info(f"Deleted conversation: {conversation_id}")
             return True
         return False
     
+    @timed("conversation", op="clear_old_conversations")
     def clear_old_conversations(self, days: int = 30):
         """Clear conversations older than specified days"""
-        from datetime import timedelta
-        
         cutoff_date = datetime.now() - timedelta(days=days)
-        conversations_to_delete = []
-        
-        for conv_id, conv_data in self.conversations.items():
-            if conv_data["last_activity"] < cutoff_date:
-                conversations_to_delete.append(conv_id)
+        deleted = self.store.delete_inactive_before(cutoff_date.timestamp())
         
-        for conv_id in conversations_to_delete:
-            self.delete_conversation(conv_id)
-        
-        logger.info(f"Cleared {len(conversations_to_delete)} old conversations")
-        return len(conversations_to_delete) 
\ No newline at end of file
+        logger.info(f"Cleared {deleted} old conversations")
+        return deleted
+
+    @staticmethod
+    def _with_datetimes(conversation: Dict) -> Dict:
+        conversation["created_at"] = datetime.fromtimestamp(conversation["created_at"])
+        conversation["last_activity"] = datetime.fromtimestamp(conversation["last_activity"])
+        return conversation
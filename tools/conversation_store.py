@@ -0,0 +1,346 @@
+import json
+import sqlite3
+import threading
+from bisect import bisect_left, insort
+from typing import Callable, Dict, List, Optional, Tuple
+import logging
+from tools.sqlite_utils import ThreadLocalConnection, Transaction
+
+logger = logging.getLogger(__name__)
+
+# Called with the conversation's current context turns (None if never built) and
+# returning the new ones, inside the same write as the interaction it belongs to
+# and before that interaction is added to the history
+ContextUpdate = Callable[[Optional[List[str]]], List[str]]
+
+class InMemoryConversationStore:
+    """Process-local conversation storage, used for tests and single-process dev.
+
+    Listing is served from sorted (last_activity, id) indexes, one over all
+    conversations and one per user, that are updated incrementally whenever a
+    conversation is created, touched or deleted.
+    """
+
+    def __init__(self):
+        self.conversations: Dict[str, Dict] = {}
+        self._all_index: List[Tuple[float, str]] = []
+        self._user_index: Dict[Optional[str], List[Tuple[float, str]]] = {}
+        self._lock = threading.Lock()
+
+    def _index_add(self, conversation: Dict):
+        key = (conversation["last_activity"], conversation["id"])
+        insort(self._all_index, key)
+        insort(self._user_index.setdefault(conversation["user_id"], []), key)
+
+    def _index_remove(self, conversation: Dict):
+        key = (conversation["last_activity"], conversation["id"])
+        for index in (self._all_index, self._user_index[conversation["user_id"]]):
+            del index[bisect_left(index, key)]
+        if not self._user_index[conversation["user_id"]]:
+            del self._user_index[conversation["user_id"]]
+
+    def create_conversation(self, conversation_id: str, user_id: Optional[str], created_at: float):
+        with self._lock:
+            self.conversations[conversation_id] = {
+                "id": conversation_id,
+                "user_id": user_id,
+                "created_at": created_at,
+                "last_activity": created_at,
+                "history": [],
+                "context": [],
+                "metadata": {}
+            }
+            self._index_add(self.conversations[conversation_id])
+
+    def conversation_exists(self, conversation_id: str) -> bool:
+        return conversation_id in self.conversations
+
+    def count_conversations(self) -> int:
+        return len(self.conversations)
+
+    def append_interaction(self, conversation_id: str, interaction: Dict,
+                           context_update: Optional[ContextUpdate] = None) -> int:
+        """Append an interaction; returns the new interaction count, or 0 if the conversation does not exist"""
+        with self._lock:
+            conversation = self.conversations.get(conversation_id)
+            if conversation is None:
+                return 0
+            if context_update is not None:
+                conversation["context"] = context_update(conversation["context"])
+            conversation["history"].append(interaction)
+            self._index_remove(conversation)
+            conversation["last_activity"] = interaction["timestamp"]
+            self._index_add(conversation)
+            return len(conversation["history"])
+
+    def get_history(self, conversation_id: str, limit: Optional[int] = None) -> List[Dict]:
+        conversation = self.conversations.get(conversation_id)
+        if conversation is None:
+            return []
+        history = conversation["history"]
+        if limit:
+            return [dict(h) for h in history[-limit:]]
+        return [dict(h) for h in history]
+
+    def get_history_slice(self, conversation_id: str, start: int, end: int) -> List[Dict]:
+        """Interactions ``start`` (inclusive) to ``end`` (exclusive) in order"""
+        conversation = self.conversations.get(conversation_id)
+        if conversation is None:
+            return []
+        return [dict(h) for h in conversation["history"][start:end]]
+
+    def get_context(self, conversation_id: str) -> Tuple[Optional[List[str]], Dict]:
+        """Return the stored context turns and the conversation metadata ((None, {}) if it does not exist)"""
+        conversation = self.conversations.get(conversation_id)
+        if conversation is None:
+            return None, {}
+        return list(conversation["context"]), dict(conversation["metadata"])
+
+    def update_metadata(self, conversation_id: str, updates: Dict) -> bool:
+        """Merge ``updates`` into the conversation metadata"""
+        with self._lock:
+            conversation = self.conversations.get(conversation_id)
+            if conversation is None:
+                return False
+            conversation["metadata"].update(updates)
+            return True
+
+    def get_conversation(self, conversation_id: str) -> Optional[Dict]:
+        conversation = self.conversations.get(conversation_id)
+        if conversation is None:
+            return None
+        return self._summary(conversation)
+
+    def list_conversations(self, user_id: Optional[str] = None, limit: Optional[int] = None,
+                           before: Optional[Tuple[float, str]] = None) -> List[Dict]:
+        """List conversations by last activity, most recent first, starting below ``before``"""
+        with self._lock:
+            index = self._all_index if user_id is None else self._user_index.get(user_id, [])
+            end = bisect_left(index, before) if before is not None else len(index)
+            start = max(0, end - limit) if limit else 0
+            keys = index[start:end]
+            return [self._summary(self.conversations[conv_id]) for _, conv_id in reversed(keys)]
+
+    def delete_conversation(self, conversation_id: str) -> bool:
+        with self._lock:
+            conversation = self.conversations.pop(conversation_id, None)
+            if conversation is None:
+                return False
+            self._index_remove(conversation)
+            return True
+
+    def delete_inactive_before(self, cutoff: float) -> int:
+        with self._lock:
+            stale = self._all_index[:bisect_left(self._all_index, (cutoff, ""))]
+            for _, conv_id in stale:
+                self._index_remove(self.conversations.pop(conv_id))
+        return len(stale)
+
+    @staticmethod
+    def _summary(conversation: Dict) -> Dict:
+        return {
+            "id": conversation["id"],
+            "user_id": conversation["user_id"],
+            "created_at": conversation["created_at"],
+            "last_activity": conversation["last_activity"],
+            "interaction_count": len(conversation["history"]),
+            "metadata": dict(conversation["metadata"])
+        }
+
+class SQLiteConversationStore:
+    """SQLite-backed conversation storage shared by all worker processes.
+
+    The database runs in WAL mode so readers never block the writer. Each
+    interaction is one appended row keyed by (conversation_id, seq), so recent
+    history is read from the end of the primary key, and listing is served by
+    the (user_id, last_activity) index. The rendered prompt context is kept on
+    the conversation row (JSON list of turns) and rewritten in the same
+    transaction as each appended interaction, so every worker reads it with a
+    single primary-key lookup.
+    """
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS conversations (
+        id TEXT PRIMARY KEY,
+        user_id TEXT,
+        created_at REAL NOT NULL,
+        last_activity REAL NOT NULL,
+        interaction_count INTEGER NOT NULL DEFAULT 0,
+        metadata TEXT NOT NULL DEFAULT '{}',
+        context TEXT
+    );
+    CREATE INDEX IF NOT EXISTS idx_conversations_user_activity
+        ON conversations (user_id, last_activity, id);
+    CREATE INDEX IF NOT EXISTS idx_conversations_activity
+        ON conversations (last_activity, id);
+    CREATE TABLE IF NOT EXISTS interactions (
+        conversation_id TEXT NOT NULL,
+        seq INTEGER NOT NULL,
+        timestamp REAL NOT NULL,
+        query TEXT NOT NULL,
+        response TEXT NOT NULL,
+        agent_type TEXT,
+        PRIMARY KEY (conversation_id, seq)
+    ) WITHOUT ROWID;
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._connection = ThreadLocalConnection(db_path)
+        conn = self._connect()
+        conn.executescript(self.SCHEMA)
+        self._migrate(conn)
+        logger.info(f"SQLite conversation store ready at {db_path}")
+
+    def _connect(self) -> sqlite3.Connection:
+        return self._connection.get()
+
+    @staticmethod
+    def _migrate(conn: sqlite3.Connection):
+        columns = {row["name"] for row in conn.execute("PRAGMA table_info(conversations)")}
+        if "context" not in columns:
+            # Databases created before the context column; NULL means "not built yet"
+            conn.execute("ALTER TABLE conversations ADD COLUMN context TEXT")
+
+    def _transaction(self) -> Transaction:
+        return Transaction(self._connect())
+
+    def create_conversation(self, conversation_id: str, user_id: Optional[str], created_at: float):
+        with self._transaction() as conn:
+            conn.execute(
+                "INSERT INTO conversations (id, user_id, created_at, last_activity, context) VALUES (?, ?, ?, ?, '[]')",
+                (conversation_id, user_id, created_at, created_at)
+            )
+
+    def conversation_exists(self, conversation_id: str) -> bool:
+        row = self._connect().execute("SELECT 1 FROM conversations WHERE id = ?", (conversation_id,)).fetchone()
+        return row is not None
+
+    def count_conversations(self) -> int:
+        return self._connect().execute("SELECT COUNT(*) FROM conversations").fetchone()[0]
+
+    def append_interaction(self, conversation_id: str, interaction: Dict,
+                           context_update: Optional[ContextUpdate] = None) -> int:
+        """Append an interaction; returns the new interaction count, or 0 if the conversation does not exist"""
+        with self._transaction() as conn:
+            row = conn.execute(
+                "SELECT interaction_count, context FROM conversations WHERE id = ?", (conversation_id,)
+            ).fetchone()
+            if row is None:
+                return 0
+            seq = row["interaction_count"]
+            context = None
+            if context_update is not None:
+                # Before the insert, so a rebuild from history only sees the earlier turns
+                context = context_update(json.loads(row["context"]) if row["context"] is not None else None)
+            conn.execute(
+                "INSERT INTO interactions (conversation_id, seq, timestamp, query, response, agent_type) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (conversation_id, seq, interaction["timestamp"], interaction["query"],
+                 interaction["response"], interaction["agent_type"])
+            )
+            conn.execute(
+                "UPDATE conversations SET interaction_count = ?, last_activity = ?, context = COALESCE(?, context) "
+                "WHERE id = ?",
+                (seq + 1, interaction["timestamp"], json.dumps(context) if context is not None else None, conversation_id)
+            )
+        return seq + 1
+
+    def get_history(self, conversation_id: str, limit: Optional[int] = None) -> List[Dict]:
+        conn = self._connect()
+        if limit:
+            rows = conn.execute(
+                "SELECT timestamp, query, response, agent_type FROM interactions "
+                "WHERE conversation_id = ? ORDER BY seq DESC LIMIT ?",
+                (conversation_id, limit)
+            ).fetchall()
+            rows.reverse()
+        else:
+            rows = conn.execute(
+                "SELECT timestamp, query, response, agent_type FROM interactions "
+                "WHERE conversation_id = ? ORDER BY seq",
+                (conversation_id,)
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def get_history_slice(self, conversation_id: str, start: int, end: int) -> List[Dict]:
+        """Interactions ``start`` (inclusive) to ``end`` (exclusive) in order"""
+        rows = self._connect().execute(
+            "SELECT timestamp, query, response, agent_type FROM interactions "
+            "WHERE conversation_id = ? AND seq >= ? AND seq < ? ORDER BY seq",
+            (conversation_id, start, end)
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+    def get_context(self, conversation_id: str) -> Tuple[Optional[List[str]], Dict]:
+        """Return the stored context turns (None if not built yet) and the conversation metadata"""
+        row = self._connect().execute(
+            "SELECT context, metadata FROM conversations WHERE id = ?", (conversation_id,)
+        ).fetchone()
+        if row is None:
+            return None, {}
+        turns = json.loads(row["context"]) if row["context"] is not None else None
+        return turns, json.loads(row["metadata"])
+
+    def update_metadata(self, conversation_id: str, updates: Dict) -> bool:
+        """Merge ``updates`` into the conversation metadata"""
+        with self._transaction() as conn:
+            row = conn.execute("SELECT metadata FROM conversations WHERE id = ?", (conversation_id,)).fetchone()
+            if row is None:
+                return False
+            metadata = json.loads(row["metadata"])
+            metadata.update(updates)
+            conn.execute("UPDATE conversations SET metadata = ? WHERE id = ?", (json.dumps(metadata), conversation_id))
+        return True
+
+    def get_conversation(self, conversation_id: str) -> Optional[Dict]:
+        row = self._connect().execute("SELECT * FROM conversations WHERE id = ?", (conversation_id,)).fetchone()
+        return self._summary(row) if row is not None else None
+
+    def list_conversations(self, user_id: Optional[str] = None, limit: Optional[int] = None,
+                           before: Optional[Tuple[float, str]] = None) -> List[Dict]:
+        """List conversations by last activity, most recent first, starting below ``before``"""
+        conditions, params = [], []
+        if user_id is not None:
+            conditions.append("user_id = ?")
+            params.append(user_id)
+        if before is not None:
+            # Keyset pagination: seek directly into the (last_activity, id) index
+            conditions.append("(last_activity, id) < (?, ?)")
+            params.extend(before)
+        sql = "SELECT * FROM conversations"
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        sql += " ORDER BY last_activity DESC, id DESC"
+        if limit:
+            sql += " LIMIT ?"
+            params.append(limit)
+        rows = self._connect().execute(sql, params).fetchall()
+        return [self._summary(row) for row in rows]
+
+    def delete_conversation(self, conversation_id: str) -> bool:
+        with self._transaction() as conn:
+            deleted = conn.execute("DELETE FROM conversations WHERE id = ?", (conversation_id,)).rowcount
+            conn.execute("DELETE FROM interactions WHERE conversation_id = ?", (conversation_id,))
+        return deleted > 0
+
+    def delete_inactive_before(self, cutoff: float) -> int:
+        with self._transaction() as conn:
+            stale = [row["id"] for row in conn.execute(
+                "SELECT id FROM conversations WHERE last_activity < ?", (cutoff,)
+            ).fetchall()]
+            for conv_id in stale:
+                conn.execute("DELETE FROM conversations WHERE id = ?", (conv_id,))
+                conn.execute("DELETE FROM interactions WHERE conversation_id = ?", (conv_id,))
+        return len(stale)
+
+    @staticmethod
+    def _summary(row) -> Dict:
+        return {
+            "id": row["id"],
+            "user_id": row["user_id"],
+            "created_at": row["created_at"],
+            "last_activity": row["last_activity"],
+            "interaction_count": row["interaction_count"],
+            "metadata": json.loads(row["metadata"])
+        }
@@ -0,0 +1,154 @@
+import queue
+import threading
+import time
+import logging
+from tools.gemini_utils import call_gemini_with_retry
+from tools.metrics import span
+from tools.model_registry import default_registry
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_MODEL_NAME = 'gemini-2.0-flash'
+
+# Summarize once a conversation has this many interactions, then every few more
+SUMMARY_MIN_INTERACTIONS = 6
+SUMMARY_EVERY_INTERACTIONS = 3
+SUMMARY_QUEUE_SIZE = 256
+SUMMARY_WORKERS = 2
+SUMMARY_MAX_WORDS = 150
+
+class ConversationSummarizer:
+    """Background worker that keeps a rolling summary of long conversations.
+
+    ``notify`` is called on the request path after an interaction is stored
+    and only enqueues the conversation ID (dropping it if the bounded queue is
+    full or the conversation is already queued). Up to ``workers`` daemon
+    threads then fold the interactions that have left the manager's context
+    window into ``metadata["summary"]``; ``metadata["summary_upto"]`` records
+    how many interactions the summary covers.
+    """
+
+    def __init__(self, conversation_manager, model_registry=None, min_interactions=SUMMARY_MIN_INTERACTIONS,
+                 every_interactions=SUMMARY_EVERY_INTERACTIONS, queue_size=SUMMARY_QUEUE_SIZE, workers=SUMMARY_WORKERS):
+        self.conversation_manager = conversation_manager
+        self.model_registry = model_registry or default_registry
+        self.min_interactions = min_interactions
+        self.every_interactions = every_interactions
+        self.workers = workers
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._scheduled = set()
+        self._lock = threading.Lock()
+        self._threads = []
+        self._stopped = False
+        self._completed = 0
+        self._skipped = 0
+        self._dropped = 0
+        self._failed = 0
+
+    def notify(self, conversation_id, interaction_count):
+        """Schedule a summary update if ``interaction_count`` crossed a threshold; never blocks"""
+        if interaction_count < self.min_interactions:
+            return False
+        if (interaction_count - self.min_interactions) % self.every_interactions:
+            return False
+        with self._lock:
+            if self._stopped or conversation_id in self._scheduled:
+                return False
+            try:
+                self._queue.put_nowait(conversation_id)
+            except queue.Full:
+                self._dropped += 1
+                logger.warning(f"Summary queue full, skipping conversation {conversation_id}")
+                return False
+            self._scheduled.add(conversation_id)
+            self._start_workers()
+        return True
+
+    def _start_workers(self):
+        # Called with the lock held; threads start on first use
+        if self._threads:
+            return
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._worker_loop, name=f"conversation-summarizer-{i}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def _worker_loop(self):
+        while True:
+            conversation_id = self._queue.get()
+            if conversation_id is None:
+                return
+            try:
+                self.summarize(conversation_id)
+            except Exception as e:
+                with self._lock:
+                    self._failed += 1
+                logger.error(f"Failed to summarize conversation {conversation_id}: {str(e)}")
+            finally:
+                with self._lock:
+                    self._scheduled.discard(conversation_id)
+
+    def _summary_prompt(self, previous_summary, interactions):
+        limit = self.conversation_manager.context_text_max_chars
+        turns = "\n".join(
+            f"Q: {interaction['query'][:limit]}\nA: {interaction['response'][:limit]}" for interaction in interactions
+        )
+        previous = f"Summary so far:\n{previous_summary}\n\n" if previous_summary else ""
+        return (f"{previous}New part of a tutoring conversation:\n{turns}\n\n"
+                f"Update the summary of this tutoring conversation in at most {SUMMARY_MAX_WORDS} words. "
+                "Keep the topics covered, key results and anything the student struggled with. "
+                "Reply with the summary only.")
+
+    def summarize(self, conversation_id):
+        """Fold interactions that left the context window into the summary; returns True if it changed"""
+        manager = self.conversation_manager
+        info = manager.get_conversation_info(conversation_id)
+        if info is None:
+            return False
+        metadata = info["metadata"]
+        start = metadata.get("summary_upto", 0)
+        # The most recent turns are already sent verbatim with every prompt
+        end = info["interaction_count"] - manager.context_max_turns
+        if end <= start:
+            with self._lock:
+                self._skipped += 1
+            return False
+
+        interactions = manager.get_history_slice(conversation_id, start, end)
+        with span("summarize"):
+            model = self.model_registry.get_model(SUMMARY_MODEL_NAME)
+            summary = call_gemini_with_retry(model, self._summary_prompt(metadata.get("summary"), interactions))
+        if summary.startswith("Error"):
+            raise RuntimeError(summary)
+
+        manager.update_metadata(conversation_id, {
+            "summary": summary.strip()[:manager.context_max_chars],
+            "summary_upto": end,
+            "summary_updated_at": time.time(),
+        })
+        with self._lock:
+            self._completed += 1
+        logger.info(f"Updated summary of conversation {conversation_id} (first {end} interactions)")
+        return True
+
+    def get_stats(self):
+        with self._lock:
+            return {
+                "queued": self._queue.qsize(),
+                "scheduled": len(self._scheduled),
+                "workers": len(self._threads),
+                "completed": self._completed,
+                "skipped": self._skipped,
+                "dropped": self._dropped,
+                "failed": self._failed,
+            }
+
+    def stop(self, timeout=None):
+        """Stop the workers after the summaries already queued"""
+        with self._lock:
+            self._stopped = True
+            threads, self._threads = self._threads, []
+        for _ in threads:
+            self._queue.put(None)
+        for thread in threads:
+            thread.join(timeout)
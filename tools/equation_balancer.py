@@ -0,0 +1,136 @@
+import re
+import logging
+from dataclasses import dataclass
+from functools import lru_cache
+from math import gcd, lcm
+from typing import List, Optional, Tuple
+from tools.formula_parser import parse_formula
+
+logger = logging.getLogger(__name__)
+
+BALANCE_CACHE_SIZE = 512
+
+ARROW_PATTERN = re.compile(r"\s*(?:->|=>|→|⟶|=)\s*")
+PLUS_PATTERN = re.compile(r"\s*\+\s*")
+# A coefficient already written in front of a species ("2H2O", "2 H2O"); it is recomputed
+_COEFFICIENT = re.compile(r"^\d+\s*(?=[A-Z(\[])")
+# One species with an optional coefficient and state: "2H2O", "Ca(OH)2", "NaCl(aq)"
+_SPECIES = r"(?:\d+\s*)?[A-Z(\[][A-Za-z0-9()\[\]·]*"
+_SIDE = rf"{_SPECIES}(?:\s*\+\s*{_SPECIES})*"
+REACTION_PATTERN = re.compile(rf"{_SIDE}\s*(?:->|=>|→|⟶)\s*{_SIDE}")
+
+@dataclass(frozen=True)
+class BalancedEquation:
+    """Species as written (without coefficients) and their smallest integer coefficients"""
+    reactants: Tuple[str, ...]
+    products: Tuple[str, ...]
+    coefficients: Tuple[int, ...]
+
+    def __str__(self):
+        terms = [f"{n}{species}" if n != 1 else species
+                 for n, species in zip(self.coefficients, self.reactants + self.products)]
+        split = len(self.reactants)
+        return f"{' + '.join(terms[:split])} -> {' + '.join(terms[split:])}"
+
+def find_reaction(text: str) -> Optional[str]:
+    """The first reaction written with an arrow in ``text`` ("Balance H2 + O2 -> H2O" -> "H2 + O2 -> H2O")"""
+    match = REACTION_PATTERN.search(text)
+    return match.group(0) if match else None
+
+def parse_reaction(reaction: str) -> Tuple[Tuple[str, ...], Tuple[str, ...]]:
+    """Split a reaction into reactant and product species, dropping any coefficients"""
+    sides = ARROW_PATTERN.split(reaction.strip())
+    if len(sides) != 2:
+        raise ValueError(f"Expected one arrow in reaction '{reaction}'")
+    reactants, products = (
+        tuple(_COEFFICIENT.sub("", species) for species in PLUS_PATTERN.split(side.strip()) if species)
+        for side in sides
+    )
+    if not reactants or not products:
+        raise ValueError(f"Reaction '{reaction}' needs species on both sides")
+    return reactants, products
+
+def _nullspace(matrix: List[List[int]], columns: int) -> List[List[int]]:
+    """Integer basis of the nullspace of ``matrix``, one vector per free column.
+
+    Fraction-free Gauss-Jordan elimination: rows are combined by cross
+    multiplication and divided by their gcd, so the arithmetic stays exact on
+    small integers without Fraction objects.
+    """
+    rows = [row[:] for row in matrix]
+    pivots = []
+    r = 0
+    for c in range(columns):
+        pivot = next((i for i in range(r, len(rows)) if rows[i][c] != 0), None)
+        if pivot is None:
+            continue
+        rows[r], rows[pivot] = rows[pivot], rows[r]
+        lead_row = rows[r]
+        lead = lead_row[c]
+        for i in range(len(rows)):
+            factor = rows[i][c]
+            if i != r and factor != 0:
+                row = [lead * a - factor * b for a, b in zip(rows[i], lead_row)]
+                divisor = gcd(*row)
+                rows[i] = [value // divisor for value in row] if divisor > 1 else row
+        pivots.append(c)
+        r += 1
+        if r == len(rows):
+            break
+    # Each pivot row now reads lead * x[pivot] + sum(row[free] * x[free]) = 0
+    scale = lcm(*(rows[i][c] for i, c in enumerate(pivots))) if pivots else 1
+    basis = []
+    for free in (c for c in range(columns) if c not in pivots):
+        vector = [0] * columns
+        vector[free] = scale
+        for row, c in zip(rows, pivots):
+            vector[c] = -row[free] * scale // row[c]
+        basis.append(vector)
+    return basis
+
+def _balance(reaction: str) -> BalancedEquation:
+    reactants, products = parse_reaction(reaction)
+    species = reactants + products
+    counts = [parse_formula(formula) for formula in species]
+    reactant_elements = {element for count in counts[:len(reactants)] for element in count}
+    product_elements = {element for count in counts[len(reactants):] for element in count}
+    if reactant_elements != product_elements:
+        missing = sorted(reactant_elements ^ product_elements)
+        raise ValueError(f"Elements {', '.join(missing)} appear on only one side")
+    # One row per element: atoms in each species, products counted negatively
+    elements = list(dict.fromkeys(element for count in counts for element in count))
+    matrix = [[count.get(element, 0) * (1 if j < len(reactants) else -1) for j, count in enumerate(counts)]
+              for element in elements]
+    basis = _nullspace(matrix, len(species))
+    if not basis:
+        raise ValueError(f"Reaction '{reaction}' cannot be balanced")
+    if len(basis) > 1:
+        raise ValueError(f"Reaction '{reaction}' has no unique balance (independent reactions combined)")
+    coefficients = basis[0]
+    if all(n < 0 for n in coefficients):
+        coefficients = [-n for n in coefficients]
+    if any(n <= 0 for n in coefficients):
+        raise ValueError(f"Reaction '{reaction}' cannot be balanced as written")
+    divisor = gcd(*coefficients)
+    return BalancedEquation(reactants, products, tuple(n // divisor for n in coefficients))
+
+@lru_cache(maxsize=BALANCE_CACHE_SIZE)
+def balance_equation(reaction: str) -> BalancedEquation:
+    """Smallest positive integer coefficients for ``reaction``.
+
+    Builds the element-by-species count matrix and takes its nullspace with
+    exact integer arithmetic. Raises ValueError when the reaction does not
+    parse, has no positive solution, or combines independent reactions.
+    """
+    return _balance(reaction)
+
+def try_balance(text: str) -> Optional[BalancedEquation]:
+    """Balance the first reaction found in ``text``, or None"""
+    reaction = find_reaction(text)
+    if reaction is None:
+        return None
+    try:
+        return balance_equation(reaction)
+    except ValueError as e:
+        logger.info(f"Could not balance '{reaction}' locally: {str(e)}")
+        return None
@@ -1,12 +1,48 @@
-import sympy as sp
-from sympy import symbols, solve, Eq, sympify
+import os
 import re
+import time
 import logging
+from functools import lru_cache
+from typing import Tuple
+from tools.cache_utils import Cache
+from tools.metrics import metrics
+from tools.process_pool import TimeoutProcessPool
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# SymPy runs in worker processes so a pathological equation can be killed after
+# the timeout instead of pinning a server thread; 0 processes solves in-process
+SOLVE_TIMEOUT_SECONDS = float(os.getenv("EQUATION_SOLVE_TIMEOUT", "5"))
+SOLVER_PROCESSES = int(os.getenv("EQUATION_SOLVER_PROCESSES", "2"))
+SOLUTION_CACHE_TTL_SECONDS = 24 * 3600
+SOLUTION_CACHE_MAX_ENTRIES = 1000
+# Timeouts are remembered only briefly: a rerun under less load may well finish in time
+TIMEOUT_CACHE_TTL_SECONDS = 60
+CANONICAL_FORM_CACHE_SIZE = 1024
+
+# Solutions keyed by variable and canonical form, so "x^2 = 4" and "x**2 - 4 = 0" share an entry
+solution_cache = Cache(ttl_seconds=SOLUTION_CACHE_TTL_SECONDS, max_entries=SOLUTION_CACHE_MAX_ENTRIES)
+# Equations that recently timed out, with the same keys, so a repeat does not occupy a worker again
+timeout_cache = Cache(ttl_seconds=TIMEOUT_CACHE_TTL_SECONDS, max_entries=SOLUTION_CACHE_MAX_ENTRIES)
+
+def _sympy():
+    """Import SymPy on first use; it dominates import time and most requests never solve equations"""
+    import sympy
+    return sympy
+
+_solver_pool = (
+    TimeoutProcessPool(SOLVER_PROCESSES, name="equation-solver", initializer=_sympy) if SOLVER_PROCESSES > 0 else None
+)
+
+def preload():
+    """Start the solver processes (or import SymPy when solving in-process) ahead of the first equation"""
+    if _solver_pool is None:
+        _sympy()
+    else:
+        _solver_pool.start()
+
 def solve_equation(equation_str: str) -> str:
     """
     Solve mathematical equations using SymPy.
@@ -21,6 +57,76 @@ def solve_equation(equation_str: str) -> str:
     Returns:
         str: The solution(s) or an error message
     """
+    start = time.perf_counter()
+    result, outcome = _solve_equation(equation_str)
+    metrics.observe("solve_equation", time.perf_counter() - start, outcome=outcome)
+    return result
+
+def get_solver_stats():
+    """Solution cache counters and solver process usage (None when solving in-process)"""
+    return {
+        "cache": solution_cache.get_stats(),
+        "timeout_cache": timeout_cache.get_stats(),
+        "pool": _solver_pool.get_stats() if _solver_pool is not None else None,
+    }
+
+def _run(fn, *args):
+    if _solver_pool is None:
+        return fn(*args)
+    return _solver_pool.run(fn, args, timeout=SOLVE_TIMEOUT_SECONDS)
+
+@lru_cache(maxsize=CANONICAL_FORM_CACHE_SIZE)
+def _canonical_key(equation_text: str) -> str:
+    # Parsing evaluates the input too ("9**9**9**9"), so it is bounded like solving
+    return _run(_canonical_form, equation_text)
+
+def _canonical_form(equation_text: str) -> str:
+    """Parse an equation and return srepr(left - right); SymPy orders and combines the terms"""
+    sp = _sympy()
+    if '=' in equation_text:
+        # Split equation into left and right sides
+        left_side, right_side = equation_text.split('=', 1)
+        expr = sp.sympify(left_side.strip()) - sp.sympify(right_side.strip())
+    else:
+        # Assume the expression equals 0
+        expr = sp.sympify(equation_text)
+    return sp.srepr(expr)
+
+def _solve_canonical(var_name: str, canonical: str) -> str:
+    sp = _sympy()
+    var = sp.symbols(var_name)
+    solutions = sp.solve(sp.Eq(sp.sympify(canonical), 0), var)
+
+    if not solutions:
+        return "No real solutions found"
+    elif len(solutions) == 1:
+        solution = solutions[0]
+        if solution.is_real:
+            # Try to simplify and get numerical value
+            numerical_value = float(solution.evalf())
+            if solution.is_rational and solution.denominator != 1:
+                return f"{var_name} = {solution} ≈ {numerical_value:.6f}"
+            else:
+                return f"{var_name} = {solution}"
+        else:
+            return f"{var_name} = {solution}"
+    else:
+        # Multiple solutions
+        result_parts = []
+        for i, sol in enumerate(solutions, 1):
+            if sol.is_real:
+                numerical_value = float(sol.evalf())
+                if sol.is_rational and sol.denominator != 1:
+                    result_parts.append(f"{var_name}_{i} = {sol} ≈ {numerical_value:.6f}")
+                else:
+                    result_parts.append(f"{var_name}_{i} = {sol}")
+            else:
+                result_parts.append(f"{var_name}_{i} = {sol}")
+        return "Solutions:\n" + "\n".join(result_parts)
+
+def _solve_equation(equation_str: str) -> Tuple[str, str]:
+    """Return the result and its outcome: cached, solved, timeout or error"""
+    key = None
     try:
         logger.info(f"Solving equation: {equation_str}")
         
@@ -34,15 +140,16 @@ def solve_equation(equation_str: str) -> str:
         ]
         
         if any(indicator in equation_str.lower() for indicator in question_indicators):
-            return f"Error: This appears to be a question about solving equations rather than a specific equation to solve. Please provide a specific equation like 'x^2 + 3x + 2 = 0' or 'solve x^2 - 4 = 0'."
+            return f"Error: This appears to be a question about solving equations rather than a specific equation to solve. Please provide a specific equation like 'x^2 + 3x + 2 = 0' or 'solve x^2 - 4 = 0'.", "error"
         
         # Remove "solve for" instructions and extract variable if specified
         solve_pattern = r"solve for (\w+):\s*(.+)"
         match = re.search(solve_pattern, equation_str.lower())
         if match:
             var_name = match.group(1)
-            equation_str = match.group(2)
+            equation_text = match.group(2)
         else:
+            equation_text = equation_str
             # Try to detect the main variable (most common letter)
             variables = re.findall(r'[a-zA-Z]', equation_str)
             if variables:
@@ -50,51 +157,24 @@ def solve_equation(equation_str: str) -> str:
             else:
                 var_name = 'x'  # default variable
         
-        # Define the variable
-        var = symbols(var_name)
-        
-        # Parse the equation
-        if '=' in equation_str:
-            # Split equation into left and right sides
-            left_side, right_side = equation_str.split('=', 1)
-            left_expr = sympify(left_side.strip())
-            right_expr = sympify(right_side.strip())
-            equation = Eq(left_expr, right_expr)
-        else:
-            # Assume the expression equals 0
-            expr = sympify(equation_str)
-            equation = Eq(expr, 0)
-        
-        # Solve the equation
-        solutions = solve(equation, var)
-        
-        if not solutions:
-            return "No real solutions found"
-        elif len(solutions) == 1:
-            solution = solutions[0]
-            if solution.is_real:
-                # Try to simplify and get numerical value
-                numerical_value = float(solution.evalf())
-                if solution.is_rational and solution.denominator != 1:
-                    return f"{var_name} = {solution} ≈ {numerical_value:.6f}"
-                else:
-                    return f"{var_name} = {solution}"
-            else:
-                return f"{var_name} = {solution}"
-        else:
-            # Multiple solutions
-            result_parts = []
-            for i, sol in enumerate(solutions, 1):
-                if sol.is_real:
-                    numerical_value = float(sol.evalf())
-                    if sol.is_rational and sol.denominator != 1:
-                        result_parts.append(f"{var_name}_{i} = {sol} ≈ {numerical_value:.6f}")
-                    else:
-                        result_parts.append(f"{var_name}_{i} = {sol}")
-                else:
-                    result_parts.append(f"{var_name}_{i} = {sol}")
-            return "Solutions:\n" + "\n".join(result_parts)
-            
+        canonical = _canonical_key(equation_text)
+        key = f"{var_name}|{canonical}"
+        cached = solution_cache.get(key)
+        if cached is not None:
+            return cached, "cached"
+        timed_out = timeout_cache.get(key)
+        if timed_out is not None:
+            return timed_out, "timeout"
+        result = _run(_solve_canonical, var_name, canonical)
+        solution_cache.set(key, result)
+        return result, "solved"
+
+    except TimeoutError:
+        logger.warning(f"Solving equation timed out after {SOLVE_TIMEOUT_SECONDS}s: {equation_str}")
+        result = f"Error: Could not solve equation '{equation_str}' within {SOLVE_TIMEOUT_SECONDS:g} seconds."
+        if key is not None:
+            timeout_cache.set(key, result)
+        return result, "timeout"
     except Exception as e:
         logger.error(f"Error solving equation: {str(e)}")
-        return f"Error: Could not solve equation '{equation_str}'. {str(e)}"
+        return f"Error: Could not solve equation '{equation_str}'. {str(e)}", "error"
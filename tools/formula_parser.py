@@ -0,0 +1,91 @@
+import re
+from typing import Dict, List, Tuple
+from tools.periodic_table import get_periodic_table
+
+# Element, opening bracket or closing bracket with an optional count
+_TOKEN = re.compile(r"([A-Z][a-z]?)(\d*)|([(\[])|([)\]])(\d*)")
+# Hydrates and adducts: "CuSO4·5H2O", "CuSO4*5H2O", "CuSO4.5H2O"
+_ADDUCT_SEPARATOR = re.compile(r"\s*[·•*.]\s*")
+_LEADING_COEFFICIENT = re.compile(r"^(\d+)")
+_STATE_SUFFIX = re.compile(r"\s*\((?:s|l|g|aq)\)$")
+
+def parse_formula(formula: str) -> Dict[str, int]:
+    """Count atoms per element, in order of first appearance: "Ca(OH)2" -> {"Ca": 1, "O": 2, "H": 2}.
+
+    Supports nested parentheses or brackets, hydrates joined by "·", "*" or
+    "." and a trailing state such as "(aq)". Raises ValueError for anything
+    else, including unknown element symbols.
+    """
+    text = _STATE_SUFFIX.sub("", formula.strip())
+    if not text:
+        raise ValueError("Empty formula")
+    table = get_periodic_table()
+    counts: Dict[str, int] = {}
+    for part in _ADDUCT_SEPARATOR.split(text):
+        match = _LEADING_COEFFICIENT.match(part)
+        multiplier = int(match.group(1)) if match else 1
+        for symbol, count in _parse_group(part[match.end() if match else 0:], table).items():
+            counts[symbol] = counts.get(symbol, 0) + count * multiplier
+    return counts
+
+def _parse_group(text: str, table) -> Dict[str, int]:
+    stack: List[Dict[str, int]] = [{}]
+    position = 0
+    while position < len(text):
+        token = _TOKEN.match(text, position)
+        if token is None:
+            raise ValueError(f"Unexpected '{text[position]}' in formula '{text}'")
+        position = token.end()
+        symbol, count, opening, closing, group_count = token.groups()
+        if symbol:
+            if not table.is_symbol(symbol):
+                raise ValueError(f"Unknown element '{symbol}'")
+            stack[-1][symbol] = stack[-1].get(symbol, 0) + int(count or 1)
+        elif opening:
+            stack.append({})
+        else:
+            if len(stack) == 1:
+                raise ValueError(f"Unbalanced '{closing}' in formula '{text}'")
+            group = stack.pop()
+            for element, n in group.items():
+                stack[-1][element] = stack[-1].get(element, 0) + n * int(group_count or 1)
+    if len(stack) != 1:
+        raise ValueError(f"Unclosed bracket in formula '{text}'")
+    if not stack[0]:
+        raise ValueError(f"No elements in formula '{text}'")
+    return stack[0]
+
+def molar_mass(formula: str) -> float:
+    """Molar mass in g/mol"""
+    table = get_periodic_table()
+    return sum(table.mass(symbol) * count for symbol, count in parse_formula(formula).items())
+
+def composition(formula: str) -> List[Tuple[str, int, float, float]]:
+    """(symbol, atoms, grams per mole, mass percent) for each element of the formula"""
+    table = get_periodic_table()
+    counts = parse_formula(formula)
+    masses = [(symbol, count, table.mass(symbol) * count) for symbol, count in counts.items()]
+    total = sum(mass for _, _, mass in masses)
+    return [(symbol, count, mass, 100 * mass / total) for symbol, count, mass in masses]
+
+def is_compound_formula(token: str) -> bool:
+    """True for tokens that parse and read as a compound ("H2O", "NaCl", "O2").
+
+    A lone capitalized word like "I", "He" or "No" is far more often English
+    than a bare element symbol, so at least two elements or a count are required.
+    """
+    try:
+        counts = parse_formula(token)
+    except ValueError:
+        return False
+    return len(counts) > 1 or any(ch.isdigit() for ch in token)
+
+def describe_formula(formula: str) -> str:
+    """Molar mass and per-element breakdown, one line per element"""
+    parts = composition(formula)
+    total = sum(mass for _, _, mass, _ in parts)
+    lines = [f"{formula}: molar mass {total:.3f} g/mol"]
+    for symbol, count, mass, percent in parts:
+        atoms = "atom" if count == 1 else "atoms"
+        lines.append(f"  {symbol}: {count} {atoms}, {mass:.3f} g/mol ({percent:.2f}%)")
+    return "\n".join(lines)
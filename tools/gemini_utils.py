@@ -1,14 +1,46 @@
+import os
 import time
+import asyncio
 import logging
 import hashlib
-from .cache_utils import Cache
+from .cache_utils import Cache, MemoryCacheBackend, SQLiteCacheBackend
+from .single_flight import SingleFlight
+from .metrics import metrics, span
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Cache bounds keep memory flat under steady traffic with unique prompts
+CACHE_TTL_SECONDS = 3600
+CACHE_MAX_ENTRIES = 2000
+CACHE_MAX_BYTES = 64 * 1024 * 1024
+CACHE_CLEANUP_INTERVAL_SECONDS = 300
+DEFAULT_CACHE_PATH = "gemini_cache.db"
+
+def create_cache_backend():
+    """Build the response cache backend selected by the GEMINI_CACHE_BACKEND environment variable"""
+    backend = os.getenv("GEMINI_CACHE_BACKEND", "memory").lower()
+    if backend == "memory":
+        return MemoryCacheBackend()
+    if backend != "sqlite":
+        raise ValueError(f"Unknown Gemini cache backend: {backend}")
+    return SQLiteCacheBackend(os.getenv("GEMINI_CACHE_PATH", DEFAULT_CACHE_PATH))
+
 # Initialize cache with 1-hour TTL
-gemini_cache = Cache(ttl_seconds=3600)
+gemini_cache = Cache(
+    ttl_seconds=CACHE_TTL_SECONDS,
+    max_entries=CACHE_MAX_ENTRIES,
+    max_bytes=CACHE_MAX_BYTES,
+    cleanup_interval=CACHE_CLEANUP_INTERVAL_SECONDS,
+    backend=create_cache_backend(),
+)
+
+# In-flight Gemini calls keyed by cache key, for request coalescing
+gemini_flights = SingleFlight()
+
+# Delay between failed attempts
+RETRY_DELAY_SECONDS = 2
 
 def generate_cache_key(model_name: str, prompt: str) -> str:
     """Generate a unique cache key based on model name and prompt."""
@@ -22,16 +54,27 @@ def call_gemini_with_retry(model, prompt, max_retries=3):
     cache_key = generate_cache_key(model.model_name, prompt)
     
     # Check cache first
-    cached_response = gemini_cache.get(cache_key)
+    with span("gemini_cache_lookup"):
+        cached_response = gemini_cache.get(cache_key)
     if cached_response is not None:
         logger.info("Using cached response")
         return cached_response
 
+    # Concurrent identical prompts share a single API call
+    return gemini_flights.do(cache_key, lambda: _call_gemini_uncached(model, prompt, cache_key, max_retries))
+
+def _call_gemini_uncached(model, prompt, cache_key, max_retries):
+    # A previous leader may have filled the cache after our lookup
+    cached_response = gemini_cache.peek(cache_key)
+    if cached_response is not None:
+        return cached_response
+
     # If not in cache, make API call
     for attempt in range(max_retries):
         try:
             logger.info(f"Making Gemini API call - Attempt {attempt + 1}/{max_retries}")
-            response = model.generate_content(prompt).text
+            with span("gemini_attempt", model=model.model_name):
+                response = model.generate_content(prompt).text
             logger.info("Gemini API call successful")
             
             # Cache the successful response
@@ -41,11 +84,102 @@ def call_gemini_with_retry(model, prompt, max_retries=3):
         except Exception as e:
             if attempt < max_retries - 1:
                 logger.warning(f"Gemini API call failed (Attempt {attempt + 1}). Error: {str(e)}. Retrying...")
-                time.sleep(2)  # Wait before retrying
+                with span("gemini_backoff"):
+                    time.sleep(RETRY_DELAY_SECONDS)  # Wait before retrying
                 continue
             logger.error(f"All Gemini API attempts failed. Final error: {str(e)}")
             return f"Error: {str(e)}"
 
+async def call_gemini_with_retry_async(model, prompt, max_retries=3):
+    """Async variant of call_gemini_with_retry that does not block the event loop.
+
+    Cache reads and writes run in a worker thread, since the sqlite backend
+    does blocking disk I/O.
+    """
+    cache_key = generate_cache_key(model.model_name, prompt)
+
+    with span("gemini_cache_lookup"):
+        cached_response = await asyncio.to_thread(gemini_cache.get, cache_key)
+    if cached_response is not None:
+        logger.info("Using cached response")
+        return cached_response
+
+    return await gemini_flights.do_async(
+        cache_key, lambda: _call_gemini_uncached_async(model, prompt, cache_key, max_retries)
+    )
+
+async def _call_gemini_uncached_async(model, prompt, cache_key, max_retries):
+    cached_response = await asyncio.to_thread(gemini_cache.peek, cache_key)
+    if cached_response is not None:
+        return cached_response
+
+    for attempt in range(max_retries):
+        try:
+            logger.info(f"Making async Gemini API call - Attempt {attempt + 1}/{max_retries}")
+            with span("gemini_attempt", model=model.model_name):
+                response = (await model.generate_content_async(prompt)).text
+            logger.info("Gemini API call successful")
+
+            await asyncio.to_thread(gemini_cache.set, cache_key, response)
+
+            return response
+        except Exception as e:
+            if attempt < max_retries - 1:
+                logger.warning(f"Gemini API call failed (Attempt {attempt + 1}). Error: {str(e)}. Retrying...")
+                with span("gemini_backoff"):
+                    await asyncio.sleep(RETRY_DELAY_SECONDS)  # Wait before retrying without blocking other requests
+                continue
+            logger.error(f"All Gemini API attempts failed. Final error: {str(e)}")
+            return f"Error: {str(e)}"
+
+async def stream_gemini_with_retry_async(model, prompt, max_retries=3):
+    """Stream a Gemini response chunk by chunk, caching the full text at the end.
+
+    Cached responses are yielded as a single chunk. Retries only happen while
+    nothing has been yielded yet; a failure mid-stream ends the stream with an
+    error chunk. Streams are not coalesced with concurrent identical calls.
+    Like call_gemini_with_retry_async, it accesses the cache from a worker thread.
+    """
+    cache_key = generate_cache_key(model.model_name, prompt)
+
+    with span("gemini_cache_lookup"):
+        cached_response = await asyncio.to_thread(gemini_cache.get, cache_key)
+    if cached_response is not None:
+        logger.info("Using cached response")
+        yield cached_response
+        return
+
+    for attempt in range(max_retries):
+        chunks = []
+        try:
+            logger.info(f"Making streaming Gemini API call - Attempt {attempt + 1}/{max_retries}")
+            start = time.perf_counter()
+            response = await model.generate_content_async(prompt, stream=True)
+            async for chunk in response:
+                try:
+                    text = chunk.text
+                except ValueError:
+                    # Chunks without text parts (e.g. a bare finish reason)
+                    continue
+                if not chunks:
+                    # Time to first token; the rest of the stream is paced by the client
+                    metrics.observe("gemini_stream_first_chunk", time.perf_counter() - start, model=model.model_name)
+                chunks.append(text)
+                yield text
+            logger.info("Gemini streaming call successful")
+
+            await asyncio.to_thread(gemini_cache.set, cache_key, "".join(chunks))
+            return
+        except Exception as e:
+            if not chunks and attempt < max_retries - 1:
+                logger.warning(f"Gemini API call failed (Attempt {attempt + 1}). Error: {str(e)}. Retrying...")
+                with span("gemini_backoff"):
+                    await asyncio.sleep(RETRY_DELAY_SECONDS)
+                continue
+            logger.error(f"Gemini streaming call failed. Final error: {str(e)}")
+            yield f"Error: {str(e)}"
+            return
+
 def clear_gemini_cache():
     """Clear the entire Gemini response cache."""
     gemini_cache.clear()
@@ -56,4 +190,12 @@ def remove_expired_cache_entries():
 
 def get_cache_size():
     """Get the current number of entries in the cache."""
-    return gemini_cache.get_cache_size() 
\ No newline at end of file
+    return gemini_cache.get_cache_size()
+
+def get_cache_stats():
+    """Get cache usage and hit/miss/eviction counters."""
+    return gemini_cache.get_stats()
+
+def get_in_flight_stats():
+    """Get counts of in-flight, leader and coalesced Gemini calls."""
+    return gemini_flights.get_stats()
@@ -0,0 +1,166 @@
+import functools
+import math
+import threading
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, List, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds (seconds) of the latency buckets, from sub-millisecond local work to slow Gemini calls
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+STAGE_METRIC = "tutor_stage_duration_seconds"
+
+class Histogram:
+    """Fixed-bucket latency histogram; observing is one bisect and a few increments"""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self._counts = [0] * (len(self.buckets) + 1)  # last slot is +Inf
+        self._sum = 0.0
+        self._count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds: float):
+        index = bisect_left(self.buckets, seconds)
+        with self._lock:
+            self._counts[index] += 1
+            self._sum += seconds
+            self._count += 1
+
+    def snapshot(self) -> Tuple[List[Tuple[float, int]], float, int]:
+        """Return cumulative (upper_bound, count) pairs, the sum and the count"""
+        with self._lock:
+            counts, total, count = list(self._counts), self._sum, self._count
+        cumulative, running = [], 0
+        for bound, bucket_count in zip(self.buckets + (math.inf,), counts):
+            running += bucket_count
+            cumulative.append((bound, running))
+        return cumulative, total, count
+
+class _Span:
+    __slots__ = ("_histogram", "_start")
+
+    def __init__(self, histogram: Histogram):
+        self._histogram = histogram
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._histogram.observe(time.perf_counter() - self._start)
+        return False
+
+class Metrics:
+    """Per-stage latency histograms plus gauges that are only computed when scraped.
+
+    ``span(stage, **labels)`` times a block (sync or inside a coroutine) into
+    the histogram for that stage and label set. Recording only touches
+    pre-aggregated buckets, so the cost per span stays constant whether or not
+    anyone scrapes; collectors registered with ``register_collector`` run only
+    when ``render_prometheus`` is called.
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self._histograms: Dict[Tuple[str, Tuple[Tuple[str, str], ...]], Histogram] = {}
+        self._collectors: List[Callable[[], Dict]] = []
+        self._lock = threading.Lock()
+
+    def histogram(self, stage: str, **labels) -> Histogram:
+        key = (stage, tuple(sorted(labels.items())))
+        histogram = self._histograms.get(key)
+        if histogram is None:
+            with self._lock:
+                histogram = self._histograms.setdefault(key, Histogram(self.buckets))
+        return histogram
+
+    def span(self, stage: str, **labels) -> _Span:
+        """Context manager that records the duration of the enclosed block"""
+        return _Span(self.histogram(stage, **labels))
+
+    def observe(self, stage: str, seconds: float, **labels):
+        """Record a duration that was already measured by the caller"""
+        self.histogram(stage, **labels).observe(seconds)
+
+    def register_collector(self, collect: Callable[[], Dict]):
+        """Add a callback returning ``{name: (type, help, value)}`` evaluated at scrape time.
+
+        ``value`` is a number or a list of ``(labels, number)`` pairs.
+        """
+        self._collectors.append(collect)
+
+    def get_stage_stats(self) -> Dict[str, Dict]:
+        """Count, total and average milliseconds per stage, summed over labels"""
+        stats = {}
+        for (stage, _), histogram in list(self._histograms.items()):
+            _, total, count = histogram.snapshot()
+            entry = stats.setdefault(stage, {"count": 0, "total_ms": 0.0})
+            entry["count"] += count
+            entry["total_ms"] += 1000 * total
+        for entry in stats.values():
+            entry["avg_ms"] = entry["total_ms"] / entry["count"] if entry["count"] else 0.0
+        return stats
+
+    def reset(self):
+        with self._lock:
+            self._histograms.clear()
+
+    def render_prometheus(self) -> str:
+        """Render every histogram and collector in the Prometheus text exposition format"""
+        lines = [
+            f"# HELP {STAGE_METRIC} Time spent in each request processing stage",
+            f"# TYPE {STAGE_METRIC} histogram",
+        ]
+        for (stage, labels), histogram in sorted(list(self._histograms.items()), key=lambda item: item[0]):
+            base = (("stage", stage),) + labels
+            cumulative, total, count = histogram.snapshot()
+            for bound, bucket_count in cumulative:
+                le = "+Inf" if bound == math.inf else repr(bound)
+                lines.append(f"{STAGE_METRIC}_bucket{_format_labels(base + (('le', le),))} {bucket_count}")
+            lines.append(f"{STAGE_METRIC}_sum{_format_labels(base)} {total!r}")
+            lines.append(f"{STAGE_METRIC}_count{_format_labels(base)} {count}")
+
+        for collect in self._collectors:
+            try:
+                collected = collect()
+            except Exception as e:
+                logger.error(f"Metrics collector failed: {str(e)}")
+                continue
+            for name, (metric_type, help_text, value) in collected.items():
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {metric_type}")
+                samples = value if isinstance(value, list) else [({}, value)]
+                for labels, number in samples:
+                    lines.append(f"{name}{_format_labels(tuple(labels.items()))} {float(number)!r}")
+        return "\n".join(lines) + "\n"
+
+def _escape_label(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_labels(labels) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape_label(value)}"' for key, value in labels) + "}"
+
+# Shared by agents and tools; exposed at /metrics
+metrics = Metrics()
+
+def span(stage: str, **labels) -> _Span:
+    """Time a block into the shared metrics."""
+    return metrics.span(stage, **labels)
+
+def timed(stage: str, **labels):
+    """Decorator that times every call of the function into the shared metrics."""
+    def decorator(fn):
+        histogram = metrics.histogram(stage, **labels)
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with _Span(histogram):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
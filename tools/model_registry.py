@@ -0,0 +1,63 @@
+import threading
+import logging
+
+logger = logging.getLogger(__name__)
+
+class ModelRegistry:
+    """Process-wide registry that lazily creates one GenerativeModel per model name.
+
+    Agents and tools share the models instead of building their own, so the
+    API key is configured once and every user of a model name reuses the same
+    instance and the client/channel it holds. ``google.generativeai`` is only
+    imported when the first model is created, which keeps it off the startup
+    path.
+    """
+
+    def __init__(self):
+        self._models = {}
+        self._lock = threading.Lock()
+        self._api_key = None
+        self._configured = False
+
+    def configure(self, api_key):
+        """Set the Gemini API key; applied when the first model is created"""
+        with self._lock:
+            if api_key == self._api_key:
+                return
+            self._api_key = api_key
+            self._configured = False
+            # Models built with the previous key hold stale clients
+            self._models.clear()
+
+    def get_model(self, model_name):
+        """Return the shared model for ``model_name``, creating it on first use"""
+        model = self._models.get(model_name)
+        if model is not None:
+            return model
+        with self._lock:
+            model = self._models.get(model_name)
+            if model is None:
+                import google.generativeai as genai
+                if not self._configured:
+                    genai.configure(api_key=self._api_key)
+                    self._configured = True
+                    logger.info("Configured Gemini API key for model registry")
+                logger.info(f"Creating shared Gemini model: {model_name}")
+                model = genai.GenerativeModel(model_name)
+                self._models[model_name] = model
+            return model
+
+    def set_model(self, model_name, model):
+        """Register a model instance for ``model_name`` (e.g. a stub in tests or benchmarks)"""
+        with self._lock:
+            self._models[model_name] = model
+
+    def model_names(self):
+        return sorted(self._models)
+
+# Shared by the tutor, sub-agents and tools unless another registry is injected
+default_registry = ModelRegistry()
+
+def get_model(model_name):
+    """Get a shared model from the default registry."""
+    return default_registry.get_model(model_name)
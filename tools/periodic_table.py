@@ -0,0 +1,89 @@
+import os
+import re
+import json
+import logging
+from array import array
+from functools import lru_cache
+from typing import Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+PERIODIC_TABLE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "periodic_table.json")
+
+# Other spellings accepted for element names
+NAME_ALIASES = {"aluminum": "Al", "cesium": "Cs", "sulphur": "S"}
+
+class PeriodicTable:
+    """The 118 elements as parallel arrays indexed by atomic number - 1.
+
+    Symbols and names (case-insensitive, including ``NAME_ALIASES``) map to
+    that index, so every lookup is a dict hit and an array read.
+    """
+
+    def __init__(self, path: str = PERIODIC_TABLE_PATH):
+        with open(path, "r", encoding="utf-8") as file:
+            data = json.load(file)
+        self.symbols: Tuple[str, ...] = tuple(data["symbol"])
+        self.names: Tuple[str, ...] = tuple(data["name"])
+        self.masses = array("d", data["atomic_mass"])
+        self.categories: Tuple[str, ...] = tuple(data["category"])
+        self.periods = array("b", data["period"])
+        # 0 for the lanthanides and actinides, which have no group number
+        self.groups = array("b", [group or 0 for group in data["group"]])
+        self.configurations: Tuple[str, ...] = tuple(data["electron_configuration"])
+        self._by_symbol = {symbol: i for i, symbol in enumerate(self.symbols)}
+        self._by_name = {name.lower(): i for i, name in enumerate(self.names)}
+        for alias, symbol in NAME_ALIASES.items():
+            self._by_name[alias] = self._by_symbol[symbol]
+        names = sorted(self._by_name, key=len, reverse=True)
+        self._name_pattern = re.compile(r"\b(?:" + "|".join(names) + r")\b")
+        logger.info(f"Loaded {len(self.symbols)} elements from {path}")
+
+    def index(self, key) -> Optional[int]:
+        """Array index for an atomic number, symbol ("Fe") or name ("iron"), or None"""
+        if isinstance(key, int):
+            return key - 1 if 1 <= key <= len(self.symbols) else None
+        key = key.strip()
+        if key in self._by_symbol:
+            return self._by_symbol[key]
+        return self._by_name.get(key.lower())
+
+    def is_symbol(self, symbol: str) -> bool:
+        return symbol in self._by_symbol
+
+    def mass(self, symbol: str) -> float:
+        return self.masses[self._by_symbol[symbol]]
+
+    def element(self, key) -> Optional[dict]:
+        i = self.index(key)
+        if i is None:
+            return None
+        return {
+            "atomic_number": i + 1,
+            "symbol": self.symbols[i],
+            "name": self.names[i],
+            "atomic_mass": self.masses[i],
+            "category": self.categories[i],
+            "period": self.periods[i],
+            "group": self.groups[i] or None,
+            "electron_configuration": self.configurations[i],
+        }
+
+    def find_in_text(self, text: str) -> Tuple[str, ...]:
+        """Symbols of the elements mentioned by name in ``text``, in order of first mention"""
+        matches = self._name_pattern.findall(text.lower())
+        return tuple(dict.fromkeys(self.symbols[self._by_name[name]] for name in matches))
+
+@lru_cache(maxsize=1)
+def get_periodic_table() -> PeriodicTable:
+    """The bundled periodic table, loaded on first use"""
+    return PeriodicTable()
+
+def get_element(key) -> Optional[dict]:
+    return get_periodic_table().element(key)
+
+def format_element(element: dict) -> str:
+    group = f", group {element['group']}" if element["group"] else ""
+    return (f"{element['name']} ({element['symbol']}): atomic number {element['atomic_number']}, "
+            f"atomic mass {element['atomic_mass']:g} u, {element['category']}, period {element['period']}{group}, "
+            f"electron configuration {element['electron_configuration']}")
@@ -0,0 +1,635 @@
+"""Numeric simulation of textbook mechanics scenarios.
+
+Every scenario works on a batch: parameters are broadcast to 1-D arrays and
+integrated together, with the state held as a ``(components, batch)`` array,
+so one call can evaluate a single case or a whole grid of them. Two
+integrators are available: fixed-step RK4 and adaptive Dormand-Prince 5(4)
+with a step size per batch member. Events (impact, apex) are located on the
+cubic Hermite interpolant of the step in which they occur.
+"""
+import math
+import time
+from functools import partial
+from typing import Callable, Dict, Optional, Tuple
+import numpy as np
+
+STANDARD_GRAVITY = 9.81
+METHODS = ("adaptive", "fixed")
+FIXED_STEPS_PER_PERIOD = 100
+FIXED_STEPS_PER_FLIGHT = 200
+ADAPTIVE_RTOL = 1e-6
+ADAPTIVE_ATOL = 1e-9
+MAX_STEPS = 100_000
+# Drag stiffness (velocity relaxation rate times the flight time) beyond which explicit integration
+# would need more steps than a request can afford
+MAX_DRAG_STIFFNESS = 20_000
+# Largest h * rate of a fixed step with drag, well inside RK4's stability limit of about 2.8
+FIXED_STEP_RATE = 1.0
+MAX_TRAJECTORY_POINTS = 1000
+MAX_SWEEP_AXES = 2
+MAX_SWEEP_POINTS = 250_000
+
+# Parameter defaults per scenario (SI units, angles in degrees)
+SCENARIOS: Dict[str, Dict[str, float]] = {
+    "projectile": {"speed": 20.0, "angle": 45.0, "height": 0.0, "mass": 1.0, "drag": 0.0, "g": STANDARD_GRAVITY},
+    "free_fall": {"height": 10.0, "mass": 1.0, "drag": 0.0, "g": STANDARD_GRAVITY},
+    "pendulum": {"length": 1.0, "amplitude": 10.0, "mass": 1.0, "damping": 0.0, "periods": 3.0,
+                 "g": STANDARD_GRAVITY},
+    "spring": {"mass": 1.0, "stiffness": 100.0, "amplitude": 0.1, "damping": 0.0, "periods": 3.0},
+    "collision": {"mass1": 1.0, "velocity1": 2.0, "mass2": 1.0, "velocity2": 0.0, "restitution": 1.0},
+}
+# Parameters that must be strictly positive
+POSITIVE_PARAMETERS = {"mass", "mass1", "mass2", "length", "stiffness", "g", "periods"}
+NON_NEGATIVE_PARAMETERS = {"height", "drag", "damping", "speed", "amplitude"}
+# Largest magnitude accepted per parameter; beyond these the scenarios stop being textbook
+# mechanics and the integration cost grows without bound (e.g. with the number of periods)
+MAX_PARAMETER_VALUES = {
+    "speed": 10_000.0, "angle": 90.0, "height": 100_000.0, "mass": 1e6, "drag": 100.0, "g": 1000.0,
+    "length": 1000.0, "amplitude": 180.0, "damping": 100.0, "stiffness": 1e7, "periods": 100.0,
+    "mass1": 1e6, "velocity1": 10_000.0, "mass2": 1e6, "velocity2": 10_000.0, "restitution": 1.0,
+}
+SCENARIO_MAX_PARAMETER_VALUES = {"spring": {"amplitude": 100.0, "damping": 1e6}}
+# Integration steps (grid points times steps per point) a sweep may take
+MAX_SWEEP_STEPS = 20_000_000
+
+UNITS = {
+    "speed": "m/s", "angle": "deg", "height": "m", "mass": "kg", "drag": "kg/m", "g": "m/s^2",
+    "length": "m", "amplitude": "deg", "damping": "1/s", "stiffness": "N/m", "periods": "",
+    "mass1": "kg", "velocity1": "m/s", "mass2": "kg", "velocity2": "m/s", "restitution": "",
+    "time_of_flight": "s", "range": "m", "max_height": "m", "impact_speed": "m/s", "impact_angle": "deg",
+    "initial_kinetic_energy": "J", "initial_potential_energy": "J", "impact_kinetic_energy": "J",
+    "energy_lost_to_drag": "J", "terminal_velocity": "m/s", "period": "s", "small_angle_period": "s",
+    "frequency": "Hz", "angular_frequency": "rad/s", "max_speed": "m/s", "total_energy": "J",
+    "damping_ratio": "", "final_amplitude": "deg", "energy_lost": "J", "simulated_time": "s",
+    "final_velocity1": "m/s", "final_velocity2": "m/s", "momentum": "kg m/s",
+    "kinetic_energy_before": "J", "kinetic_energy_after": "J",
+}
+# A spring's amplitude and damping are a length and N s/m, not the pendulum's degrees and 1/s
+SCENARIO_UNITS = {"spring": {"amplitude": "m", "damping": "N s/m", "final_amplitude": "m"}}
+
+def unit(scenario: str, name: str) -> str:
+    return SCENARIO_UNITS.get(scenario, {}).get(name, UNITS.get(name, ""))
+
+Derivative = Callable[[np.ndarray, np.ndarray], np.ndarray]
+
+# Dormand-Prince 5(4) tableau
+_DP_C = (0.0, 1 / 5, 3 / 10, 4 / 5, 8 / 9, 1.0, 1.0)
+_DP_A = tuple(np.array(row) for row in (
+    (),
+    (1 / 5,),
+    (3 / 40, 9 / 40),
+    (44 / 45, -56 / 15, 32 / 9),
+    (19372 / 6561, -25360 / 2187, 64448 / 6561, -212 / 729),
+    (9017 / 3168, -355 / 33, 46732 / 5247, 49 / 176, -5103 / 18656),
+    (35 / 384, 0.0, 500 / 1113, 125 / 192, -2187 / 6784, 11 / 84),
+))
+# Fifth-order weights minus the embedded fourth-order ones
+_DP_E = np.array((71 / 57600, 0.0, -71 / 16695, 71 / 1920, -17253 / 339200, 22 / 525, -1 / 40))
+
+class Integration:
+    """Final state of each batch member and the events it crossed.
+
+    ``event_times[name]`` and ``event_states[name]`` hold the first time the
+    event's component fell from positive to zero or below (NaN if it never
+    did). ``times``/``states`` hold every accepted step when recording.
+    """
+
+    def __init__(self, t, y, event_times, event_states, steps, times=None, states=None):
+        self.t = t
+        self.y = y
+        self.event_times = event_times
+        self.event_states = event_states
+        self.steps = steps
+        self.times = times
+        self.states = states
+
+def _hermite(y0, y1, f0, f1, h, s):
+    """Cubic Hermite interpolant of one step at fraction ``s`` (broadcast over the batch)"""
+    s2, s3 = s * s, s * s * s
+    return ((2 * s3 - 3 * s2 + 1) * y0 + (s3 - 2 * s2 + s) * h * f0
+            + (-2 * s3 + 3 * s2) * y1 + (s3 - s2) * h * f1)
+
+def _hermite_slope(y0, y1, f0, f1, h, s):
+    s2 = s * s
+    return ((6 * s2 - 6 * s) * y0 + (3 * s2 - 4 * s + 1) * h * f0
+            + (-6 * s2 + 6 * s) * y1 + (3 * s2 - 2 * s) * h * f1) / h
+
+class _EventTracker:
+    def __init__(self, events: Dict[str, int], terminal: Optional[str], dim: int, n: int):
+        self.events = events
+        self.terminal = terminal
+        self.times = {name: np.full(n, np.nan) for name in events}
+        self.states = {name: np.full((dim, n), np.nan) for name in events}
+
+    def update(self, t, h, y0, y1, f0, f1, mask):
+        """Record events crossed during the step from ``y0`` to ``y1`` by the members in ``mask``"""
+        for name, component in self.events.items():
+            crossed = mask & np.isnan(self.times[name]) & (y0[component] > 0) & (y1[component] <= 0)
+            if not crossed.any():
+                continue
+            idx = np.nonzero(crossed)[0]
+            a, b = y0[:, idx], y1[:, idx]
+            fa, fb, hh = f0[:, idx], f1[:, idx], h[idx]
+            # Secant start, then Newton on the Hermite interpolant of the event component
+            s = a[component] / (a[component] - b[component])
+            for _ in range(4):
+                value = _hermite(a[component], b[component], fa[component], fb[component], hh, s)
+                slope = _hermite_slope(a[component], b[component], fa[component], fb[component], hh, s) * hh
+                s = np.clip(s - value / np.where(slope == 0, 1.0, slope), 0.0, 1.0)
+            self.times[name][idx] = t[idx] + s * hh
+            self.states[name][:, idx] = _hermite(a, b, fa, fb, hh, s)
+
+    def stopped(self):
+        if self.terminal is None:
+            return None
+        return ~np.isnan(self.times[self.terminal])
+
+def integrate_fixed(derivative: Derivative, y0: np.ndarray, t_end, steps: int,
+                    events: Optional[Dict[str, int]] = None, terminal: Optional[str] = None,
+                    record: bool = False, deadline: Optional[float] = None) -> Integration:
+    """Classic RK4 with ``steps`` equal steps per member from 0 to ``t_end``.
+
+    Raises TimeoutError once ``time.perf_counter()`` passes ``deadline``.
+    """
+    y = np.array(y0, dtype=float)
+    dim, n = y.shape
+    t_end = np.broadcast_to(np.asarray(t_end, dtype=float), (n,))
+    h = t_end / steps
+    t = np.zeros(n)
+    tracker = _EventTracker(events or {}, terminal, dim, n)
+    times, states = ([t.copy()], [y.copy()]) if record else (None, None)
+    f = derivative(t, y)
+    taken = 0
+    for taken in range(1, steps + 1):
+        _check_deadline(deadline, taken)
+        k2 = derivative(t + h / 2, y + h / 2 * f)
+        k3 = derivative(t + h / 2, y + h / 2 * k2)
+        k4 = derivative(t + h, y + h * k3)
+        y_new = y + h / 6 * (f + 2 * k2 + 2 * k3 + k4)
+        f_new = derivative(t + h, y_new)
+        active = np.ones(n, dtype=bool) if terminal is None else ~tracker.stopped()
+        tracker.update(t, h, y, y_new, f, f_new, active)
+        t, y, f = t + h, y_new, f_new
+        if record:
+            times.append(t.copy())
+            states.append(y.copy())
+        if terminal is not None and tracker.stopped().all():
+            break
+    return Integration(t, y, tracker.times, tracker.states, taken,
+                       np.array(times) if record else None, np.array(states) if record else None)
+
+def integrate_adaptive(derivative: Derivative, y0: np.ndarray, t_end, rtol: float = ADAPTIVE_RTOL,
+                       atol: float = ADAPTIVE_ATOL, events: Optional[Dict[str, int]] = None,
+                       terminal: Optional[str] = None, record: bool = False,
+                       deadline: Optional[float] = None) -> Integration:
+    """Dormand-Prince 5(4) with error control and a separate step size for each member.
+
+    Raises RuntimeError after MAX_STEPS steps and TimeoutError once
+    ``time.perf_counter()`` passes ``deadline``.
+    """
+    y = np.array(y0, dtype=float)
+    dim, n = y.shape
+    t_end = np.broadcast_to(np.asarray(t_end, dtype=float), (n,))
+    t = np.zeros(n)
+    done = t_end <= 0
+    tracker = _EventTracker(events or {}, terminal, dim, n)
+    times, states = ([t.copy()], [y.copy()]) if record else (None, None)
+    f = derivative(t, y)
+    h = _initial_step(y, f, t_end, rtol, atol)
+    steps = 0
+    while not done.all():
+        if steps >= MAX_STEPS:
+            raise RuntimeError(f"Integration did not finish within {MAX_STEPS} steps")
+        steps += 1
+        _check_deadline(deadline, steps)
+        h = np.where(done, 0.0, np.minimum(h, t_end - t))
+        # Stage derivatives stacked as rows so each combination is one matrix product
+        k = np.empty((7, dim * n))
+        k[0] = f.ravel()
+        for i in range(1, 7):
+            increment = (_DP_A[i] @ k[:i]).reshape(dim, n)
+            k[i] = derivative(t + _DP_C[i] * h, y + h * increment).ravel()
+        # The last stage is evaluated at the fifth-order solution, so it is also f(t + h)
+        y_new = y + h * (_DP_A[6] @ k[:6]).reshape(dim, n)
+        f_new = k[6].reshape(dim, n)
+        error = h * (_DP_E @ k).reshape(dim, n)
+        scale = atol + rtol * np.maximum(np.abs(y), np.abs(y_new))
+        with np.errstate(over="ignore", invalid="ignore"):
+            error_norm = np.sqrt(np.mean((error / scale) ** 2, axis=0))
+        # A step that overflowed is rejected and retried at the smallest allowed fraction
+        error_norm = np.where(np.isfinite(error_norm), error_norm, np.inf)
+        accept = ~done & (error_norm <= 1)
+        tracker.update(t, h, y, y_new, f, f_new, accept)
+        t = np.where(accept, t + h, t)
+        y = np.where(accept, y_new, y)
+        f = np.where(accept, f_new, f)
+        h = h * np.clip(0.9 * np.maximum(error_norm, 1e-10) ** -0.2, 0.2, 5.0)
+        done = done | (t >= t_end * (1 - 1e-12))
+        stopped = tracker.stopped()
+        if stopped is not None:
+            done = done | stopped
+        if record and accept.any():
+            times.append(t.copy())
+            states.append(y.copy())
+    return Integration(t, y, tracker.times, tracker.states, steps,
+                       np.array(times) if record else None, np.array(states) if record else None)
+
+def _initial_step(y, f, t_end, rtol, atol):
+    """Starting step per member: the time for the state to change by 1% of its scaled size
+    (after Hairer, Norsett and Wanner), never more than 1% of the span"""
+    scale = atol + rtol * np.abs(y)
+    size = np.sqrt(np.mean((y / scale) ** 2, axis=0))
+    rate = np.sqrt(np.mean((f / scale) ** 2, axis=0))
+    guess = np.where((size < 1e-5) | (rate < 1e-5), 1e-6, 0.01 * size / np.where(rate > 0, rate, 1.0))
+    return np.minimum(guess, t_end / 100)
+
+def _check_deadline(deadline, steps):
+    if deadline is not None and time.perf_counter() > deadline:
+        raise TimeoutError(f"Integration ran out of time after {steps} steps")
+
+def _integrate(method, derivative, y0, t_end, fixed_steps, **kwargs) -> Integration:
+    if method == "fixed":
+        return integrate_fixed(derivative, y0, t_end, fixed_steps, **kwargs)
+    return integrate_adaptive(derivative, y0, t_end, **kwargs)
+
+def _trajectory(integration: Integration, end: float, points: int,
+                columns: Dict[str, Tuple[int, float]]) -> Dict[str, list]:
+    """Resample the recorded steps of a single run onto ``points`` equal times up to ``end``.
+
+    ``columns`` maps each output name to a state component and a scale factor.
+    """
+    times = integration.times[:, 0]
+    grid = np.linspace(0.0, end, points)
+    trajectory = {"t": grid.tolist()}
+    for name, (component, scale) in columns.items():
+        trajectory[name] = (scale * np.interp(grid, times, integration.states[:, component, 0])).tolist()
+    return trajectory
+
+def _flight_time_bound(vy, height, g, drag_per_mass):
+    """Upper bound on the flight time with quadratic drag: drag-free ascent, then a descent from the
+    apex that is never slower than falling at terminal velocity after a drag-free drop. The apex is
+    at most that of a vertical launch with the same vertical speed, log(1 + k vy^2 / g) / 2k."""
+    rise = np.maximum(vy, 0) ** 2
+    with np.errstate(divide="ignore", invalid="ignore"):
+        drag_rise = np.where(drag_per_mass > 0, np.log1p(drag_per_mass * rise / g) / (2 * drag_per_mass), np.inf)
+    apex = height + np.minimum(rise / (2 * g), drag_rise)
+    terminal = np.sqrt(g / np.where(drag_per_mass > 0, drag_per_mass, np.inf))
+    descent = np.sqrt(2 * apex / g) + np.where(drag_per_mass > 0, apex / np.where(terminal > 0, terminal, 1), 0)
+    return np.maximum(vy, 0) / g + descent + 1e-9
+
+def _drag_steps(bound, g, drag_per_mass, speed, method):
+    """Fixed steps for a flight with drag, or ValueError when the drag is too stiff to integrate.
+
+    The velocity relaxes at the rate 2 k |v|: 2 sqrt(g k) near terminal
+    velocity and 2 k v0 at launch. Explicit steps much longer than its inverse
+    are unstable, so light objects with strong drag would need an unaffordable
+    number of steps. Adaptive steps only have to resolve the launch transient
+    briefly; fixed steps are sized for the fastest rate throughout.
+    """
+    rate = 2 * np.sqrt(g * drag_per_mass)
+    if method == "fixed":
+        rate = np.maximum(rate, 2 * drag_per_mass * speed)
+    stiffness = float(np.max(bound * rate))
+    if stiffness > MAX_DRAG_STIFFNESS:
+        hint = " with fixed steps; try the adaptive method" if method == "fixed" else ""
+        raise ValueError(f"Drag is too strong for this flight to be simulated numerically{hint} "
+                         f"(stiffness {stiffness:.3g}, limit {MAX_DRAG_STIFFNESS})")
+    if method == "fixed":
+        return max(FIXED_STEPS_PER_FLIGHT, math.ceil(stiffness / FIXED_STEP_RATE))
+    return FIXED_STEPS_PER_FLIGHT
+
+def _projectile(p, method, points, deadline=None):
+    g, mass, drag, height = p["g"], p["mass"], p["drag"], p["height"]
+    angle = np.radians(p["angle"])
+    vx0, vy0 = p["speed"] * np.cos(angle), p["speed"] * np.sin(angle)
+    q = {
+        "initial_kinetic_energy": 0.5 * mass * p["speed"] ** 2,
+        "initial_potential_energy": mass * g * height,
+    }
+    trajectory = None
+    if not drag.any() and not points:
+        # Without drag the path is a parabola and every quantity has a closed form
+        used = "analytic"
+        flight = (vy0 + np.sqrt(vy0 ** 2 + 2 * g * height)) / g
+        q["time_of_flight"] = flight
+        q["range"] = vx0 * flight
+        q["max_height"] = height + np.maximum(vy0, 0) ** 2 / (2 * g)
+        vx_impact, vy_impact = vx0, vy0 - g * flight
+        no_drag_loss = np.zeros_like(flight)
+    else:
+        used = method
+        drag_per_mass = drag / mass
+
+        def derivative(t, y):
+            speed = np.hypot(y[2], y[3])
+            return np.array([y[2], y[3], -drag_per_mass * speed * y[2], -g - drag_per_mass * speed * y[3]])
+
+        # Lifted off the ground so that a launch from height 0 is not already an impact
+        y0 = np.array([np.zeros_like(vx0), np.maximum(height, 1e-12), vx0, vy0])
+        bound = _flight_time_bound(vy0, height, g, drag_per_mass)
+        run = _integrate(method, derivative, y0, bound, _drag_steps(bound, g, drag_per_mass, p["speed"], method),
+                         events={"apex": 3, "impact": 1}, terminal="impact", record=bool(points), deadline=deadline)
+        impact = run.event_states["impact"]
+        apex = np.where(np.isnan(run.event_times["apex"]), height, run.event_states["apex"][1])
+        q["time_of_flight"] = run.event_times["impact"]
+        q["range"] = impact[0]
+        q["max_height"] = np.maximum(apex, height)
+        vx_impact, vy_impact = impact[2], impact[3]
+        no_drag_loss = None
+        if points:
+            trajectory = _trajectory(run, float(q["time_of_flight"][0]), points, {"x": (0, 1.0), "y": (1, 1.0)})
+    impact_speed = np.hypot(vx_impact, vy_impact)
+    q["impact_speed"] = impact_speed
+    q["impact_angle"] = np.degrees(np.arctan2(-vy_impact, vx_impact))
+    q["impact_kinetic_energy"] = 0.5 * mass * impact_speed ** 2
+    q["energy_lost_to_drag"] = (
+        q["initial_kinetic_energy"] + q["initial_potential_energy"] - q["impact_kinetic_energy"]
+        if no_drag_loss is None else no_drag_loss  # the closed form conserves energy up to rounding
+    )
+    return q, trajectory, used
+
+def _free_fall(p, method, points, deadline=None):
+    g, mass, drag, height = p["g"], p["mass"], p["drag"], p["height"]
+    q = {"initial_potential_energy": mass * g * height}
+    with np.errstate(divide="ignore"):
+        q["terminal_velocity"] = np.sqrt(mass * g / drag)
+    trajectory = None
+    if not drag.any() and not points:
+        used = "analytic"
+        q["time_of_flight"] = np.sqrt(2 * height / g)
+        impact_speed = np.sqrt(2 * g * height)
+        no_drag_loss = np.zeros_like(height)
+    else:
+        used = method
+        drag_per_mass = drag / mass
+
+        def derivative(t, y):
+            # Height and upward velocity; drag opposes the (downward) motion
+            return np.array([y[1], -g - drag_per_mass * y[1] * np.abs(y[1])])
+
+        y0 = np.array([np.maximum(height, 1e-12), np.zeros_like(height)])
+        bound = _flight_time_bound(np.zeros_like(height), height, g, drag_per_mass)
+        run = _integrate(method, derivative, y0, bound, _drag_steps(bound, g, drag_per_mass, 0.0, method),
+                         events={"impact": 0}, terminal="impact", record=bool(points), deadline=deadline)
+        q["time_of_flight"] = run.event_times["impact"]
+        impact_speed = np.abs(run.event_states["impact"][1])
+        no_drag_loss = None
+        if points:
+            trajectory = _trajectory(run, float(q["time_of_flight"][0]), points, {"height": (0, 1.0), "velocity": (1, 1.0)})
+    q["impact_speed"] = impact_speed
+    q["impact_kinetic_energy"] = 0.5 * mass * impact_speed ** 2
+    q["energy_lost_to_drag"] = (q["initial_potential_energy"] - q["impact_kinetic_energy"]
+                                if no_drag_loss is None else no_drag_loss)
+    return q, trajectory, used
+
+def _complete_elliptic_k(k):
+    """K(k) by the arithmetic-geometric mean, vectorized"""
+    a, b = np.ones_like(k), np.sqrt(1 - k * k)
+    for _ in range(8):
+        a, b = (a + b) / 2, np.sqrt(a * b)
+    return np.pi / (2 * a)
+
+def _pendulum(p, method, points, deadline=None):
+    g, length, mass, damping = p["g"], p["length"], p["mass"], p["damping"]
+    theta0 = np.radians(p["amplitude"])
+    omega0 = np.sqrt(g / length)
+    q = {
+        # Exact large-amplitude period of the undamped pendulum
+        "period": 4 / omega0 * _complete_elliptic_k(np.sin(theta0 / 2)),
+        "small_angle_period": 2 * np.pi / omega0,
+        "max_speed": np.sqrt(2 * g * length * (1 - np.cos(theta0))),
+        "max_height": length * (1 - np.cos(theta0)),
+        "total_energy": mass * g * length * (1 - np.cos(theta0)),
+    }
+    q["frequency"] = 1 / q["period"]
+    q["simulated_time"] = p["periods"] * q["period"]
+
+    if not damping.any() and not points:
+        # Undamped: energy is conserved, so there is nothing left to integrate
+        q["final_amplitude"] = p["amplitude"]
+        q["energy_lost"] = np.zeros_like(theta0)
+        return q, None, "analytic"
+
+    def derivative(t, y):
+        return np.array([y[1], -omega0 ** 2 * np.sin(y[0]) - damping * y[1]])
+
+    run = _integrate(method, derivative, np.array([theta0, np.zeros_like(theta0)]), q["simulated_time"],
+                     int(FIXED_STEPS_PER_PERIOD * np.max(p["periods"])), record=bool(points), deadline=deadline)
+    theta, omega = run.y
+    energy = mass * length * (0.5 * length * omega ** 2 + g * (1 - np.cos(theta)))
+    q["final_amplitude"] = np.degrees(np.arccos(np.clip(1 - energy / (mass * g * length), -1, 1)))
+    q["energy_lost"] = q["total_energy"] - energy
+    trajectory = _trajectory(run, float(q["simulated_time"][0]), points,
+                             {"angle": (0, 180 / math.pi), "angular_velocity": (1, 1.0)}) if points else None
+    return q, trajectory, method
+
+def _spring(p, method, points, deadline=None):
+    mass, stiffness, amplitude, damping = p["mass"], p["stiffness"], p["amplitude"], p["damping"]
+    omega0 = np.sqrt(stiffness / mass)
+    zeta = damping / (2 * np.sqrt(stiffness * mass))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        # Damped oscillation frequency; NaN when critically damped or overdamped (no oscillation)
+        omega_d = np.where(zeta < 1, omega0 * np.sqrt(np.abs(1 - zeta ** 2)), np.nan)
+        period = 2 * np.pi / omega_d
+    q = {
+        "angular_frequency": omega_d,
+        "period": period,
+        "frequency": 1 / period,
+        "damping_ratio": zeta,
+        "max_speed": omega0 * amplitude,
+        "total_energy": 0.5 * stiffness * amplitude ** 2,
+        "simulated_time": p["periods"] * 2 * np.pi / omega0,
+    }
+
+    if not damping.any() and not points:
+        q["final_amplitude"] = amplitude
+        q["energy_lost"] = np.zeros_like(amplitude)
+        return q, None, "analytic"
+
+    def derivative(t, y):
+        return np.array([y[1], -(stiffness * y[0] + damping * y[1]) / mass])
+
+    run = _integrate(method, derivative, np.array([amplitude, np.zeros_like(amplitude)]), q["simulated_time"],
+                     int(FIXED_STEPS_PER_PERIOD * np.max(p["periods"])), record=bool(points), deadline=deadline)
+    x, v = run.y
+    energy = 0.5 * stiffness * x ** 2 + 0.5 * mass * v ** 2
+    q["final_amplitude"] = np.sqrt(2 * energy / stiffness)
+    q["energy_lost"] = q["total_energy"] - energy
+    trajectory = _trajectory(run, float(q["simulated_time"][0]), points,
+                             {"position": (0, 1.0), "velocity": (1, 1.0)}) if points else None
+    return q, trajectory, method
+
+def _collision(p, method, points, deadline=None):
+    m1, v1, m2, v2, e = p["mass1"], p["velocity1"], p["mass2"], p["velocity2"], p["restitution"]
+    total = m1 + m2
+    # Body 1 starts behind body 2, so they only meet when it is faster
+    approach = v1 > v2
+    u1 = np.where(approach, (m1 * v1 + m2 * v2 + m2 * e * (v2 - v1)) / total, v1)
+    u2 = np.where(approach, (m1 * v1 + m2 * v2 + m1 * e * (v1 - v2)) / total, v2)
+    before = 0.5 * m1 * v1 ** 2 + 0.5 * m2 * v2 ** 2
+    after = 0.5 * m1 * u1 ** 2 + 0.5 * m2 * u2 ** 2
+    q = {
+        "final_velocity1": u1,
+        "final_velocity2": u2,
+        "momentum": m1 * v1 + m2 * v2,
+        "kinetic_energy_before": before,
+        "kinetic_energy_after": after,
+        "energy_lost": before - after,
+    }
+    return q, None, "analytic"
+
+_SCENARIO_FUNCTIONS = {
+    "projectile": _projectile,
+    "free_fall": _free_fall,
+    "pendulum": _pendulum,
+    "spring": _spring,
+    "collision": _collision,
+}
+
+def resolve_parameters(scenario: str, params: Optional[Dict[str, float]] = None) -> Dict[str, float]:
+    """Defaults for ``scenario`` overridden by ``params``; raises ValueError for unknown names"""
+    if scenario not in SCENARIOS:
+        raise ValueError(f"Unknown scenario '{scenario}'. Available: {', '.join(SCENARIOS)}")
+    unknown = set(params or {}) - set(SCENARIOS[scenario])
+    if unknown:
+        raise ValueError(f"Unknown parameters for {scenario}: {', '.join(sorted(unknown))}")
+    return {**SCENARIOS[scenario], **(params or {})}
+
+def max_value(scenario: str, name: str) -> float:
+    return SCENARIO_MAX_PARAMETER_VALUES.get(scenario, {}).get(name, MAX_PARAMETER_VALUES[name])
+
+def _validate(scenario: str, flat: Dict[str, np.ndarray]):
+    for name, values in flat.items():
+        if not np.all(np.isfinite(values)):
+            raise ValueError(f"Parameter '{name}' must be finite")
+        if name in POSITIVE_PARAMETERS and np.any(values <= 0):
+            raise ValueError(f"Parameter '{name}' must be positive")
+        if name in NON_NEGATIVE_PARAMETERS and np.any(values < 0):
+            raise ValueError(f"Parameter '{name}' must not be negative")
+        limit = max_value(scenario, name)
+        if np.any(np.abs(values) > limit):
+            raise ValueError(f"Parameter '{name}' must be at most {limit:g} in magnitude")
+
+def _steps_per_member(scenario: str, flat: Dict[str, np.ndarray], method: str) -> int:
+    """Rough integration steps per batch member, for budgeting sweeps"""
+    if scenario in ("pendulum", "spring"):
+        if method == "adaptive" and not flat["damping"].any():
+            return 1
+        return int(FIXED_STEPS_PER_PERIOD * np.max(flat["periods"]))
+    if scenario in ("projectile", "free_fall") and flat["drag"].any():
+        return FIXED_STEPS_PER_FLIGHT
+    return 1
+
+def run_batch(scenario: str, params: Dict[str, object], method: str = "adaptive",
+              trajectory_points: int = 0,
+              timeout: Optional[float] = None) -> Tuple[Dict[str, np.ndarray], Optional[Dict[str, list]], str]:
+    """Simulate every combination of broadcast parameter arrays at once.
+
+    Returns the quantities as arrays of the broadcast shape, the resampled
+    trajectory (single runs only) and the method actually used. Raises
+    TimeoutError when integration takes longer than ``timeout`` seconds.
+    """
+    deadline = time.perf_counter() + timeout if timeout is not None else None
+    if method not in METHODS:
+        raise ValueError(f"Unknown method '{method}'. Available: {', '.join(METHODS)}")
+    resolved = resolve_parameters(scenario, params)
+    names = list(resolved)
+    arrays = np.broadcast_arrays(*(np.asarray(resolved[name], dtype=float) for name in names))
+    shape = arrays[0].shape
+    flat = {name: array.ravel() for name, array in zip(names, arrays)}
+    _validate(scenario, flat)
+    if trajectory_points:
+        if flat[names[0]].size != 1:
+            raise ValueError("Trajectories are only available for a single simulation")
+        if not 2 <= trajectory_points <= MAX_TRAJECTORY_POINTS:
+            raise ValueError(f"trajectory_points must be between 2 and {MAX_TRAJECTORY_POINTS}")
+    quantities, trajectory, used = _SCENARIO_FUNCTIONS[scenario](flat, method, trajectory_points, deadline)
+    return {name: np.reshape(values, shape) for name, values in quantities.items()}, trajectory, used
+
+def simulate(scenario: str, params: Optional[Dict[str, float]] = None, method: str = "adaptive",
+             trajectory_points: int = 0, timeout: Optional[float] = None) -> dict:
+    """Simulate one scenario and return its parameters, key quantities (None where undefined) and units"""
+    resolved = resolve_parameters(scenario, params)
+    quantities, trajectory, used = run_batch(scenario, resolved, method, trajectory_points, timeout)
+    values = {name: float(array) for name, array in quantities.items()}
+    result = {
+        "scenario": scenario,
+        "method": used,
+        "parameters": {name: float(value) for name, value in resolved.items()},
+        "quantities": {name: value if math.isfinite(value) else None for name, value in values.items()},
+        "units": {name: unit(scenario, name) for name in [*resolved, *values]},
+    }
+    if trajectory is not None:
+        result["trajectory"] = trajectory
+    return result
+
+def _run_chunk(scenario: str, method: str, timeout: Optional[float],
+               params: Dict[str, np.ndarray]) -> Tuple[Dict[str, np.ndarray], str]:
+    quantities, _, used = run_batch(scenario, params, method, timeout=timeout)
+    return quantities, used
+
+def _column(values: np.ndarray) -> list:
+    """JSON-ready list, with None for undefined (non-finite) values"""
+    if np.isfinite(values).all():
+        return values.tolist()
+    return [value if math.isfinite(value) else None for value in values.tolist()]
+
+def sweep(scenario: str, ranges: Dict[str, Tuple[float, float, int]], params: Optional[Dict[str, float]] = None,
+          method: str = "adaptive", quantities: Optional[list] = None, chunks: int = 1, map_chunks=map,
+          timeout: Optional[float] = None) -> dict:
+    """Evaluate ``scenario`` over the grid of one or two parameter ranges in a single batch.
+
+    ``ranges`` maps each swept parameter to ``(start, stop, steps)``; the other
+    parameters come from ``params`` and the defaults. The result is columnar:
+    one flat list per swept parameter and per quantity, in row-major grid
+    order with ``shape`` giving the grid size. The grid can be split into
+    ``chunks`` evaluated through ``map_chunks`` (e.g. on worker processes).
+
+    Raises ValueError for invalid input and for grids over MAX_SWEEP_POINTS
+    points or MAX_SWEEP_STEPS integration steps, and TimeoutError when a
+    chunk takes longer than ``timeout`` seconds.
+    """
+    if not 1 <= len(ranges) <= MAX_SWEEP_AXES:
+        raise ValueError(f"A sweep needs between 1 and {MAX_SWEEP_AXES} parameter ranges")
+    if method not in METHODS:
+        raise ValueError(f"Unknown method '{method}'. Available: {', '.join(METHODS)}")
+    resolved = resolve_parameters(scenario, {**(params or {}), **{name: 0.0 for name in ranges}})
+    overlap = set(ranges) & set(params or {})
+    if overlap:
+        raise ValueError(f"Parameters both swept and fixed: {', '.join(sorted(overlap))}")
+    if quantities is not None:
+        unknown = set(quantities) - set(UNITS)
+        if unknown:
+            raise ValueError(f"Unknown quantities: {', '.join(sorted(unknown))}")
+    shape = tuple(int(steps) for _, _, steps in ranges.values())
+    for name, steps in zip(ranges, shape):
+        if steps < 1:
+            raise ValueError(f"Range for '{name}' needs at least one step")
+    if math.prod(shape) > MAX_SWEEP_POINTS:
+        raise ValueError(f"A sweep of {math.prod(shape)} points exceeds the limit of {MAX_SWEEP_POINTS}")
+    axes = [np.linspace(float(start), float(stop), steps) for (start, stop, _), steps in zip(ranges.values(), shape)]
+    grid = {name: values.ravel() for name, values in zip(ranges, np.meshgrid(*axes, indexing="ij"))}
+    fixed = {name: value for name, value in resolved.items() if name not in ranges}
+    size = math.prod(shape)
+    batch = {**{name: np.full(size, float(value)) for name, value in fixed.items()}, **grid}
+    _validate(scenario, batch)
+    steps = size * _steps_per_member(scenario, batch, method)
+    if steps > MAX_SWEEP_STEPS:
+        raise ValueError(f"A sweep of about {steps} integration steps exceeds the limit of {MAX_SWEEP_STEPS}; "
+                         "use fewer points or periods")
+    parts = [{name: values[indices] for name, values in batch.items()}
+             for indices in np.array_split(np.arange(size), max(1, min(chunks, size)))]
+    results = list(map_chunks(partial(_run_chunk, scenario, method, timeout), parts))
+    names = list(results[0][0]) if quantities is None else [name for name in results[0][0] if name in quantities]
+    methods = {used for _, used in results}
+    columns = {name: _column(values) for name, values in grid.items()}
+    for name in names:
+        columns[name] = _column(np.concatenate([chunk[name] for chunk, _ in results]))
+    return {
+        "scenario": scenario,
+        "method": methods.pop() if len(methods) == 1 else method,
+        "shape": list(shape),
+        "parameters": {name: float(value) for name, value in fixed.items()},
+        "columns": columns,
+        "units": {name: unit(scenario, name) for name in [*resolved, *names]},
+    }
@@ -1,29 +1,268 @@
+import os
+import re
+import json
+import time
 import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+from tools.cache_utils import Cache
 from tools.gemini_utils import call_gemini_with_retry
-import google.generativeai as genai
+from tools.metrics import metrics
+from tools.model_registry import default_registry
+from tools.process_pool import TimeoutProcessPool
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-def simulate_simple_scenario(scenario_description: str) -> str:
+SCENARIO_MODEL_NAME = 'gemini-2.0-flash'
+SIMULATION_CACHE_TTL_SECONDS = 24 * 3600
+SIMULATION_CACHE_MAX_ENTRIES = 1000
+# Quadratic drag coefficient (0.5 * air density * drag coefficient * area, kg/m) of a football-sized ball,
+# used when a scenario mentions air resistance without quantifying it
+DEFAULT_AIR_DRAG = 0.011
+# Wall-time budget of one simulation, so an expensive scenario cannot hold a worker thread
+SIMULATION_TIMEOUT_SECONDS = float(os.getenv("PHYSICS_SIMULATION_TIMEOUT", "2"))
+# Sweeps run as one in-process batch; with worker processes, grids of at least
+# SWEEP_PARALLEL_MIN_POINTS are split into one chunk per worker. Either way each
+# batch is limited to SWEEP_TIMEOUT_SECONDS.
+SWEEP_PROCESSES = int(os.getenv("PHYSICS_SWEEP_PROCESSES", "0"))
+SWEEP_PARALLEL_MIN_POINTS = int(os.getenv("PHYSICS_SWEEP_PARALLEL_MIN_POINTS", "50000"))
+SWEEP_TIMEOUT_SECONDS = float(os.getenv("PHYSICS_SWEEP_TIMEOUT", "10"))
+
+# Results keyed by scenario, integrator and the full parameter tuple
+simulation_cache = Cache(ttl_seconds=SIMULATION_CACHE_TTL_SECONDS, max_entries=SIMULATION_CACHE_MAX_ENTRIES)
+
+def _engine():
+    """Import the NumPy engine on first use; most requests never simulate anything"""
+    from tools import physics_engine
+    return physics_engine
+
+_sweep_pool = (
+    TimeoutProcessPool(SWEEP_PROCESSES, name="physics-sweep", initializer=_engine) if SWEEP_PROCESSES > 0 else None
+)
+
+def preload():
+    """Import NumPy and the engine (and start any sweep processes) ahead of the first simulation"""
+    _engine()
+    if _sweep_pool is not None:
+        _sweep_pool.start()
+
+_NUMBER = r"(\d+(?:\.\d+)?)"
+# Quantity kind, pattern (on lowercased text) and factor to SI units; the first pattern to match at a
+# position wins
+_QUANTITIES = [
+    ("speed", re.compile(_NUMBER + r"\s*(?:m/s|meters? per second|metres? per second)"), 1.0),
+    ("speed", re.compile(_NUMBER + r"\s*(?:km/h|kph|kilometers? per hour|kilometres? per hour)"), 1 / 3.6),
+    ("speed", re.compile(_NUMBER + r"\s*(?:mph|miles? per hour)"), 0.44704),
+    ("stiffness", re.compile(_NUMBER + r"\s*(?:n/m|newtons? per met(?:er|re))"), 1.0),
+    ("stiffness", re.compile(r"\bk\s*=\s*" + _NUMBER), 1.0),
+    ("angle", re.compile(_NUMBER + r"\s*(?:°|degrees?\b|deg\b)"), 1.0),
+    ("length", re.compile(_NUMBER + r"\s*(?:cm\b|centimet(?:er|re)s?\b)"), 0.01),
+    ("length", re.compile(_NUMBER + r"\s*(?:km\b|kilomet(?:er|re)s?\b)"), 1000.0),
+    ("length", re.compile(_NUMBER + r"\s*(?:ft\b|feet\b|foot\b)"), 0.3048),
+    ("length", re.compile(_NUMBER + r"\s*(?:m\b|met(?:er|re)s?\b)(?!\s*/)"), 1.0),
+    ("mass", re.compile(_NUMBER + r"\s*(?:kg\b|kilograms?\b)"), 1.0),
+    ("mass", re.compile(_NUMBER + r"\s*(?:grams?|g)\b"), 0.001),
+]
+SCENARIO_KEYWORDS = [
+    ("pendulum", re.compile(r"\bpendulum")),
+    ("spring", re.compile(r"\bspring")),
+    ("collision", re.compile(r"\b(?:collid|collision|crash)")),
+    ("projectile", re.compile(r"\b(?:throw|threw|launch|kick|fire|fired|shoot|shot|projectile|cannon)")),
+    ("free_fall", re.compile(r"\b(?:drop|fall|fell|released? from)")),
+]
+NO_DRAG_PATTERN = re.compile(r"\b(?:without|no|ignor\w*|neglect\w*)\s+(?:any\s+)?(?:air resistance|drag)")
+DRAG_PATTERN = re.compile(r"\b(?:air resistance|drag)\b")
+RESTITUTION_PATTERN = re.compile(r"restitution\s*(?:of|=|is)?\s*(0(?:\.\d+)?|1(?:\.0+)?)")
+INELASTIC_PATTERN = re.compile(r"\b(?:perfectly inelastic|stick together|sticks together|stick to each other|coupl)")
+AT_REST_PATTERN = re.compile(r"\b(?:at rest|stationary|not moving)\b")
+HEAD_ON_PATTERN = re.compile(r"\b(?:towards each other|toward each other|head[- ]on|opposite directions?)\b")
+HORIZONTAL_PATTERN = re.compile(r"\bhorizontally\b")
+VERTICAL_PATTERN = re.compile(r"\b(?:straight up(?:wards?)?|vertically(?: up(?:wards?)?)?|directly up(?:wards?)?)\b")
+# Parameters that decide the outcome of each scenario; a description that leaves any of them out is
+# described by Gemini instead of being simulated with engine defaults (e.g. a 45 degree launch for a
+# ball thrown straight up, or a 1 kg wall)
+REQUIRED_PARAMETERS = {
+    "projectile": ("speed", "angle"),
+    "free_fall": ("height",),
+    "pendulum": ("length",),
+    "spring": ("stiffness", "mass"),
+    "collision": ("mass1", "mass2", "velocity1"),
+}
+
+def _find_quantities(text: str) -> Dict[str, List[float]]:
+    """Values in SI units by kind, in order of appearance"""
+    found: List[Tuple[int, str, float]] = []
+    taken = set()
+    for kind, pattern, factor in _QUANTITIES:
+        for match in pattern.finditer(text):
+            if match.start() in taken:
+                continue
+            taken.add(match.start())
+            found.append((match.start(), kind, float(match.group(1)) * factor))
+    quantities: Dict[str, List[float]] = {}
+    for _, kind, value in sorted(found):
+        quantities.setdefault(kind, []).append(value)
+    return quantities
+
+def parse_scenario(description: str) -> Optional[Tuple[str, Dict[str, float]]]:
+    """Scenario type and the parameters stated in a description, e.g.
+    "A ball is thrown at 20 m/s at 30 degrees" -> ("projectile", {"speed": 20.0, "angle": 30.0}).
+
+    Returns None unless the description names a supported scenario and states
+    its REQUIRED_PARAMETERS, so situations that hinge on unstated values are
+    not simulated with made-up defaults.
     """
-    Simulate a simple physics scenario and describe the outcome using AI.
-    
-    Args:
-        scenario_description (str): Description of the physics scenario to simulate
-    
-    Returns:
-        str: Simple description of the scenario outcome with basic explanations
+    text = description.lower()
+    scenario = next((name for name, pattern in SCENARIO_KEYWORDS if pattern.search(text)), None)
+    quantities = _find_quantities(text)
+    if scenario is None and "speed" in quantities and "angle" in quantities:
+        scenario = "projectile"
+    if scenario is None or not quantities:
+        return None
+
+    def first(kind):
+        values = quantities.get(kind)
+        return values[0] if values else None
+
+    params: Dict[str, Optional[float]] = {}
+    if scenario in ("projectile", "free_fall"):
+        params["height"] = first("length")
+        params["mass"] = first("mass")
+        if NO_DRAG_PATTERN.search(text):
+            params["drag"] = 0.0
+        elif DRAG_PATTERN.search(text):
+            params["drag"] = DEFAULT_AIR_DRAG
+        if scenario == "projectile":
+            params["speed"] = first("speed")
+            if HORIZONTAL_PATTERN.search(text):
+                params["angle"] = 0.0
+            elif first("angle") is None and VERTICAL_PATTERN.search(text):
+                params["angle"] = 90.0
+            else:
+                params["angle"] = first("angle")
+    elif scenario == "pendulum":
+        params.update(length=first("length"), amplitude=first("angle"), mass=first("mass"))
+    elif scenario == "spring":
+        params.update(stiffness=first("stiffness"), mass=first("mass"), amplitude=first("length"))
+    else:
+        masses, speeds = quantities.get("mass", []), quantities.get("speed", [])
+        params.update(mass1=masses[0] if masses else None, mass2=masses[1] if len(masses) > 1 else None,
+                      velocity1=speeds[0] if speeds else None)
+        if len(speeds) > 1:
+            params["velocity2"] = -speeds[1] if HEAD_ON_PATTERN.search(text) else speeds[1]
+        elif AT_REST_PATTERN.search(text):
+            params["velocity2"] = 0.0
+        restitution = RESTITUTION_PATTERN.search(text)
+        if restitution:
+            params["restitution"] = float(restitution.group(1))
+        elif INELASTIC_PATTERN.search(text):
+            params["restitution"] = 0.0
+    stated = {name: value for name, value in params.items() if value is not None}
+    if any(name not in stated for name in REQUIRED_PARAMETERS[scenario]):
+        return None
+    return scenario, stated
+
+def run_simulation(scenario: str, params: Optional[Dict[str, float]] = None, method: str = "adaptive",
+                   trajectory_points: int = 0) -> dict:
+    """``physics_engine.simulate`` behind a cache keyed by the resolved parameter tuple.
+
+    Raises ValueError for unknown scenarios, parameters or methods and for
+    out-of-range values, TimeoutError when the simulation exceeds
+    SIMULATION_TIMEOUT_SECONDS and RuntimeError when the integration does not
+    converge.
     """
+    start = time.perf_counter()
+    engine = _engine()
+    resolved = engine.resolve_parameters(scenario, params)
+    key = f"{scenario}|{method}|{trajectory_points}|" + ",".join(
+        f"{name}={float(value)!r}" for name, value in sorted(resolved.items())
+    )
+    cached = simulation_cache.get(key)
+    if cached is not None:
+        metrics.observe("simulate", time.perf_counter() - start, scenario=scenario, outcome="cached")
+        return json.loads(cached)
     try:
-        logger.info(f"Simulating physics scenario: {scenario_description}")
-        
-        # Configure Gemini for physics simulation
-        model = genai.GenerativeModel('gemini-2.0-flash')
-        
-        prompt = f"""
-You are a physics tutor helping students understand simple physics scenarios. 
+        result = engine.simulate(scenario, resolved, method, trajectory_points, SIMULATION_TIMEOUT_SECONDS)
+    except (ValueError, RuntimeError, TimeoutError):
+        metrics.observe("simulate", time.perf_counter() - start, scenario=scenario, outcome="error")
+        raise
+    simulation_cache.set(key, json.dumps(result))
+    metrics.observe("simulate", time.perf_counter() - start, scenario=scenario, outcome="simulated")
+    return result
+
+def _pool_map(fn, chunks):
+    """Run each chunk on a sweep worker, all chunks at once, keeping their order"""
+    chunks = list(chunks)
+    with ThreadPoolExecutor(max_workers=len(chunks)) as executor:
+        return list(executor.map(lambda chunk: _sweep_pool.run(fn, (chunk,), timeout=SWEEP_TIMEOUT_SECONDS), chunks))
+
+def run_sweep(scenario: str, ranges: Dict[str, Tuple[float, float, int]], params: Optional[Dict[str, float]] = None,
+              method: str = "adaptive", quantities: Optional[List[str]] = None) -> dict:
+    """``physics_engine.sweep`` over one or two parameter ranges, on the sweep workers for large grids.
+
+    Raises ValueError for invalid scenarios, parameters, ranges or methods and
+    for grids over the engine's point and step limits, and TimeoutError when
+    the sweep exceeds SWEEP_TIMEOUT_SECONDS.
+    """
+    start = time.perf_counter()
+    engine = _engine()
+    points = 1
+    for _, _, steps in ranges.values():
+        points *= max(int(steps), 1)
+    if _sweep_pool is not None and points >= SWEEP_PARALLEL_MIN_POINTS:
+        options = {"chunks": _sweep_pool.processes, "map_chunks": _pool_map}
+    else:
+        options = {}
+    try:
+        result = engine.sweep(scenario, ranges, params, method, quantities, timeout=SWEEP_TIMEOUT_SECONDS, **options)
+    except (ValueError, TimeoutError):
+        metrics.observe("sweep", time.perf_counter() - start, scenario=scenario, outcome="error")
+        raise
+    metrics.observe("sweep", time.perf_counter() - start, scenario=scenario, outcome="swept")
+    return result
+
+def get_simulation_stats():
+    """Simulation cache counters and sweep process usage (None when sweeping in-process)"""
+    return {
+        "cache": simulation_cache.get_stats(),
+        "sweep_pool": _sweep_pool.get_stats() if _sweep_pool is not None else None,
+    }
+
+def _format_value(value: float) -> str:
+    # Rounding residue such as the range of a vertical throw (cos 90 deg) is shown as 0
+    return f"{0.0 if abs(value) < 1e-9 else value:.4g}"
+
+def format_simulation(result: dict) -> str:
+    """Parameters and key quantities of a simulation result as plain text"""
+    units = result["units"]
+
+    def quantity(name, value):
+        unit = units.get(name, "")
+        return f"{_format_value(value)} {unit}".rstrip()
+
+    method = {"analytic": "closed-form solution", "adaptive": "adaptive Dormand-Prince integration",
+              "fixed": "fixed-step RK4 integration"}[result["method"]]
+    assumed = set(result.get("assumed", ()))
+
+    def parameters(names):
+        return ", ".join(f"{name.replace('_', ' ')} {quantity(name, result['parameters'][name])}" for name in names)
+
+    lines = [f"Simulation of a {result['scenario'].replace('_', ' ')} ({method})",
+             "Parameters: " + parameters(name for name in result["parameters"] if name not in assumed)]
+    if assumed:
+        lines.append("Assumed (not given in the question): "
+                     + parameters(name for name in result["parameters"] if name in assumed))
+    for name, value in result["quantities"].items():
+        if value is not None:
+            lines.append(f"- {name.replace('_', ' ').capitalize()}: {quantity(name, value)}")
+    return "\n".join(lines)
+
+def build_scenario_prompt(scenario_description: str) -> str:
+    """Build the Gemini prompt used to describe a physics scenario."""
+    return f"""
+You are a physics tutor helping students understand simple physics scenarios.
 
 Scenario: {scenario_description}
 
@@ -35,11 +274,83 @@ Please provide a simple, educational response that includes:
 
 Format your response in a clear, educational way suitable for students.
 """
-        
-        response = call_gemini_with_retry(model, prompt)
-        print(f"AI called for Physics Scenario Simulation")
-        return response
-        
+
+def build_simulation_prompt(scenario_description: str, simulation_text: str, assumed: bool = False) -> str:
+    """Build the Gemini prompt that explains an already simulated scenario.
+
+    With ``assumed`` set, some parameters were not given in the question, so
+    Gemini is asked to present them as assumptions and to say where the
+    scenario implies other values rather than to take the results as given.
+    """
+    if assumed:
+        results = ("2. What happens, using the simulated numbers above\n"
+                   "3. Which values were assumed because the question did not give them; if the scenario implies "
+                   "different values, say so and explain how the results would change\n"
+                   "4. The physics principles behind the results")
+    else:
+        results = ("2. What happens, using the simulated numbers above (do not recompute or contradict them)\n"
+                   "3. The physics principles behind the results")
+    return f"""
+You are a physics tutor helping students understand simple physics scenarios.
+
+Scenario: {scenario_description}
+
+The scenario has been simulated numerically and the student has already been shown these results:
+{simulation_text}
+
+Please explain, simply and in a way suitable for students:
+1. What type of physics situation this is
+{results}
+"""
+
+def simulate_scenario(scenario_description: str) -> Optional[dict]:
+    """Simulate a described scenario locally, or None if the engine does not support it or cannot
+    simulate it within its limits (Gemini then describes the scenario on its own).
+
+    The result's "assumed" entry lists the parameters taken from the engine
+    defaults because the description did not state them.
+    """
+    parsed = parse_scenario(scenario_description)
+    if parsed is None:
+        return None
+    scenario, params = parsed
+    try:
+        result = run_simulation(scenario, params)
+        return {**result, "assumed": [name for name in result["parameters"] if name not in params]}
+    except (ValueError, RuntimeError, TimeoutError) as e:
+        logger.info(f"Could not simulate '{scenario_description}': {str(e)}")
+        return None
+
+def simulate_simple_scenario(scenario_description: str, model_registry=None) -> str:
+    """
+    Simulate a simple physics scenario and describe the outcome using AI.
+
+    Supported scenarios (projectiles, falls, pendulums, springs, collisions)
+    are simulated locally and Gemini only explains the computed results;
+    anything else is described by Gemini alone.
+
+    Args:
+        scenario_description (str): Description of the physics scenario to simulate
+        model_registry: Registry to take the shared model from (defaults to the process-wide one)
+
+    Returns:
+        str: Simple description of the scenario outcome with basic explanations
+    """
+    try:
+        logger.info(f"Simulating physics scenario: {scenario_description}")
+
+        # Reuse the shared model instead of building one per call
+        model = (model_registry or default_registry).get_model(SCENARIO_MODEL_NAME)
+
+        simulation = simulate_scenario(scenario_description)
+        if simulation is None:
+            return call_gemini_with_retry(model, build_scenario_prompt(scenario_description))
+
+        simulation_text = format_simulation(simulation)
+        prompt = build_simulation_prompt(scenario_description, simulation_text, bool(simulation["assumed"]))
+        explanation = call_gemini_with_retry(model, prompt)
+        return f"{simulation_text}\n\n{explanation}"
+
     except Exception as e:
         logger.error(f"Error simulating scenario: {str(e)}")
-        return f"Error: Could not simulate scenario '{scenario_description}'. {str(e)}" 
\ No newline at end of file
+        return f"Error: Could not simulate scenario '{scenario_description}'. {str(e)}"
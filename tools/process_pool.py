@@ -0,0 +1,148 @@
+import queue
+import logging
+import threading
+import multiprocessing
+from typing import Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+# Time a new worker may take to start and run its initializer (not counted against call timeouts)
+WORKER_START_TIMEOUT_SECONDS = 60
+
+def _worker_main(conn, initializer):
+    if initializer is not None:
+        initializer()
+    conn.send(("ready", None))
+    while True:
+        try:
+            message = conn.recv()
+        except EOFError:
+            return
+        if message is None:
+            return
+        fn, args = message
+        try:
+            reply = ("ok", fn(*args))
+        except Exception as e:
+            reply = ("error", e)
+        try:
+            conn.send(reply)
+        except Exception as e:
+            # The result or exception could not be pickled
+            conn.send(("error", RuntimeError(f"{type(e).__name__}: {e}")))
+
+class _Worker:
+    def __init__(self, context, name, initializer):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(target=_worker_main, args=(child_conn, initializer), name=name, daemon=True)
+        self.process.start()
+        child_conn.close()
+        if not self.conn.poll(WORKER_START_TIMEOUT_SECONDS):
+            self.kill()
+            raise RuntimeError(f"Worker {name} did not start within {WORKER_START_TIMEOUT_SECONDS} seconds")
+        self.conn.recv()
+
+    def kill(self):
+        self.process.kill()
+        self.process.join()
+        self.conn.close()
+
+    def stop(self):
+        try:
+            self.conn.send(None)
+        except OSError:
+            pass
+        self.process.join(1)
+        if self.process.is_alive():
+            self.process.kill()
+        self.conn.close()
+
+class TimeoutProcessPool:
+    """Bounded set of worker processes that run picklable calls with a hard per-call timeout.
+
+    A call that exceeds its timeout has its worker killed and replaced, so
+    runaway work never outlives the timeout and other callers are unaffected.
+    At most ``processes`` calls run at once; further callers wait for a free
+    worker. Workers are spawned on first use and run ``initializer`` before
+    their first call.
+    """
+
+    def __init__(self, processes: int = 2, name: str = "worker", initializer: Optional[Callable] = None):
+        if processes < 1:
+            raise ValueError("processes must be at least 1")
+        self.processes = processes
+        self.name = name
+        self.initializer = initializer
+        self._context = multiprocessing.get_context("spawn")
+        self._slots = threading.BoundedSemaphore(processes)
+        self._idle = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._started = 0
+        self._calls = 0
+        self._timeouts = 0
+        self._crashes = 0
+
+    def _checkout(self) -> _Worker:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            self._started += 1
+            worker_name = f"{self.name}-{self._started}"
+        logger.info(f"Starting worker process {worker_name}")
+        return _Worker(self._context, worker_name, self.initializer)
+
+    def start(self):
+        """Spawn all workers ahead of the first call (used by the startup warm-up)"""
+        workers = []
+        for _ in range(self.processes):
+            with self._slots:
+                workers.append(self._checkout())
+        for worker in workers:
+            self._idle.put(worker)
+
+    def run(self, fn: Callable, args: tuple = (), timeout: Optional[float] = None):
+        """Run ``fn(*args)`` in a worker; raises TimeoutError, or re-raises the call's exception"""
+        with self._slots:
+            worker = self._checkout()
+            with self._lock:
+                self._calls += 1
+            try:
+                worker.conn.send((fn, args))
+                finished = worker.conn.poll(timeout)
+                if finished:
+                    status, value = worker.conn.recv()
+            except (EOFError, OSError) as e:
+                worker.kill()
+                with self._lock:
+                    self._crashes += 1
+                raise RuntimeError(f"Worker process died: {str(e) or type(e).__name__}") from e
+            if not finished:
+                worker.kill()
+                with self._lock:
+                    self._timeouts += 1
+                raise TimeoutError(f"{getattr(fn, '__name__', 'call')} exceeded {timeout} seconds")
+            self._idle.put(worker)
+        if status == "error":
+            raise value
+        return value
+
+    def get_stats(self):
+        with self._lock:
+            return {
+                "processes": self.processes,
+                "idle": self._idle.qsize(),
+                "started": self._started,
+                "calls": self._calls,
+                "timeouts": self._timeouts,
+                "crashes": self._crashes,
+            }
+
+    def shutdown(self):
+        """Stop the idle workers"""
+        while True:
+            try:
+                self._idle.get_nowait().stop()
+            except queue.Empty:
+                return
@@ -0,0 +1,205 @@
+import re
+import time
+import zlib
+import random
+import threading
+import logging
+from collections import OrderedDict
+from typing import Dict, FrozenSet, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Minimum Jaccard similarity of the question shingles for a stored answer to be reused
+SEMANTIC_CACHE_THRESHOLD = 0.85
+SEMANTIC_CACHE_TTL_SECONDS = 24 * 3600
+SEMANTIC_CACHE_MAX_ENTRIES = 5000
+
+# MinHash signature length and LSH banding: with 8 bands of 4 rows, a pair at
+# 0.85 similarity shares a band (and is compared exactly) 99.7% of the time
+MINHASH_PERMUTATIONS = 32
+LSH_BANDS = 8
+SHINGLE_SIZE = 3
+
+_CONTRACTIONS = [
+    (re.compile(r"\b(what|who|where|when|how|why|it|that|there)'s\b"), r"\1 is"),
+    (re.compile(r"n't\b"), " not"),
+    (re.compile(r"'re\b"), " are"),
+    (re.compile(r"'ll\b"), " will"),
+    (re.compile(r"'ve\b"), " have"),
+    (re.compile(r"'s\b"), ""),  # possessive: "newton's" -> "newton"
+]
+_ORDINALS = {
+    "1st": "first", "2nd": "second", "3rd": "third", "4th": "fourth", "5th": "fifth",
+    "6th": "sixth", "7th": "seventh", "8th": "eighth", "9th": "ninth", "10th": "tenth",
+}
+_ORDINAL_PATTERN = re.compile(r"\b(?:" + "|".join(_ORDINALS) + r")\b")
+# Numbers, operators and single-letter variables must match exactly: "3 * 4" and
+# "3 * 5" are textually close but are different questions
+_EXACT_TOKEN_PATTERN = re.compile(r"\d+(?:\.\d+)?|[-+*/^=<>()%]|\b[b-hj-z]\b")
+_STOPWORDS = frozenset(
+    "a an the is are was were be of to in on for and or what whats please can could would you me tell "
+    "i do does did about my this that some explain".split()
+)
+
+def canonicalize_question(question: str) -> Tuple[str, Tuple[str, ...]]:
+    """Return (normalized words without filler, exact tokens) for a question"""
+    text = question.lower().replace("’", "'")
+    for pattern, replacement in _CONTRACTIONS:
+        text = pattern.sub(replacement, text)
+    text = _ORDINAL_PATTERN.sub(lambda m: _ORDINALS[m.group(0)], text)
+    exact = tuple(_EXACT_TOKEN_PATTERN.findall(text))
+    words = [_stem(word) for word in re.sub(r"[^\w\s]", " ", text).split() if word not in _STOPWORDS]
+    return " ".join(words), exact
+
+def _stem(word: str) -> str:
+    # Crude plural folding, applied alike to both sides of a comparison ("laws" -> "law")
+    if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+        return word[:-1]
+    return word
+
+def shingles(text: str, size: int = SHINGLE_SIZE) -> FrozenSet[str]:
+    """Character n-grams of ``text``; robust to plurals, typos and word order around them"""
+    if len(text) <= size:
+        return frozenset([text]) if text else frozenset()
+    return frozenset(text[i:i + size] for i in range(len(text) - size + 1))
+
+def jaccard(a: FrozenSet[str], b: FrozenSet[str]) -> float:
+    if not a and not b:
+        return 1.0
+    intersection = len(a & b)
+    return intersection / (len(a) + len(b) - intersection)
+
+class MinHasher:
+    """MinHash signatures using differently seeded crc32 as the hash functions.
+
+    crc32 runs in C and, unlike ``hash()``, is stable across processes, so
+    signatures can be compared between workers.
+    """
+
+    def __init__(self, permutations: int = MINHASH_PERMUTATIONS, seed: int = 1):
+        rng = random.Random(seed)
+        self.seeds = [rng.getrandbits(32) for _ in range(permutations)]
+
+    def signature(self, items: FrozenSet[str]) -> Tuple[int, ...]:
+        encoded = [item.encode("utf-8") for item in items] or [b""]
+        return tuple(min(zlib.crc32(item, seed) for item in encoded) for seed in self.seeds)
+
+class SemanticCache:
+    """Near-duplicate answer cache for history-free questions, partitioned by agent.
+
+    Questions are canonicalized (case, punctuation, contractions, ordinals and
+    filler words), split into character shingles and indexed by MinHash LSH
+    bands. A lookup compares the exact Jaccard similarity of the candidates
+    that share a band and returns the best stored answer at or above
+    ``threshold``, provided numbers, operators and variables match exactly.
+    Entries expire after ``ttl_seconds`` and the least recently used ones are
+    evicted beyond ``max_entries``.
+    """
+
+    def __init__(self, threshold: float = SEMANTIC_CACHE_THRESHOLD, ttl_seconds: float = SEMANTIC_CACHE_TTL_SECONDS,
+                 max_entries: int = SEMANTIC_CACHE_MAX_ENTRIES, permutations: int = MINHASH_PERMUTATIONS,
+                 bands: int = LSH_BANDS):
+        if permutations % bands:
+            raise ValueError("permutations must be a multiple of bands")
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.bands = bands
+        self.rows = permutations // bands
+        self._hasher = MinHasher(permutations)
+        # entry id -> (agent, exact tokens, shingles, band keys, answer, timestamp), LRU order
+        self._entries: "OrderedDict[int, Tuple]" = OrderedDict()
+        self._buckets: Dict[Tuple, set] = {}
+        # (agent, exact tokens, shingles) -> entry id, so re-asking a question replaces its answer
+        self._keys: Dict[Tuple, int] = {}
+        self._next_id = 0
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._near_misses = 0
+        self._hit_similarity = 0.0
+
+    def _features(self, agent: str, question: str):
+        text, exact = canonicalize_question(question)
+        items = shingles(text)
+        signature = self._hasher.signature(items)
+        band_keys = [(agent, band, signature[band * self.rows:(band + 1) * self.rows]) for band in range(self.bands)]
+        return exact, items, band_keys
+
+    def _delete(self, entry_id: int):
+        agent, exact, items, band_keys, _, _ = self._entries.pop(entry_id)
+        del self._keys[(agent, exact, items)]
+        for key in band_keys:
+            bucket = self._buckets.get(key)
+            if bucket is not None:
+                bucket.discard(entry_id)
+                if not bucket:
+                    del self._buckets[key]
+
+    def get(self, agent: str, question: str) -> Optional[str]:
+        """Return the stored answer of the most similar question, or None below the threshold"""
+        exact, items, band_keys = self._features(agent, question)
+        now = time.time()
+        with self._lock:
+            candidates = set()
+            for key in band_keys:
+                candidates.update(self._buckets.get(key, ()))
+            best_id, best_similarity = None, 0.0
+            for entry_id in candidates:
+                _, entry_exact, entry_items, _, _, timestamp = self._entries[entry_id]
+                if now - timestamp > self.ttl_seconds:
+                    self._delete(entry_id)
+                    continue
+                if entry_exact != exact:
+                    continue
+                similarity = jaccard(items, entry_items)
+                if similarity > best_similarity:
+                    best_id, best_similarity = entry_id, similarity
+            if best_id is not None and best_similarity >= self.threshold:
+                self._entries.move_to_end(best_id)
+                self._hits += 1
+                self._hit_similarity += best_similarity
+                logger.info(f"Semantic cache hit for {agent} question (similarity {best_similarity:.2f})")
+                return self._entries[best_id][4]
+            self._misses += 1
+            if best_id is not None:
+                self._near_misses += 1
+        return None
+
+    def set(self, agent: str, question: str, answer: str):
+        exact, items, band_keys = self._features(agent, question)
+        with self._lock:
+            existing = self._keys.get((agent, exact, items))
+            if existing is not None:
+                self._delete(existing)
+            entry_id = self._next_id
+            self._next_id += 1
+            self._entries[entry_id] = (agent, exact, items, band_keys, answer, time.time())
+            self._keys[(agent, exact, items)] = entry_id
+            for key in band_keys:
+                self._buckets.setdefault(key, set()).add(entry_id)
+            while len(self._entries) > self.max_entries:
+                self._delete(next(iter(self._entries)))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._buckets.clear()
+            self._keys.clear()
+
+    def get_stats(self) -> Dict[str, float]:
+        """Return size, hit/miss counters and the average similarity of hits.
+
+        ``near_misses`` counts misses where a candidate was found but fell below the threshold.
+        """
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "entries": len(self._entries),
+                "threshold": self.threshold,
+                "hits": self._hits,
+                "misses": self._misses,
+                "near_misses": self._near_misses,
+                "hit_ratio": self._hits / lookups if lookups else 0.0,
+                "avg_hit_similarity": self._hit_similarity / self._hits if self._hits else 0.0,
+            }
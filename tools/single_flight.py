@@ -0,0 +1,84 @@
+import asyncio
+import logging
+import threading
+from concurrent.futures import Future
+from typing import Dict
+
+logger = logging.getLogger(__name__)
+
+class SingleFlight:
+    """Coalesce concurrent calls that share a key into one in-flight call.
+
+    The first caller for a key (the leader) runs the function; callers that
+    arrive while it is running (followers) wait for the leader and receive its
+    result or exception. A ``concurrent.futures.Future`` is used for each
+    flight so threads and asyncio tasks on any event loop can share one
+    registry.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[str, Future] = {}
+        self._leaders = 0
+        self._followers = 0
+
+    def _join(self, key: str):
+        with self._lock:
+            future = self._calls.get(key)
+            if future is not None:
+                self._followers += 1
+                return future, False
+            future = Future()
+            self._calls[key] = future
+            self._leaders += 1
+            return future, True
+
+    def _finish(self, key: str, future: Future, result=None, error=None):
+        try:
+            # A flight that is already settled has nobody left to tell
+            if not future.done():
+                if error is not None:
+                    future.set_exception(error)
+                else:
+                    future.set_result(result)
+        finally:
+            with self._lock:
+                if self._calls.get(key) is future:
+                    del self._calls[key]
+
+    def do(self, key: str, fn):
+        """Run ``fn()`` once for all concurrent callers with the same key"""
+        future, is_leader = self._join(key)
+        if not is_leader:
+            logger.info(f"Waiting for in-flight call for key: {key[:50]}...")
+            return future.result()
+        try:
+            result = fn()
+        except BaseException as e:
+            self._finish(key, future, error=e)
+            raise
+        self._finish(key, future, result=result)
+        return result
+
+    async def do_async(self, key: str, coro_fn):
+        """Await ``coro_fn()`` once for all concurrent callers with the same key"""
+        future, is_leader = self._join(key)
+        if not is_leader:
+            logger.info(f"Waiting for in-flight call for key: {key[:50]}...")
+            # Shielded so a cancelled follower does not cancel the flight shared with the others
+            return await asyncio.shield(asyncio.wrap_future(future))
+        try:
+            result = await coro_fn()
+        except BaseException as e:
+            self._finish(key, future, error=e)
+            raise
+        self._finish(key, future, result=result)
+        return result
+
+    def get_stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "in_flight": len(self._calls),
+                "leaders": self._leaders,
+                "coalesced": self._followers,
+            }